@@ -0,0 +1,271 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+WORD_ORDERS = ("msb", "lsb")
+
+
+class AerCodec:
+    """Packs events into the word sequences of `high_speed_out_bus` and unpacks captured words back into events.
+
+    An event of `num_sends * pins` bits is sent as `num_sends` successive `pins`-wide words. With word order "msb" the
+    first word holds the most significant bits of the event. Events can optionally be split into named fields, which are
+    laid out from the most to the least significant bits, like the fields of an SPI instruction message.
+
+    Example:
+        codec = AerCodec(pins=8, num_sends=3, fields=[("neuron", 16), ("timestamp", 8)])
+        words = codec.pack({"neuron": neurons, "timestamp": timestamps})
+        events = codec.unpack(words)
+    """
+
+    def __init__(self, pins: int, num_sends: int, fields: Optional[Sequence[Tuple[str, int]]] = None, word_order: str = "msb"):
+        """Create a codec.
+
+        Args:
+            pins (int): Number of data pins, `HIGH_SPEED_OUT_PINS`
+            num_sends (int): Number of words per event
+            fields (Optional[Sequence[Tuple[str, int]]], optional): Names and bit widths of the fields of an event, most significant first. Defaults to None (events are plain integers).
+            word_order (str, optional): "msb" to send the most significant word first, "lsb" for the least significant. Defaults to "msb".
+        """
+
+        if word_order not in WORD_ORDERS:
+            raise ValueError(f"Unknown word order {word_order} (supported: {WORD_ORDERS})")
+
+        assert pins > 0 and num_sends > 0, "Number of pins and number of sends must be positive"
+        assert pins * num_sends <= 64, "Events can be at most 64 bits wide"
+
+        self.pins = pins
+        self.num_sends = num_sends
+        self.word_order = word_order
+        self.fields = list(fields or [])
+
+        if sum(bit_width for _, bit_width in self.fields) > self.event_bit_width:
+            raise ValueError(f"Fields are {sum(bit_width for _, bit_width in self.fields)} bits wide, but an event only has {self.event_bit_width} bits")
+
+        # Shift of every word within its event, in the order in which the words are sent
+        shifts = np.arange(num_sends, dtype=np.uint64) * np.uint64(pins)
+        self._shifts = shifts[::-1].copy() if word_order == "msb" else shifts
+        self._word_mask = np.uint64(2**pins - 1)
+
+    @property
+    def event_bit_width(self):
+        return self.pins * self.num_sends
+
+    def _field_shifts(self) -> List[Tuple[str, int, int]]:
+        shifts = []
+        shift = sum(bit_width for _, bit_width in self.fields)
+
+        for name, bit_width in self.fields:
+            shift -= bit_width
+            shifts.append((name, shift, bit_width))
+
+        return shifts
+
+    def encode_fields(self, fields: Dict[str, Union[np.ndarray, Sequence[int]]]) -> np.ndarray:
+        """Combine arrays of field values into event values."""
+
+        values = None
+
+        for name, shift, bit_width in self._field_shifts():
+            field = np.asarray(fields[name], dtype=np.uint64)
+
+            if field.size and field.max() >= 2**bit_width:
+                raise ValueError(f"Value of field {name} exceeds its bit width of {bit_width} bits")
+
+            values = (field << np.uint64(shift)) if values is None else values | (field << np.uint64(shift))
+
+        return values if values is not None else np.zeros(0, dtype=np.uint64)
+
+    def decode_fields(self, events: np.ndarray) -> Dict[str, np.ndarray]:
+        """Split event values into arrays of field values."""
+
+        return {name: (events >> np.uint64(shift)) & np.uint64(2**bit_width - 1) for name, shift, bit_width in self._field_shifts()}
+
+    def pack(self, events: Union[np.ndarray, Sequence[int], Dict[str, np.ndarray]]) -> np.ndarray:
+        """Split events into the words that are sent on the pins, in the order in which they are sent.
+
+        Args:
+            events (Union[np.ndarray, Sequence[int], Dict[str, np.ndarray]]): Event values, or arrays of field values
+
+        Returns:
+            np.ndarray: Array of uint64 words, `num_sends` per event
+        """
+
+        if isinstance(events, dict):
+            events = self.encode_fields(events)
+
+        events = np.asarray(events, dtype=np.uint64)
+
+        if self.event_bit_width < 64 and events.size and events.max() >= 2**self.event_bit_width:
+            raise ValueError(f"Event value exceeds the event bit width of {self.event_bit_width} bits")
+
+        return ((events[:, None] >> self._shifts) & self._word_mask).ravel()
+
+    def unpack(self, words: Union[np.ndarray, Sequence[int]], output: str = "events") -> Union[np.ndarray, Dict[str, np.ndarray]]:
+        """Reassemble events from the words that were received, for example from `words_from_trace`.
+
+        Args:
+            words (Union[np.ndarray, Sequence[int]]): Words in the order in which they were received; a number that is not a multiple of `num_sends` raises a ValueError
+            output (str, optional): "events" for event values or "fields" for a dictionary of field values. Defaults to "events".
+
+        Returns:
+            Union[np.ndarray, Dict[str, np.ndarray]]: Event values or field values
+        """
+
+        words = np.asarray(words, dtype=np.uint64)
+
+        if words.size % self.num_sends:
+            raise ValueError(f"Number of words ({words.size}) is not a multiple of the number of sends ({self.num_sends})")
+
+        events = np.bitwise_or.reduce(words.reshape(-1, self.num_sends) << self._shifts, axis=1) if words.size else np.zeros(0, dtype=np.uint64)
+
+        if output == "fields":
+            return self.decode_fields(events)
+        elif output != "events":
+            raise ValueError(f"Unknown output {output} (supported: events, fields)")
+
+        return events
+
+
+def words_from_trace(request: np.ndarray, data: np.ndarray, acknowledge: Optional[np.ndarray] = None) -> np.ndarray:
+    """Extract the words of a captured four-phase handshake trace, for example from a logic analyzer.
+
+    `high_speed_out_bus` drives a new word together with the rising edge of `request` and keeps it until the handshake is
+    complete, so every word is taken at the first sample at which `request` is high, or at which `acknowledge` is high
+    when that is given, as that is where the receiver takes it.
+
+    Args:
+        request (np.ndarray): Request level per sample
+        data (np.ndarray): Data per sample, as integers, or as bits with shape (num_samples, pins) with the most significant pin first
+        acknowledge (Optional[np.ndarray], optional): Acknowledge level per sample. Defaults to None.
+
+    Returns:
+        np.ndarray: Array of uint64 words, in the order in which they were sent
+    """
+
+    request = np.asarray(request, dtype=bool)
+    data = np.asarray(data)
+
+    if data.ndim == 2:
+        shifts = np.arange(data.shape[1] - 1, -1, -1, dtype=np.uint64)
+        data = (data.astype(np.uint64) << shifts).sum(axis=1, dtype=np.uint64)
+
+    # The data is valid as long as the request is high, so it can be sampled at either rising edge
+    strobe = request if acknowledge is None else np.asarray(acknowledge, dtype=bool)
+    edges = np.flatnonzero(np.r_[strobe[:1], strobe[1:] & ~strobe[:-1]])
+
+    return np.asarray(data, dtype=np.uint64)[edges]
+
+
+HANDSHAKE_CASES = ("best", "mean", "worst")
+
+
+class HandshakeModel:
+    """Cycle-approximate model of the four-phase handshake between `high_speed_out_bus` and `high_speed_in_bus`.
+
+    Every word takes four crossings: the request rises, the acknowledge rises, the request falls and the acknowledge
+    falls. Each crossing takes `sync_stages - 1` cycles of the receiving clock plus the phase between both clocks (0 to 1
+    cycle) until the `double_flop_synchronizer` output changes, and one more cycle for the register that responds to it.
+    A word thus takes `2 * (sync_stages + phase)` cycles of both the sending and the receiving clock.
+    """
+
+    def __init__(self, out_frequency: float, in_frequency: float, sync_stages: int = 2):
+        """Create a handshake model.
+
+        Args:
+            out_frequency (float): Frequency of the clock of `high_speed_out_bus` in Hz
+            in_frequency (float): Frequency of the clock of `high_speed_in_bus` in Hz
+            sync_stages (int, optional): Number of flops of the synchronizers. Defaults to 2.
+        """
+
+        assert out_frequency > 0 and in_frequency > 0, "Clock frequencies must be positive"
+
+        self.out_frequency = out_frequency
+        self.in_frequency = in_frequency
+        self.sync_stages = sync_stages
+
+    def word_time(self, case: str = "mean") -> float:
+        """Time between the rising edges of the requests of two successive words, in seconds.
+
+        Args:
+            case (str, optional): "best", "mean" or "worst" phase between the clocks at every crossing. Defaults to "mean".
+        """
+
+        if case not in HANDSHAKE_CASES:
+            raise ValueError(f"Unknown case {case} (supported: {HANDSHAKE_CASES})")
+
+        phase = HANDSHAKE_CASES.index(case) / 2
+
+        return 2 * (self.sync_stages + phase) * (1 / self.out_frequency + 1 / self.in_frequency)
+
+    def events_per_second(self, num_sends: int, gap_cycles: float = 0, case: str = "mean") -> float:
+        """Maximum event rate when every event is sent as `num_sends` words.
+
+        Args:
+            num_sends (int): Number of words per event
+            gap_cycles (float, optional): Cycles of the sending clock between two events, for example for the state machine that drives the bus. Defaults to 0.
+            case (str, optional): See `word_time`. Defaults to "mean".
+        """
+
+        return 1 / (num_sends * self.word_time(case) + gap_cycles / self.out_frequency)
+
+    def bits_per_second(self, pins: int, case: str = "mean") -> float:
+        """Raw bandwidth of the data pins."""
+
+        return pins / self.word_time(case)
+
+    def simulate(self, num_words: int = 1000, rng: Optional[np.random.Generator] = None) -> float:
+        """Simulate the handshake registers of both buses clock edge by clock edge and measure the mean word time.
+
+        Both clocks start with a random phase; pass a seeded generator for reproducible results.
+
+        Returns:
+            float: Mean time between the rising edges of the requests of successive words, in seconds
+        """
+
+        rng = rng if rng is not None else np.random.default_rng()
+
+        out_period = 1 / self.out_frequency
+        in_period = 1 / self.in_frequency
+        out_time = rng.random() * out_period
+        in_time = rng.random() * in_period
+
+        request, acknowledge = 0, 0
+        acknowledge_flops = [0] * self.sync_stages
+        request_flops = [0] * self.sync_stages
+
+        request_rises = []
+
+        while len(request_rises) <= num_words:
+            out_edge = out_time <= in_time
+            in_edge = in_time <= out_time
+
+            # Nonblocking updates: both domains see the values from before the edge
+            next_request = request
+
+            if out_edge:
+                acknowledge_sync = acknowledge_flops[-1]
+
+                if not acknowledge_sync and not request:
+                    next_request = 1
+                    request_rises.append(out_time)
+                elif acknowledge_sync and request:
+                    next_request = 0
+
+                acknowledge_flops = [acknowledge] + acknowledge_flops[:-1]
+                out_time += out_period
+
+            if in_edge:
+                request_sync = request_flops[-1]
+
+                if not acknowledge and request_sync:
+                    acknowledge = 1
+                elif acknowledge and not request_sync:
+                    acknowledge = 0
+
+                request_flops = [request] + request_flops[:-1]
+                in_time += in_period
+
+            request = next_request
+
+        return (request_rises[-1] - request_rises[0]) / num_words
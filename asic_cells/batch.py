@@ -0,0 +1,242 @@
+from typing import Dict, Iterable, List, Tuple, Union
+
+import time
+
+import numpy as np
+
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.utils import as_word_array
+
+
+class BatchResult:
+    """Message stream of a transaction batch, together with its cost."""
+
+    def __init__(self, words: np.ndarray, num_headers: int, unbatched_num_words: int, message_bit_width: int):
+        self.words = words
+        self.num_headers = num_headers
+        self.unbatched_num_words = unbatched_num_words
+
+        self._message_bit_width = message_bit_width
+
+    @property
+    def num_words(self):
+        return self.words.size
+
+    @property
+    def num_data_words(self):
+        return self.words.size - self.num_headers
+
+    def bus_time(self, sck_frequency: float):
+        """Estimate the time it takes to shift the whole batch over the SPI bus.
+
+        Args:
+            sck_frequency (float): Frequency of the SPI clock in Hz
+
+        Returns:
+            float: Time in seconds
+        """
+
+        return self.words.size * self._message_bit_width / sck_frequency
+
+    def __repr__(self):
+        return f"BatchResult(num_words={self.num_words}, num_headers={self.num_headers}, unbatched_num_words={self.unbatched_num_words})"
+
+
+class _Phase:
+    """Operations that can be freely reordered: all writes of a phase are sent before all of its reads."""
+
+    def __init__(self):
+        self.writes: Dict[int, List[Tuple[int, np.ndarray]]] = {}
+        self.reads: Dict[int, List[Tuple[int, int]]] = {}
+
+    def overlaps_read(self, code: int, start_address: int, num_transactions: int):
+        return any(start < start_address + num_transactions and start_address < start + length for start, length in self.reads.get(code, []))
+
+
+def _merge_writes(segments: List[Tuple[int, np.ndarray]]):
+    """Merge overlapping and adjacent writes into contiguous runs, where later writes override earlier ones."""
+
+    order = sorted(range(len(segments)), key=lambda i: segments[i][0])
+
+    runs = []
+
+    for i in order:
+        start, data = segments[i]
+
+        if runs and start <= runs[-1][1]:
+            runs[-1][1] = max(runs[-1][1], start + data.size)
+            runs[-1][2].append(i)
+        else:
+            runs.append([start, start + data.size, [i]])
+
+    merged = []
+
+    for start, end, indices in runs:
+        run = np.empty(end - start, dtype=np.uint64)
+
+        # Apply the writes in issue order, such that the last write to an address wins
+        for i in sorted(indices):
+            segment_start, data = segments[i]
+            run[segment_start-start:segment_start-start+data.size] = data
+
+        merged.append((start, run))
+
+    return merged
+
+
+def _merge_reads(ranges: List[Tuple[int, int]], max_gap: float):
+    """Merge read ranges that overlap or are at most `max_gap` addresses apart."""
+
+    merged = []
+
+    for start, length in sorted(ranges):
+        if merged and start - (merged[-1][0] + merged[-1][1]) <= max_gap:
+            merged[-1][1] = max(merged[-1][1], start + length - merged[-1][0])
+        else:
+            merged.append([start, length])
+
+    return [(start, length) for start, length in merged]
+
+
+class TransactionBatch:
+    """Collects logical SPI operations and turns them into a message stream with as few headers as possible.
+
+    Writes to overlapping or adjacent addresses of the same memory (or of the configuration memory) are merged into one
+    run, where the last write to an address wins. Reads of overlapping or nearby ranges are merged as well. Independent
+    operations are reordered, but a read always sees exactly the writes to the same address that were added before it:
+    a write that overlaps a read that was added earlier starts a new phase, which is only sent after that read.
+
+    Configuration writes are ordering barriers, as they typically control what the chip does with its memories (for
+    example setting an enable after loading them): a configuration write is sent after all memory writes and reads that
+    were added before it, and before all operations that are added after it. Only configuration writes that follow each
+    other without a memory write or read in between are merged.
+
+    Example:
+        batch = TransactionBatch(spi_message_creator)
+        batch.write_config({"enable": 1})
+        batch.write_memory("weights", weights)
+        batch.read_pointers(["state", "counter"])
+        result = batch.build()
+    """
+
+    def __init__(self, spi_message_creator: SpiMessageCreator, header_cost: float = 1.0):
+        """Create an empty batch.
+
+        Args:
+            spi_message_creator (SpiMessageCreator): Message creator with the layout of the chip
+            header_cost (float, optional): Cost of an extra read burst, in words, see `SpiMessageCreator.plan_pointer_reads`. Defaults to 1.0.
+        """
+
+        self.spi_message_creator = spi_message_creator
+        self.header_cost = header_cost
+
+        self._phases = [_Phase()]
+        self._unbatched_num_words = 0
+
+    def _bursts(self, num_transactions: int):
+        return -(-num_transactions // (2**self.spi_message_creator.num_transactions_bit_width-1))
+
+    def _add_write(self, code: int, start_address: int, data: np.ndarray):
+        phase = self._phases[-1]
+
+        if code == 0:
+            # Configuration writes of a phase are sent first, so they can only join a phase without other operations
+            if phase.reads or any(write_code != 0 for write_code in phase.writes):
+                self._phases.append(_Phase())
+        elif phase.overlaps_read(code, start_address, data.size):
+            self._phases.append(_Phase())
+
+        self._phases[-1].writes.setdefault(code, []).append((start_address, data))
+        self._unbatched_num_words += data.size + self._bursts(data.size)
+
+    def _add_read(self, code: int, start_address: int, num_transactions: int):
+        self._phases[-1].reads.setdefault(code, []).append((start_address, num_transactions))
+        self._unbatched_num_words += num_transactions + self._bursts(num_transactions)
+
+    def write_config(self, config: Dict[str, Union[int, List[int]]]):
+        """Add a write to the configuration memory, see `SpiMessageCreator.create_config_words`."""
+
+        for key, value in config.items():
+            values = self.spi_message_creator._config_values(key, value)
+
+            if values:
+                self._add_write(0, self.spi_message_creator._config_start_addresses[key], np.array(values, dtype=np.uint64))
+
+    def write_memory(self, key: str, data, start_address: int = 0):
+        """Add a write to a memory, see `SpiMessageCreator.create_write_memory_array`."""
+
+        index, max_data_length = self.spi_message_creator._memory_indices_and_max_addresses[key]
+        data = as_word_array(data, self.spi_message_creator.message_bit_width)
+
+        assert start_address >= 0, "Start address must be non-negative"
+        assert data.size > 0, "Data must not be empty"
+
+        if data.size + start_address > max_data_length:
+            raise ValueError(f"Too many transactions ({data.size}) for {key} at start address {start_address} (max: {max_data_length-start_address})")
+
+        self._add_write(index + 1, start_address, data.copy())
+
+    def read_memory(self, key: str, start_address: int, num_transactions: int):
+        """Add a read from a memory, see `SpiMessageCreator.create_read_memory_array`."""
+
+        index, max_data_length = self.spi_message_creator._memory_indices_and_max_addresses[key]
+
+        assert start_address >= 0, "Start address must be non-negative"
+        assert num_transactions > 0, "Number of transactions must be positive"
+
+        if start_address + num_transactions > max_data_length:
+            raise ValueError(f"Too many transactions for {key} at start address {start_address} (max: {max_data_length-start_address})")
+
+        self._add_read(index + 1, start_address, num_transactions)
+
+    def read_pointers(self, keys: Iterable[str]):
+        """Add a read of a set of pointers."""
+
+        for key in keys:
+            self._add_read(0, self.spi_message_creator._pointer_addresses[key], 1)
+
+    def build(self):
+        """Create the message stream of all operations in the batch.
+
+        Returns:
+            BatchResult: Message stream and its cost
+        """
+
+        start_time = time.perf_counter()
+
+        creator = self.spi_message_creator
+        register_map = creator.register_map
+
+        write_prefixes = {0: register_map.header(False, 0, 0, 0)}
+        read_prefixes = {0: register_map.header(True, 0, 0, 0)}
+
+        for memory in register_map.memories.values():
+            write_prefixes[memory.code] = memory.write_header_prefix
+            read_prefixes[memory.code] = memory.read_header_prefix
+
+        streams = []
+        num_headers = 0
+
+        for phase in self._phases:
+            for code in sorted(phase.writes):
+                for start_address, run in _merge_writes(phase.writes[code]):
+                    streams.append(creator._interleave_headers(write_prefixes[code], run, start_address))
+                    num_headers += self._bursts(run.size)
+
+            for code in sorted(phase.reads):
+                if code == 0:
+                    # Pointers that do not exist cannot be read, so only merge up to the number of pointers
+                    addresses = {address for start, length in phase.reads[0] for address in range(start, start + length)}
+                    ranges = creator.plan_pointer_reads([name for name, address in creator._pointer_addresses.items() if address in addresses], self.header_cost)
+                else:
+                    ranges = _merge_reads(phase.reads[code], self.header_cost)
+
+                for start_address, num_transactions in ranges:
+                    streams.append(creator._interleave_headers(read_prefixes[code], np.zeros(num_transactions, dtype=np.uint64), start_address))
+                    num_headers += self._bursts(num_transactions)
+
+        words = np.concatenate(streams) if streams else np.zeros(0, dtype=np.uint64)
+
+        creator._record_words("TransactionBatch.build", start_time, words)
+
+        return BatchResult(words, num_headers, self._unbatched_num_words, creator.message_bit_width)
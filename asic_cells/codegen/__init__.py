@@ -0,0 +1,2 @@
+from asic_cells.codegen.config_memory import generate_config_memory, generate_config_memory_file
+from asic_cells.codegen.pointers import generate_pointers, generate_pointers_file
@@ -0,0 +1,122 @@
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from pathlib import Path
+
+import functools
+import hashlib
+import json
+import os
+
+from jinja2 import Template
+
+GENERATION_CACHE_VERSION = 1
+
+_templates: Dict[Tuple[str, int, int], Tuple[Template, str]] = {}
+
+
+@functools.lru_cache(maxsize=None)
+def package_version() -> str:
+    """Version of the installed asic-cells package, or "unknown" if it is not installed."""
+
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:
+        return "unknown"
+
+    try:
+        return version("asic-cells")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def load_template(template_path: Union[str, Path]) -> Tuple[Template, str]:
+    """Load and compile a Jinja2 template, or reuse it if the file did not change since it was compiled last.
+
+    Args:
+        template_path (Union[str, Path]): Path to the template
+
+    Returns:
+        Tuple[Template, str]: Compiled template and the SHA-256 digest of its source
+    """
+
+    template_path = Path(template_path)
+    stat = template_path.stat()
+    key = (str(template_path), stat.st_mtime_ns, stat.st_size)
+
+    if key not in _templates:
+        source = template_path.read_text()
+        _templates[key] = (Template(source, trim_blocks=True, lstrip_blocks=True), hashlib.sha256(source.encode()).hexdigest())
+
+    return _templates[key]
+
+
+def generation_key(layout, template_path: Optional[Union[str, Path]] = None) -> str:
+    """Hash of everything that determines a generated file: the layout, the template (if any) and the package version."""
+
+    template_hash = load_template(template_path)[1] if template_path is not None else None
+    data = [GENERATION_CACHE_VERSION, package_version(), template_hash, layout]
+
+    return hashlib.sha256(json.dumps(data, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+def _stamp_path(output_path: Path) -> Path:
+    return output_path.parent / f".{output_path.name}.hash"
+
+
+def is_up_to_date(output_path: Union[str, Path], key: str) -> bool:
+    """Check whether `output_path` was generated for `key` and was not modified since then."""
+
+    output_path = Path(output_path)
+
+    try:
+        with open(_stamp_path(output_path)) as f:
+            stamp = json.load(f)
+
+        stat = output_path.stat()
+    except (OSError, ValueError):
+        return False
+
+    return stamp.get("key") == key and stamp.get("size") == stat.st_size and stamp.get("mtime_ns") == stat.st_mtime_ns
+
+
+def write_if_changed(output_path: Union[str, Path], key: str, render: Callable[[], str], force: bool = False) -> bool:
+    """Generate a file, unless it is up to date for `key`.
+
+    Rendering is skipped entirely if the stamp next to the output file matches. Otherwise the output is rendered, but it
+    is only written if its contents changed, such that the modification time (and therefore downstream builds) is only
+    invalidated by actual changes.
+
+    Args:
+        output_path (Union[str, Path]): Path of the generated file
+        key (str): Hash of the generator inputs, see `generation_key`
+        render (Callable[[], str]): Function that renders the contents of the file
+        force (bool, optional): Render even if the stamp matches. Defaults to False.
+
+    Returns:
+        bool: Whether the file was (re)written
+    """
+
+    output_path = Path(output_path)
+
+    if not force and is_up_to_date(output_path, key):
+        return False
+
+    contents = render()
+
+    try:
+        written = output_path.read_text() != contents
+    except OSError:
+        written = True
+
+    if written:
+        # Write to a temporary file first, such that a concurrent build never reads a partially written file
+        temporary_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+        temporary_path.write_text(contents)
+        temporary_path.replace(output_path)
+
+    stat = output_path.stat()
+
+    with open(_stamp_path(output_path), "w") as f:
+        json.dump({"key": key, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}, f)
+
+    return written
@@ -0,0 +1,185 @@
+from typing import List, Optional, Tuple
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from asic_cells.codegen.cache import generation_key, write_if_changed
+from asic_cells.codegen.config_memory import CONFIG_MEMORY_MODES, generate_config_memory_file
+from asic_cells.codegen.pointers import generate_pointers_file
+from asic_cells.register_map import RegisterMap
+
+BIT_WIDTH_KEYS = ("message_bit_width", "code_bit_width", "address_bit_width")
+REGISTER_MAP_SUFFIX = "_register_map.json"
+
+
+class GenerationResult:
+    """Outputs of a single JSON layout and how long it took to generate them."""
+
+    def __init__(self, json_path: str, outputs: List[Tuple[str, bool]], seconds: float, skipped: List[str], error: Optional[str] = None):
+        self.json_path = json_path
+        self.outputs = outputs
+        self.seconds = seconds
+        self.skipped = skipped
+        self.error = error
+
+    @property
+    def num_written(self):
+        return sum(written for _, written in self.outputs)
+
+    def __repr__(self):
+        return f"GenerationResult(json_path={self.json_path!r}, num_outputs={len(self.outputs)}, num_written={self.num_written}, error={self.error!r})"
+
+
+def generate_layout(json_path: str, output_dir: Optional[str] = None, force: bool = False, bit_widths: Optional[dict] = None, config_memory_mode: str = "unrolled") -> GenerationResult:
+    """Generate the configuration memory (`<name>.sv`), pointer bridge (`<name>.v`) and register map
+    (`<name>_register_map.json`) of a JSON layout, for the entries that are present in the layout.
+
+    The register map also needs the message, code and address bit widths, which are taken from the layout (keys
+    `message_bit_width`, `code_bit_width` and `address_bit_width`) or else from `bit_widths`. Outputs that are already
+    up to date are not rewritten, see `asic_cells.codegen.cache.write_if_changed`.
+
+    Args:
+        json_path (str): Path to the JSON layout
+        output_dir (Optional[str], optional): Directory for the outputs. Defaults to the directory of the JSON layout.
+        force (bool, optional): Regenerate outputs that are up to date. Defaults to False.
+        bit_widths (Optional[dict], optional): Bit widths to use if they are not in the layout. Defaults to None.
+        config_memory_mode (str, optional): See `asic_cells.codegen.config_memory.generate_config_memory`. Defaults to "unrolled".
+
+    Returns:
+        GenerationResult: Generated files, or the error that occurred
+    """
+
+    start = time.perf_counter()
+
+    json_path = Path(json_path)
+    output_dir = Path(output_dir) if output_dir is not None else json_path.parent
+
+    outputs = []
+    skipped = []
+
+    try:
+        with open(json_path) as f:
+            layout = json.load(f)
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        if "config_sizes_and_names" in layout:
+            output_path = output_dir / f"{json_path.stem}.sv"
+            outputs.append((str(output_path), generate_config_memory_file(layout["config_sizes_and_names"], output_path, force, config_memory_mode)))
+        else:
+            skipped.append("config memory")
+
+        if "pointer_sizes_and_names" in layout:
+            output_path = output_dir / f"{json_path.stem}.v"
+            outputs.append((str(output_path), generate_pointers_file(layout["pointer_sizes_and_names"], output_path, force)))
+        else:
+            skipped.append("pointers")
+
+        widths = [layout.get(key, (bit_widths or {}).get(key)) for key in BIT_WIDTH_KEYS]
+
+        if None not in widths:
+            arguments = (*widths, layout.get("config_sizes_and_names", []), layout.get("pointer_sizes_and_names", []), layout.get("memory_sizes_and_names", {}))
+            output_path = output_dir / f"{json_path.stem}{REGISTER_MAP_SUFFIX}"
+
+            key = generation_key(["register_map", *arguments])
+            outputs.append((str(output_path), write_if_changed(output_path, key, lambda: json.dumps(RegisterMap(*arguments).to_dict(), separators=(",", ":")), force)))
+        else:
+            skipped.append("register map")
+    except Exception as e:
+        return GenerationResult(str(json_path), outputs, time.perf_counter() - start, skipped, f"{type(e).__name__}: {e}")
+
+    return GenerationResult(str(json_path), outputs, time.perf_counter() - start, skipped)
+
+
+def _generate_layout(arguments):
+    return generate_layout(*arguments)
+
+
+def expand_layouts(patterns: List[str]) -> List[str]:
+    """Expand paths and (recursive) glob patterns into a list of unique JSON layouts, in order of appearance.
+
+    Generated register maps match the same patterns as the layouts, so they are left out of glob matches.
+    """
+
+    paths = []
+
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(path for path in sorted(glob.glob(pattern, recursive=True)) if not path.endswith(REGISTER_MAP_SUFFIX))
+        else:
+            paths.append(pattern)
+
+    return list(dict.fromkeys(paths))
+
+
+def generate_layouts(json_paths: List[str], output_dir: Optional[str] = None, force: bool = False, bit_widths: Optional[dict] = None, jobs: Optional[int] = None, config_memory_mode: str = "unrolled") -> List[GenerationResult]:
+    """Generate the outputs of many JSON layouts, spread over a pool of `jobs` processes, see `generate_layout`.
+
+    Returns:
+        List[GenerationResult]: Result per layout, in the order of `json_paths`
+    """
+
+    jobs = jobs or os.cpu_count() or 1
+    arguments = [(json_path, output_dir, force, bit_widths, config_memory_mode) for json_path in json_paths]
+
+    # Starting worker processes only pays off if there is more than one layout
+    if jobs == 1 or len(arguments) <= 1:
+        return [_generate_layout(a) for a in arguments]
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(arguments))) as executor:
+        return list(executor.map(_generate_layout, arguments, chunksize=max(1, len(arguments) // (4 * jobs))))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="asic-cells-generate", description="Generate the configuration memories, pointer bridges and register maps of JSON layouts")
+
+    parser.add_argument("layouts", nargs="+", help="JSON layouts or glob patterns, for example 'chips/**/*.json'")
+    parser.add_argument("-o", "--output-dir", help="Directory for all outputs (default: next to each JSON layout)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--force", action="store_true", help="Regenerate outputs even if they are up to date")
+    parser.add_argument("--config-memory-mode", choices=CONFIG_MEMORY_MODES, default="unrolled", help="Generate a case arm per array element (unrolled) or per array (ranged)")
+    parser.add_argument("--message-bit-width", type=int, help="Message bit width for layouts that do not specify it")
+    parser.add_argument("--code-bit-width", type=int, help="Code bit width for layouts that do not specify it")
+    parser.add_argument("--address-bit-width", type=int, help="Start address bit width for layouts that do not specify it")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print errors and the total")
+
+    args = parser.parse_args(argv)
+
+    json_paths = expand_layouts(args.layouts)
+
+    if not json_paths:
+        parser.error("No layouts match the given patterns")
+
+    bit_widths = {key: getattr(args, key) for key in BIT_WIDTH_KEYS if getattr(args, key) is not None}
+
+    start = time.perf_counter()
+    results = generate_layouts(json_paths, args.output_dir, args.force, bit_widths, args.jobs, args.config_memory_mode)
+    total = time.perf_counter() - start
+
+    num_errors = 0
+
+    for result in results:
+        if result.error is not None:
+            num_errors += 1
+            print(f"{result.seconds*1e3:9.1f} ms  {result.json_path}: {result.error}", file=sys.stderr)
+        elif not args.quiet:
+            skipped = f" (no {', '.join(result.skipped)})" if result.skipped else ""
+            print(f"{result.seconds*1e3:9.1f} ms  {result.json_path}: {result.num_written}/{len(result.outputs)} written{skipped}")
+
+    num_written = sum(result.num_written for result in results)
+    num_outputs = sum(len(result.outputs) for result in results)
+
+    print(f"{len(results)} layouts, {num_written}/{num_outputs} files written, {num_errors} errors in {total:.2f} s")
+
+    return 1 if num_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
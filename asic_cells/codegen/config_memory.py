@@ -0,0 +1,149 @@
+from typing import List, Optional, Tuple, Union
+
+from pathlib import Path
+
+import argparse
+import json
+
+from asic_cells.codegen.cache import generation_key, load_template, write_if_changed
+
+ConfigurationList = List[Tuple[Union[Union[int, str], Tuple[Union[str, int], Union[int, Tuple[int, int]]]], str, bool]]
+
+TEMPLATE_PATH = Path(__file__).resolve().parent / "config_memory.sv.jinja2"
+
+CONFIG_MEMORY_MODES = ("unrolled", "ranged")
+
+
+def generate_config_memory(config_sizes_and_names: ConfigurationList, mode: str = "unrolled"):
+    """Generate a configuration memory for use together with the SPI interface.
+
+    Note that every entry in the supplied ConfigurationList should have a bit width that is, at maximum, equal to the MESSAGE_BIT_WIDTH. Otherwise the variable will not be handled correctly in hardware.
+
+    In "unrolled" mode every array element gets its own reset assignment and its own case arm. In "ranged" mode an array is written with a single indexed assignment for its whole address range and reset with a for loop, such that the size of the generated code no longer grows with the size of the arrays. Both modes behave identically.
+
+    Args:
+        config_sizes_and_names (ConfigurationList): A list of tuples containing the name and size of each configuration variable. In human-readable format, the type is: [(bit_width [int/str] | (bit_width [int/str], count [int] | (max_index [int], start_index [int])), name, requires_reset)]
+        mode (str, optional): "unrolled" or "ranged". Defaults to "unrolled".
+    """
+
+    if mode not in CONFIG_MEMORY_MODES:
+        raise ValueError(f"Unknown config memory mode {mode} (supported: {CONFIG_MEMORY_MODES})")
+
+    # Take all bit widths that are not integers
+    parameters = [x[0] for x in config_sizes_and_names if type(x[0]) is str] + \
+        [x[0][0] for x in config_sizes_and_names if type(x[0]) is list and type(x[0][0]) is str] + \
+            [x[0][1] for x in config_sizes_and_names if type(x[0]) is list and type(x[0][1]) is str]
+
+    split_parameters = []
+
+    # Find all '-', '+' and '*' characters in each of the parameters, split these parameters and add them to the list
+    for p in parameters:
+        p = p.replace(" ", "")
+
+        if "-" in p:
+            split_parameters.extend(p.split("-"))
+        elif "+" in p:
+            split_parameters.extend(p.split("+"))
+        elif "*" in p:
+            split_parameters.extend(p.split("*"))
+        else:
+            split_parameters.append(p)
+
+    # Remove all duplicates
+    parameters = list(set(split_parameters))
+
+    # Remove all strings of numbers from the list of parameters
+    parameters = [p for p in parameters if not p.isdigit()]
+
+    config_address_mapping = []
+    config_address_ranges = []
+    config_start_address_mapping = {}
+    array_index_ranges = {}
+
+    current_address = 0
+
+    for i, (bit_width, name, _) in enumerate(config_sizes_and_names):
+        if type(bit_width) is list:
+            end_point = bit_width[1]
+            start_point = 0
+
+            if type(bit_width[1]) is list:
+                end_point = bit_width[1][0]
+                start_point = bit_width[1][1]
+
+            array_index_ranges[name] = (start_point, end_point)
+
+            if mode == "ranged":
+                # (first address, last address + 1, name, offset from address to array index, bit width)
+                config_address_ranges.append((current_address, current_address + end_point - start_point, name, start_point - current_address, bit_width[0]))
+            else:
+                for dimension in range(start_point, end_point):
+                    config_address_mapping.append((current_address + dimension - start_point, f"{name}[{dimension}]", bit_width[0]))
+
+            config_start_address_mapping[name] = current_address
+            current_address += (end_point - start_point)
+        else:
+            config_address_mapping.append((current_address, name, bit_width))
+            config_start_address_mapping[name] = current_address
+            current_address += 1
+
+    template, _ = load_template(TEMPLATE_PATH)
+
+    return template.render(
+        parameters=parameters,
+        config_address_mapping=config_address_mapping,
+        config_sizes_and_names=config_sizes_and_names,
+        ranged=mode == "ranged",
+        config_address_ranges=config_address_ranges,
+        array_index_ranges=array_index_ranges,
+        array_index_ranges_to_reset=[name for _, name, requires_reset in config_sizes_and_names if requires_reset and name in array_index_ranges],
+    )
+
+
+def generate_config_memory_file(config_sizes_and_names: ConfigurationList, output_path: Union[str, Path], force: bool = False, mode: str = "unrolled") -> bool:
+    """Generate a configuration memory and write it to a file, unless the file is already up to date.
+
+    The file is considered up to date if it was generated for the same layout, template and package version and was not
+    modified afterwards. In that case nothing is rendered and the file (and its modification time) is left untouched.
+
+    Args:
+        config_sizes_and_names (ConfigurationList): See `generate_config_memory`
+        output_path (Union[str, Path]): Path of the SystemVerilog file
+        force (bool, optional): Always render the configuration memory. Defaults to False.
+        mode (str, optional): See `generate_config_memory`. Defaults to "unrolled".
+
+    Returns:
+        bool: Whether the file was (re)written
+    """
+
+    key = generation_key(["config_memory", mode, config_sizes_and_names], TEMPLATE_PATH)
+
+    return write_if_changed(output_path, key, lambda: generate_config_memory(config_sizes_and_names, mode), force)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Generate the configuration memory of a single JSON layout, next to the JSON file."""
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--path_to_json", help="Path to the JSON file containing the config_sizes_and_names variable", type=str, required=True)
+    parser.add_argument("--force", help="Regenerate the configuration memory even if it is up to date", action="store_true")
+    parser.add_argument("--mode", help="Generate a case arm per array element (unrolled) or per array (ranged)", choices=CONFIG_MEMORY_MODES, default="unrolled")
+    args = parser.parse_args(argv)
+
+    # Get current cwd
+    cwd = Path.cwd()
+
+    json_path = cwd / args.path_to_json
+    json_file_name, json_dir = json_path.name, json_path.parent
+
+    output_file_name = json_file_name[:-5] + ".sv"
+
+    with open(json_path) as f:
+        config_sizes_and_names = json.load(f)["config_sizes_and_names"]
+
+    generate_config_memory_file(config_sizes_and_names, json_dir / output_file_name, args.force, args.mode)
+
+
+if __name__ == "__main__":
+    main()
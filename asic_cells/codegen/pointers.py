@@ -0,0 +1,102 @@
+from typing import List, Optional, Tuple, Union
+
+from pathlib import Path
+
+import argparse
+import json
+
+from copy import deepcopy
+
+from asic_cells.codegen.cache import generation_key, load_template, write_if_changed
+
+PointerList = List[Union[Tuple[Union[int, str], str], Tuple[Union[int, str], str, str]]]
+
+TEMPLATE_PATH = Path(__file__).resolve().parent / "pointers.v.jinja2"
+
+
+def generate_pointers(pointer_sizes_and_names: PointerList):
+    """Generate a pointer bridge for use together with the SPI interface.
+
+    Args:
+        pointer_sizes_and_names (PointerList): A list of tuples containing the name and size of each pointer variable. In human-readable format, the type is: [(bit_width [int/str], name [str]) | (value [str])]
+    """
+
+    # Take all bit_widths that are not integers and start with a letter
+    parameters = [x[0] for x in pointer_sizes_and_names if type(x[0]) is not int and x[0][0].isalpha()]
+
+    split_parameters = []
+
+    # Find all '-' and '+' characters in each of the parameters, split these parameters and add them to the list
+    for p in parameters:
+        if "-" in p:
+            split_parameters.extend(p.split("-"))
+        elif "+" in p:
+            split_parameters.extend(p.split("+"))
+        else:
+            split_parameters.append(p)
+
+    # Remove all duplicates
+    parameters = list(set(split_parameters))
+
+    pointer_sizes_and_names_with_values = deepcopy(pointer_sizes_and_names)
+
+    for i, entry in enumerate(pointer_sizes_and_names_with_values):
+        listed = list(entry)
+
+        if len(listed) == 3 and type(listed[0]) is int or (type(listed[0]) is str and listed[0][0].isdigit()):
+            if listed[2] == True:
+                listed.insert(0, -1)
+
+            listed = listed[:2]
+    
+        pointer_sizes_and_names_with_values[i] = listed
+
+    template, _ = load_template(TEMPLATE_PATH)
+
+    return template.render(pointer_sizes_and_names=pointer_sizes_and_names_with_values, parameters=parameters)
+
+
+def generate_pointers_file(pointer_sizes_and_names: PointerList, output_path: Union[str, Path], force: bool = False) -> bool:
+    """Generate a pointer bridge and write it to a file, unless the file is already up to date.
+
+    See `generate_config_memory_file` for when a file is considered up to date.
+
+    Args:
+        pointer_sizes_and_names (PointerList): See `generate_pointers`
+        output_path (Union[str, Path]): Path of the Verilog file
+        force (bool, optional): Always render the pointer bridge. Defaults to False.
+
+    Returns:
+        bool: Whether the file was (re)written
+    """
+
+    key = generation_key(["pointers", pointer_sizes_and_names], TEMPLATE_PATH)
+
+    return write_if_changed(output_path, key, lambda: generate_pointers(pointer_sizes_and_names), force)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Generate the pointer bridge of a single JSON layout, next to the JSON file."""
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--path_to_json", help="Path to the JSON file containing the pointer_sizes_and_names variable", type=str, required=True)
+    parser.add_argument("--force", help="Regenerate the pointer bridge even if it is up to date", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Get current cwd
+    cwd = Path.cwd()
+
+    json_path = cwd / args.path_to_json
+    json_file_name, json_dir = json_path.name, json_path.parent
+
+    output_file_name = json_file_name[:-5] + ".v"
+
+    with open(json_path) as f:
+        pointer_sizes_and_names = json.load(f)["pointer_sizes_and_names"]
+
+    generate_pointers_file(pointer_sizes_and_names, json_dir / output_file_name, args.force)
+
+
+if __name__ == "__main__":
+    main()
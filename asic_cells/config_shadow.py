@@ -0,0 +1,123 @@
+from typing import Dict, List, Union
+
+import time
+
+from asic_cells.spi import SpiMessageCreator
+
+
+class ConfigShadow:
+    """Shadow copy of the on-chip configuration memory that only writes registers whose value changed.
+
+    Every call to `create_config_words` compares the requested values with the last values that were written, keeps only
+    the addresses that changed and merges changed addresses that are adjacent (also across configuration entries) into
+    as few bursts as the `num_transactions` field of the instruction message allows. The shadow assumes that every
+    word it creates is also sent to the chip; call `invalidate` when that is not the case or after the chip lost its
+    configuration.
+    """
+
+    def __init__(self, spi_message_creator: SpiMessageCreator, assume_reset: bool = False):
+        """Create a configuration shadow.
+
+        Args:
+            spi_message_creator (SpiMessageCreator): Message creator with the configuration layout of the chip
+            assume_reset (bool, optional): Whether the chip was just reset, such that all configuration registers that require a reset are known to be zero. Defaults to False.
+        """
+
+        self.spi_message_creator = spi_message_creator
+
+        self.words_sent = 0
+        self.words_saved = 0
+        self.last_words_saved = 0
+
+        self._values = {}
+
+        if assume_reset:
+            self.reset()
+
+    def invalidate(self):
+        """Forget all shadowed values, such that the next write of every register is sent in full."""
+
+        self._values = {}
+
+    def reset(self):
+        """Mark all configuration registers that require a reset as zero and forget all others, as after a chip reset."""
+
+        self.invalidate()
+
+        for register in self.spi_message_creator.register_map.registers.values():
+            if register.requires_reset:
+                for address in range(register.address, register.address + register.count):
+                    self._values[address] = 0
+
+    def changed_addresses(self, config: Dict[str, Union[int, List[int]]]):
+        """Compute the configuration addresses whose value differs from the shadow, without updating the shadow.
+
+        Args:
+            config (Dict[str, Union[int, List[int]]]): Dictionary with the configuration values
+
+        Returns:
+            Dict[int, int]: New value per changed address, sorted by address
+        """
+
+        new_values = {}
+
+        for key, value in config.items():
+            start_address = self.spi_message_creator._config_start_addresses[key]
+
+            for offset, word in enumerate(self.spi_message_creator._config_values(key, value)):
+                new_values[start_address + offset] = word
+
+        return {address: word for address, word in sorted(new_values.items()) if self._values.get(address) != word}
+
+    def create_config_words(self, config: Dict[str, Union[int, List[int]]]):
+        """Create the minimal set of words that brings the configuration memory to the given values and update the shadow.
+
+        Args:
+            config (Dict[str, Union[int, List[int]]]): Dictionary with the configuration values
+
+        Returns:
+            List[int]: List of integers representing the messages
+        """
+
+        start_time = time.perf_counter()
+
+        changed = self.changed_addresses(config)
+        max_burst_length = 2**self.spi_message_creator.num_transactions_bit_width-1
+
+        bursts = []
+
+        for address, word in changed.items():
+            if bursts and bursts[-1][0] + len(bursts[-1][1]) == address and len(bursts[-1][1]) < max_burst_length:
+                bursts[-1][1].append(word)
+            else:
+                bursts.append((address, [word]))
+
+        words = []
+
+        for start_address, burst in bursts:
+            words.append(self.spi_message_creator._create_instruction_word(False, 0, start_address, len(burst)))
+            words += burst
+
+        self._values.update(changed)
+
+        naive_length = len(config) + sum(len(value) if type(value) is list else 1 for value in config.values())
+
+        self.last_words_saved = naive_length - len(words)
+        self.words_saved += self.last_words_saved
+        self.words_sent += len(words)
+
+        self.spi_message_creator._record_words("ConfigShadow.create_config_words", start_time, words)
+
+        return words
+
+    def create_config_messages(self, config: Dict[str, Union[int, List[int]]]):
+        """Binary string version of `create_config_words`.
+
+        Args:
+            config (Dict[str, Union[int, List[int]]]): Dictionary with the configuration values
+
+        Returns:
+            List[str]: List of binary strings representing the messages
+        """
+
+        return self.spi_message_creator._to_messages(self.create_config_words(config))
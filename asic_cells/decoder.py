@@ -0,0 +1,174 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from asic_cells.register_map import evaluate_bit_width
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.utils import as_word_array, unpack_words
+
+
+class ReadResult:
+    """Data that was returned by the chip for a single read instruction."""
+
+    __slots__ = ("code", "key", "start_address", "words")
+
+    def __init__(self, code: int, key: str, start_address: int, words: np.ndarray):
+        self.code = code
+        self.key = key
+        self.start_address = start_address
+        self.words = words
+
+    def __repr__(self):
+        return f"ReadResult(code={self.code}, key={self.key!r}, start_address={self.start_address}, num_words={self.words.size})"
+
+
+class DecodedReads:
+    """Typed results of all read instructions in a transaction."""
+
+    def __init__(self, results: List[ReadResult], pointers: Dict[str, int], spi_message_creator: SpiMessageCreator):
+        self.results = results
+        self.pointers = pointers
+
+        self._spi_message_creator = spi_message_creator
+
+    def memory(self, key: str, output: str = "words", bitorder: str = "big"):
+        """Combine all reads from a memory into one array.
+
+        Args:
+            key (str): Memory name
+            output (str, optional): "words" for the data words in address order, or "limbs"/"bits" to reassemble full rows (see `SpiMessageCreator.words_to_rows`). Defaults to "words".
+            bitorder (str, optional): For "bits" output, whether the first column is the most ("big") or least ("little") significant bit. Defaults to "big".
+
+        Returns:
+            np.ndarray: Data words or rows, starting at the lowest address that was read
+        """
+
+        results = sorted((result for result in self.results if result.key == key), key=lambda result: result.start_address)
+
+        if not results:
+            raise KeyError(f"No reads from memory {key}")
+
+        for previous, result in zip(results, results[1:]):
+            if previous.start_address + previous.words.size != result.start_address:
+                raise ValueError(f"Reads from {key} do not cover a contiguous address range")
+
+        words = np.concatenate([result.words for result in results])
+
+        if output == "words":
+            return words
+
+        if results[0].start_address % self._spi_message_creator._messages_per_row(key) != 0:
+            raise ValueError(f"Reads from {key} do not start at the beginning of a row")
+
+        return self._spi_message_creator.words_to_rows(key, words, output, bitorder)
+
+
+class SpiResponseDecoder:
+    """Decoder for the words that the chip sends back on MISO.
+
+    The decoder walks over the headers of the words that were sent on MOSI to find where the read data is located in
+    the received words: the `num_transactions` words that follow a read header carry the data of consecutive addresses,
+    starting at the start address of the header. The configuration memory is write-only, so reads with code 0 return
+    pointers. Per burst only the headers are inspected in Python; all data is extracted with array operations.
+    """
+
+    def __init__(self, spi_message_creator: SpiMessageCreator, parameters: Optional[Dict[str, int]] = None):
+        """Create a decoder.
+
+        Args:
+            spi_message_creator (SpiMessageCreator): Message creator with the layout of the chip
+            parameters (Optional[Dict[str, int]], optional): Values of the Verilog parameters that pointer bit widths are expressed in. Pointers with an unknown bit width are not masked. Defaults to None.
+        """
+
+        self.spi_message_creator = spi_message_creator
+
+        parameters = dict(parameters or {})
+        parameters.setdefault("MESSAGE_BIT_WIDTH", spi_message_creator.message_bit_width)
+        parameters.setdefault("START_ADDRESS_BIT_WIDTH", spi_message_creator.address_bit_width)
+
+        register_map = spi_message_creator.register_map
+
+        self._pointer_names = [None] * len(register_map.pointers)
+        self._pointer_masks = np.full(len(register_map.pointers), 2**min(spi_message_creator.message_bit_width, 64) - 1, dtype=np.uint64)
+
+        for name, pointer in register_map.pointers.items():
+            self._pointer_names[pointer.address] = name
+
+            bit_width = evaluate_bit_width(pointer.bit_width, parameters)
+
+            if bit_width is not None and 0 < bit_width < spi_message_creator.message_bit_width:
+                self._pointer_masks[pointer.address] = 2**bit_width - 1
+
+        self._memory_names = {memory.code: name for name, memory in register_map.memories.items()}
+
+    def _as_words(self, words, byteorder: str, bit_order: str):
+        if isinstance(words, (bytes, bytearray, memoryview)):
+            return unpack_words(words, self.spi_message_creator.message_bit_width, byteorder, bit_order)
+
+        return as_word_array(words, self.spi_message_creator.message_bit_width)
+
+    def decode(self, sent: Union[List[int], np.ndarray, bytes], received: Union[List[int], np.ndarray, bytes], byteorder: str = "big", bit_order: str = "msb"):
+        """Decode the received words of a transaction.
+
+        Args:
+            sent (Union[List[int], np.ndarray, bytes]): Words that were sent on MOSI, as words or as a buffer packed by `SpiMessageCreator.pack`
+            received (Union[List[int], np.ndarray, bytes]): Words that were received on MISO at the same time, as words or as a packed buffer
+            byteorder (str, optional): Byte order of packed buffers. Defaults to "big".
+            bit_order (str, optional): Bit order of packed buffers. Defaults to "msb".
+
+        Returns:
+            DecodedReads: Results of all read instructions
+        """
+
+        creator = self.spi_message_creator
+
+        sent = self._as_words(sent, byteorder, bit_order)
+        received = self._as_words(received, byteorder, bit_order)
+
+        if sent.size != received.size:
+            raise ValueError(f"Number of sent ({sent.size}) and received ({received.size}) words differ")
+
+        address_shift = creator.num_transactions_bit_width
+        code_shift = creator.address_bit_width + creator.num_transactions_bit_width
+
+        reads = []
+        position = 0
+
+        # Only the headers are visited here, data words are skipped in one step
+        while position < sent.size:
+            header = int(sent[position])
+            num_transactions = header & (2**creator.num_transactions_bit_width - 1)
+
+            if position + 1 + num_transactions > sent.size:
+                raise ValueError(f"Transaction is truncated: header at word {position} announces {num_transactions} words")
+
+            if header >> (creator.message_bit_width - 1):
+                code = (header >> code_shift) & (2**creator.code_bit_width - 1)
+                start_address = (header >> address_shift) & (2**creator.address_bit_width - 1)
+
+                reads.append((code, start_address, position + 1, num_transactions))
+
+            position += 1 + num_transactions
+
+        results = [ReadResult(code, self._memory_names.get(code), start_address, received[offset:offset+num_transactions]) for code, start_address, offset, num_transactions in reads]
+        pointer_results = [result for result in results if result.code == 0]
+
+        pointers = {}
+
+        if pointer_results:
+            addresses = np.concatenate([np.arange(result.start_address, result.start_address + result.words.size) for result in pointer_results])
+
+            if addresses.size and addresses.max() >= len(self._pointer_names):
+                raise ValueError(f"Read from pointer address {int(addresses.max())}, which does not exist")
+
+            # Mask all pointer values to their bit widths at once and hand the masked values back to the results
+            values = np.concatenate([result.words for result in pointer_results]) & self._pointer_masks[addresses]
+            position = 0
+
+            for result in pointer_results:
+                result.words = values[position:position+result.words.size]
+                position += result.words.size
+
+            pointers = dict(zip((self._pointer_names[address] for address in addresses.tolist()), values.tolist()))
+
+        return DecodedReads(results, pointers, creator)
@@ -0,0 +1,260 @@
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import functools
+import inspect
+import time
+
+import numpy as np
+
+# Public methods of `SpiMessageCreator` that create instruction and data words (or their binary strings)
+WORD_METHODS = (
+    "create_config_words", "create_config_messages",
+    "create_pointer_word", "create_pointer_message", "create_pointer_burst_words",
+    "create_write_memory_words", "create_write_memory_array", "create_write_memory_messages", "create_write_rows_array",
+    "create_read_memory_word", "create_read_memory_array", "create_read_memory_message",
+)
+
+# Public methods that lazily yield bursts, one header followed by its data words
+ITERATOR_METHODS = ("iter_write_memory_words", "iter_write_memory_messages", "iter_config_words", "iter_config_messages")
+
+# Public methods that are only timed
+TIMED_METHODS = ("pack",)
+
+
+class SpiCall:
+    """Statistics of a single call to an instrumented method, or of a single burst yielded by an instrumented iterator."""
+
+    __slots__ = ("method", "seconds", "num_headers", "num_data_words", "num_chunk_splits", "bytes_per_code")
+
+    def __init__(self, method: str, seconds: float, num_headers: int = 0, num_data_words: int = 0, num_chunk_splits: int = 0, bytes_per_code: Optional[Dict[int, int]] = None):
+        self.method = method
+        self.seconds = seconds
+        self.num_headers = num_headers
+        self.num_data_words = num_data_words
+        self.num_chunk_splits = num_chunk_splits
+        self.bytes_per_code = bytes_per_code or {}
+
+    def __repr__(self):
+        return f"SpiCall(method={self.method!r}, seconds={self.seconds:.3e}, num_headers={self.num_headers}, num_data_words={self.num_data_words})"
+
+
+class SpiStats:
+    """Counters of an instrumented `SpiMessageCreator`, see `SpiMessageCreator.enable_instrumentation`.
+
+    Data words are the words announced by the headers, so the placeholder words that clock read data out of the chip are
+    counted as well, also for methods that only return the header. A chunk split is a burst that continues the previous
+    burst of the same call, because the previous one reached the maximum number of transactions (or the
+    `max_burst_length` of an iterator, whose bursts are all part of the same call). Methods that call other
+    instrumented methods are only counted once, under the name of the outermost method.
+
+    Besides the public methods of the creator, the words created by `ConfigShadow.create_config_words`,
+    `TransactionBatch.build`, `asic_cells.snapshot.create_restore_words` and `RandomTrafficGenerator.generate` are
+    counted, under those names.
+    """
+
+    def __init__(self):
+        self.num_calls: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.num_headers = 0
+        self.num_data_words = 0
+        self.num_chunk_splits = 0
+        self.bytes_per_code: Dict[int, int] = {}
+
+    def add(self, call: SpiCall):
+        self.num_calls[call.method] = self.num_calls.get(call.method, 0) + 1
+        self.seconds[call.method] = self.seconds.get(call.method, 0.0) + call.seconds
+        self.num_headers += call.num_headers
+        self.num_data_words += call.num_data_words
+        self.num_chunk_splits += call.num_chunk_splits
+
+        for code, num_bytes in call.bytes_per_code.items():
+            self.bytes_per_code[code] = self.bytes_per_code.get(code, 0) + num_bytes
+
+    @property
+    def header_overhead(self):
+        """Fraction of all words that are headers."""
+
+        num_words = self.num_headers + self.num_data_words
+
+        return self.num_headers / num_words if num_words else 0.0
+
+    def snapshot(self) -> dict:
+        """Copy of all counters as plain Python types, for example to export them to a metrics system."""
+
+        return {
+            "num_calls": dict(self.num_calls),
+            "seconds": dict(self.seconds),
+            "num_headers": self.num_headers,
+            "num_data_words": self.num_data_words,
+            "num_chunk_splits": self.num_chunk_splits,
+            "header_overhead": self.header_overhead,
+            "bytes_per_code": dict(self.bytes_per_code),
+        }
+
+    def reset(self):
+        self.__init__()
+
+    def __repr__(self):
+        return f"SpiStats(num_calls={sum(self.num_calls.values())}, num_headers={self.num_headers}, num_data_words={self.num_data_words}, num_chunk_splits={self.num_chunk_splits})"
+
+
+class Instrumentation:
+    """Wraps the public methods of a message creator in instance attributes that time them and count their words.
+
+    The class itself is never modified, so a creator without instrumentation runs exactly the same code as before.
+    """
+
+    def __init__(self, spi_message_creator, callback: Optional[Callable[[SpiCall], None]] = None):
+        self.spi_message_creator = spi_message_creator
+        self.callback = callback
+        self.stats = SpiStats()
+
+        self._depth = 0
+
+    def install(self):
+        creator = self.spi_message_creator
+
+        for name in WORD_METHODS + TIMED_METHODS:
+            setattr(creator, name, self._wrap(name, getattr(type(creator), name).__get__(creator), name in WORD_METHODS))
+
+        for name in ITERATOR_METHODS:
+            setattr(creator, name, self._wrap_iterator(name, getattr(type(creator), name).__get__(creator)))
+
+    def uninstall(self):
+        for name in WORD_METHODS + TIMED_METHODS + ITERATOR_METHODS:
+            self.spi_message_creator.__dict__.pop(name, None)
+
+    def record_words(self, method: str, seconds: float, words):
+        """Count words that were created without calling the public methods of the creator, unless they are part of an instrumented call."""
+
+        if not self._depth:
+            self._record(method, seconds, words)
+
+    def _record(self, method: str, seconds: float, output=None, max_burst_length: Optional[int] = None, previous: Optional[Tuple[int, int, int]] = None):
+        if output is None:
+            call = SpiCall(method, seconds)
+        else:
+            call, previous = self._count(method, seconds, output, max_burst_length, previous)
+
+        self.stats.add(call)
+
+        if self.callback is not None:
+            self.callback(call)
+
+        return previous
+
+    def _count(self, method: str, seconds: float, output, max_burst_length: Optional[int] = None, previous: Optional[Tuple[int, int, int]] = None) -> Tuple[SpiCall, Optional[Tuple[int, int, int]]]:
+        """Walk over the headers of the words that a method returned.
+
+        Args:
+            max_burst_length (Optional[int], optional): Burst length at which the method splits its output. Defaults to None (the maximum number of transactions).
+            previous (Optional[Tuple[int, int, int]], optional): Prefix, next address and length of the last burst of the same call, for iterators that return one burst at a time. Defaults to None.
+
+        Returns:
+            Tuple[SpiCall, Optional[Tuple[int, int, int]]]: Statistics of the call and its last burst
+        """
+
+        creator = self.spi_message_creator
+
+        if isinstance(output, str):
+            output = [int(output, 2)]
+        elif isinstance(output, (int, np.integer)):
+            output = [int(output)]
+        elif len(output) and isinstance(output[0], str):
+            output = [int(message, 2) for message in output]
+
+        words = np.asarray(output, dtype=np.uint64)
+
+        transactions_mask = 2**creator.num_transactions_bit_width - 1
+        max_burst_length = max_burst_length if max_burst_length is not None else transactions_mask
+        address_shift = creator.num_transactions_bit_width
+        code_shift = creator.address_bit_width + creator.num_transactions_bit_width
+        bytes_per_word = creator.message_bit_width // 8
+
+        call = SpiCall(method, seconds)
+        position = 0
+
+        # Only the headers are visited, data words are skipped in one step
+        while position < words.size:
+            header = int(words[position])
+            num_transactions = header & transactions_mask
+            prefix = header >> code_shift
+            start_address = (header >> address_shift) & (2**creator.address_bit_width - 1)
+            code = prefix & (2**creator.code_bit_width - 1)
+
+            if previous is not None and previous == (prefix, start_address, max_burst_length):
+                call.num_chunk_splits += 1
+
+            call.num_headers += 1
+            call.num_data_words += num_transactions
+            call.bytes_per_code[code] = call.bytes_per_code.get(code, 0) + (1 + num_transactions) * bytes_per_word
+
+            previous = (prefix, start_address + num_transactions, num_transactions)
+            position += 1 + num_transactions
+
+        return call, previous
+
+    def _wrap(self, name: str, method: Callable, count: bool):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            # Calls from within another instrumented method are part of the outer call
+            if self._depth:
+                return method(*args, **kwargs)
+
+            self._depth += 1
+            start = time.perf_counter()
+
+            try:
+                output = method(*args, **kwargs)
+            finally:
+                self._depth -= 1
+
+            self._record(name, time.perf_counter() - start, output if count else None)
+
+            return output
+
+        return wrapper
+
+    def _wrap_iterator(self, name: str, method: Callable):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if self._depth:
+                return method(*args, **kwargs)
+
+            # Argument checks happen when the method is called, so time them as part of the first burst
+            start = time.perf_counter()
+            self._depth += 1
+
+            try:
+                iterator = method(*args, **kwargs)
+            finally:
+                self._depth -= 1
+
+            max_burst_length = signature.bind(*args, **kwargs).arguments.get("max_burst_length")
+            max_burst_length = self.spi_message_creator._burst_length(max_burst_length)
+
+            return self._iterate(name, iterator, time.perf_counter() - start, max_burst_length)
+
+        signature = inspect.signature(method)
+
+        return wrapper
+
+    def _iterate(self, name: str, iterator: Iterator, seconds: float, max_burst_length: int):
+        # The bursts of an iterator form one call, so a burst that continues the previous one is a chunk split
+        previous = None
+
+        while True:
+            start = time.perf_counter()
+            self._depth += 1
+
+            try:
+                burst = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._depth -= 1
+
+            previous = self._record(name, seconds + time.perf_counter() - start, burst, max_burst_length, previous)
+            seconds = 0.0
+
+            yield burst
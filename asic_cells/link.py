@@ -0,0 +1,388 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import math
+
+import numpy as np
+
+from asic_cells.register_map import RegisterMap
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.utils import as_word_array
+
+# Core clock cycles between the SCK edge at which `spi_client` raises `MOSI_data_ready` and the rising edge at which the
+# memory captures the word: two flops of `triple_flop_toggle_synchronizer` to synchronize plus one for the write itself,
+# where the first flop samples up to a full cycle after the SCK edge.
+WRITE_CROSSING_CYCLES = 3
+
+# Core clock cycles between `load_MISO_data` and valid read data: two flops of `double_flop_synchronizer`, plus one for
+# the registered output of the SRAM behind `memory_manager`. The generated pointer bridge registers the selected pointer
+# in `pointer_spi_data_out` as well, so pointer reads take just as long.
+MEMORY_READ_CROSSING_CYCLES = 3
+POINTER_READ_CROSSING_CYCLES = MEMORY_READ_CROSSING_CYCLES
+
+OPERATION_KINDS = ("config", "write_memory", "read_memory", "read_pointers")
+
+
+class Operation:
+    """Logical SPI operation of a workload, described independently of the bit-width split of the link.
+
+    Sizes are given in configuration entries and memory rows rather than in messages, such that the same workload can be
+    estimated for different message, code and address bit widths, see `sweep_bit_widths`.
+    """
+
+    def __init__(self, kind: str, name: str, entries: Optional[Dict[str, int]] = None, key: Optional[str] = None, num_rows: Optional[int] = None, start_row: int = 0, keys: Sequence[str] = (), repeat: int = 1):
+        if kind not in OPERATION_KINDS:
+            raise ValueError(f"Unknown operation kind {kind} (supported: {OPERATION_KINDS})")
+
+        assert repeat > 0, "Operation must be repeated at least once"
+
+        self.kind = kind
+        self.name = name
+        self.entries = dict(entries or {})
+        self.key = key
+        self.num_rows = num_rows
+        self.start_row = start_row
+        self.keys = list(keys)
+        self.repeat = repeat
+
+    @classmethod
+    def config(cls, entries: Union[Dict[str, int], Iterable[str]], repeat: int = 1, name: str = "config"):
+        """Configuration update.
+
+        Args:
+            entries (Union[Dict[str, int], Iterable[str]]): Number of values written per configuration entry, or names of entries that are written as a whole
+        """
+
+        return cls("config", name, entries=entries if isinstance(entries, dict) else {key: None for key in entries}, repeat=repeat)
+
+    @classmethod
+    def write_memory(cls, key: str, num_rows: Optional[int] = None, start_row: int = 0, repeat: int = 1, name: Optional[str] = None):
+        """Write of a memory image, by default of the whole memory."""
+
+        return cls("write_memory", name or f"write {key}", key=key, num_rows=num_rows, start_row=start_row, repeat=repeat)
+
+    @classmethod
+    def read_memory(cls, key: str, num_rows: Optional[int] = None, start_row: int = 0, repeat: int = 1, name: Optional[str] = None):
+        """Read of a memory range, by default of the whole memory."""
+
+        return cls("read_memory", name or f"read {key}", key=key, num_rows=num_rows, start_row=start_row, repeat=repeat)
+
+    @classmethod
+    def read_pointers(cls, keys: Iterable[str], repeat: int = 1, name: str = "poll pointers"):
+        """Poll of a set of pointers, read with as few bursts as possible, see `SpiMessageCreator.plan_pointer_reads`."""
+
+        return cls("read_pointers", name, keys=list(keys), repeat=repeat)
+
+    def __repr__(self):
+        return f"Operation(kind={self.kind!r}, name={self.name!r}, repeat={self.repeat})"
+
+
+class OperationEstimate:
+    """Cost of one (repeated) operation on the link; all times are per single execution."""
+
+    def __init__(self, name: str, kind: str, num_headers: int, num_data_words: int, num_payload_words: int, message_bit_width: int, wire_time: float, latency: float, read_slack: Optional[float], repeat: int = 1):
+        self.name = name
+        self.kind = kind
+        self.num_headers = num_headers
+        self.num_data_words = num_data_words
+        self.num_payload_words = num_payload_words
+        self.message_bit_width = message_bit_width
+        self.wire_time = wire_time
+        self.latency = latency
+        self.read_slack = read_slack
+        self.repeat = repeat
+
+    @property
+    def wire_bits(self):
+        return (self.num_headers + self.num_data_words) * self.message_bit_width
+
+    @property
+    def payload_bits(self):
+        return self.num_payload_words * self.message_bit_width
+
+    @property
+    def header_overhead(self):
+        """Fraction of the wire bits that does not carry payload: headers, and unused words in merged pointer reads."""
+
+        return 1 - self.payload_bits / self.wire_bits if self.wire_bits else 0.0
+
+    @property
+    def bandwidth(self):
+        """Effective payload bandwidth in bytes per second."""
+
+        return self.payload_bits / 8 / self.latency if self.latency else 0.0
+
+    @property
+    def feasible(self):
+        """Whether read data arrives in time for MISO; if not, reads return stale data at this SCK/core clock ratio."""
+
+        return self.read_slack is None or self.read_slack >= 0
+
+    def __repr__(self):
+        return f"OperationEstimate(name={self.name!r}, num_headers={self.num_headers}, num_data_words={self.num_data_words}, latency={self.latency:.3e})"
+
+
+class LinkEstimate:
+    """Cost of a whole workload on the link."""
+
+    def __init__(self, operations: List[OperationEstimate], message_bit_width: int, code_bit_width: int, address_bit_width: int):
+        self.operations = operations
+        self.message_bit_width = message_bit_width
+        self.code_bit_width = code_bit_width
+        self.address_bit_width = address_bit_width
+
+    @property
+    def num_transactions_bit_width(self):
+        return self.message_bit_width - self.code_bit_width - self.address_bit_width - 1
+
+    @property
+    def wire_bits(self):
+        return sum(operation.wire_bits * operation.repeat for operation in self.operations)
+
+    @property
+    def payload_bits(self):
+        return sum(operation.payload_bits * operation.repeat for operation in self.operations)
+
+    @property
+    def header_overhead(self):
+        return 1 - self.payload_bits / self.wire_bits if self.wire_bits else 0.0
+
+    @property
+    def seconds(self):
+        """Total time of the workload when all operations are executed back to back."""
+
+        return sum(operation.latency * operation.repeat for operation in self.operations)
+
+    @property
+    def bandwidth(self):
+        """Effective payload bandwidth of the whole workload in bytes per second."""
+
+        return self.payload_bits / 8 / self.seconds if self.seconds else 0.0
+
+    @property
+    def feasible(self):
+        return all(operation.feasible for operation in self.operations)
+
+    def table(self) -> str:
+        """Human-readable report with one line per operation and a total."""
+
+        lines = [f"{'operation':<24} {'repeat':>7} {'headers':>8} {'data':>9} {'wire bits':>11} {'overhead':>9} {'MB/s':>9} {'latency (us)':>13}"]
+
+        for o in self.operations:
+            lines.append(f"{o.name:<24} {o.repeat:>7} {o.num_headers:>8} {o.num_data_words:>9} {o.wire_bits:>11} {o.header_overhead:>8.1%} {o.bandwidth/1e6:>9.3f} {o.latency*1e6:>13.3f}{'' if o.feasible else '  (read too slow)'}")
+
+        lines.append(f"{'total':<24} {'':>7} {'':>8} {'':>9} {self.wire_bits:>11} {self.header_overhead:>8.1%} {self.bandwidth/1e6:>9.3f} {self.seconds*1e6:>13.3f}")
+
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"LinkEstimate(message_bit_width={self.message_bit_width}, code_bit_width={self.code_bit_width}, address_bit_width={self.address_bit_width}, seconds={self.seconds:.3e}, feasible={self.feasible})"
+
+
+class SpiLinkModel:
+    """Throughput and latency model of the SPI link between a host and `spi_client`.
+
+    Every message takes `message_bit_width` SCK periods and an operation is sent as one SPI transfer, which costs
+    `transfer_overhead` seconds on top (chip select, driver calls). Writes to a memory are complete
+    `WRITE_CROSSING_CYCLES` core clock cycles after their last bit, writes to the configuration memory half an SCK
+    period after it, and reads once the last bit has been shifted in. Reads are only feasible if the clock domain
+    crossing delivers the data within the half SCK period before the host samples the first bit of every data word.
+
+    Operations are either estimated analytically from their size (`estimate`, `estimate_workload`) or from the message
+    stream that is actually sent (`estimate_words`), for example one that was recorded or built by a `TransactionBatch`.
+
+    Example:
+        model = SpiLinkModel(spi_message_creator, sck_frequency=10e6, core_frequency=100e6)
+        print(model.estimate_workload([Operation.write_memory("weights"), Operation.read_pointers(["state"], repeat=100)]).table())
+    """
+
+    def __init__(self, spi_message_creator: SpiMessageCreator, sck_frequency: float, core_frequency: float, transfer_overhead: float = 0.0):
+        """Create a link model.
+
+        Args:
+            spi_message_creator (SpiMessageCreator): Message creator with the layout and bit widths of the chip
+            sck_frequency (float): Frequency of the SPI clock in Hz
+            core_frequency (float): Frequency of the core clock of the chip in Hz
+            transfer_overhead (float, optional): Fixed time per SPI transfer in seconds. Defaults to 0.0.
+        """
+
+        assert sck_frequency > 0 and core_frequency > 0, "Clock frequencies must be positive"
+
+        self.spi_message_creator = spi_message_creator
+        self.sck_frequency = sck_frequency
+        self.core_frequency = core_frequency
+        self.transfer_overhead = transfer_overhead
+
+    @property
+    def max_burst_length(self):
+        return 2**self.spi_message_creator.num_transactions_bit_width-1
+
+    def _num_bursts(self, num_words: int):
+        return -(-num_words // self.max_burst_length)
+
+    def _read_slack(self, kind: str) -> Optional[float]:
+        if kind == "read_memory":
+            cycles = MEMORY_READ_CROSSING_CYCLES
+        elif kind == "read_pointers":
+            cycles = POINTER_READ_CROSSING_CYCLES
+        else:
+            return None
+
+        return 0.5 / self.sck_frequency - cycles / self.core_frequency
+
+    def _estimate(self, name: str, kind: str, num_headers: int, num_data_words: int, num_payload_words: int, repeat: int = 1):
+        message_bit_width = self.spi_message_creator.message_bit_width
+        wire_time = (num_headers + num_data_words) * message_bit_width / self.sck_frequency
+
+        if kind == "write_memory":
+            completion = WRITE_CROSSING_CYCLES / self.core_frequency
+        elif kind == "config":
+            completion = 0.5 / self.sck_frequency
+        else:
+            completion = 0.0
+
+        return OperationEstimate(name, kind, num_headers, num_data_words, num_payload_words, message_bit_width, wire_time, self.transfer_overhead + wire_time + completion, self._read_slack(kind), repeat)
+
+    def _memory_words(self, operation: Operation):
+        memory = self.spi_message_creator.register_map.memories[operation.key]
+        num_rows = operation.num_rows if operation.num_rows is not None else memory.num_rows - operation.start_row
+
+        if operation.start_row + num_rows > memory.num_rows:
+            raise ValueError(f"Too many rows ({num_rows}) for {operation.key} at start row {operation.start_row} (max: {memory.num_rows-operation.start_row})")
+
+        return num_rows * memory.bit_width // self.spi_message_creator.message_bit_width
+
+    def estimate(self, operation: Operation) -> OperationEstimate:
+        """Estimate the cost of an operation from its size, without creating any messages."""
+
+        creator = self.spi_message_creator
+
+        if operation.kind == "config":
+            registers = creator.register_map.registers
+            counts = [registers[key].count if count is None else count for key, count in operation.entries.items()]
+
+            if max(counts, default=0) > self.max_burst_length:
+                raise ValueError(f"Configuration entries of {operation.name} do not fit in a single burst of at most {self.max_burst_length} words")
+
+            # Every configuration entry is written with a header of its own
+            return self._estimate(operation.name, operation.kind, len(counts), sum(counts), sum(counts), operation.repeat)
+        elif operation.kind == "read_pointers":
+            bursts = creator.plan_pointer_reads(operation.keys)
+            num_data_words = sum(num_transactions for _, num_transactions in bursts)
+
+            return self._estimate(operation.name, operation.kind, len(bursts), num_data_words, len(set(operation.keys)), operation.repeat)
+
+        num_words = self._memory_words(operation)
+
+        return self._estimate(operation.name, operation.kind, self._num_bursts(num_words), num_words, num_words, operation.repeat)
+
+    def estimate_workload(self, workload: Iterable[Operation]) -> LinkEstimate:
+        """Estimate the cost of every operation of a workload."""
+
+        creator = self.spi_message_creator
+
+        return LinkEstimate([self.estimate(operation) for operation in workload], creator.message_bit_width, creator.code_bit_width, creator.address_bit_width)
+
+    def estimate_words(self, words: Union[List[int], np.ndarray], name: str = "trace") -> LinkEstimate:
+        """Estimate the cost of a recorded message stream, with one operation per run of bursts of the same kind and code.
+
+        All data words count as payload, as the stream does not tell which of the read words are used.
+        """
+
+        creator = self.spi_message_creator
+        words = as_word_array(words, creator.message_bit_width)
+
+        code_shift = creator.address_bit_width + creator.num_transactions_bit_width
+
+        runs = []
+        position = 0
+
+        # Only the headers are visited, data words are skipped in one step
+        while position < words.size:
+            header = int(words[position])
+            num_transactions = header & (2**creator.num_transactions_bit_width - 1)
+            read = header >> (creator.message_bit_width - 1)
+            code = (header >> code_shift) & (2**creator.code_bit_width - 1)
+
+            if position + 1 + num_transactions > words.size:
+                raise ValueError(f"Transaction is truncated: header at word {position} announces {num_transactions} words")
+
+            if read:
+                kind = "read_memory" if code else "read_pointers"
+            else:
+                kind = "write_memory" if code else "config"
+
+            if runs and runs[-1][0] == (kind, code):
+                runs[-1][1] += 1
+                runs[-1][2] += num_transactions
+            else:
+                runs.append([(kind, code), 1, num_transactions])
+
+            position += 1 + num_transactions
+
+        return LinkEstimate([self._estimate(f"{name}[{i}] {kind}", kind, num_headers, num_data_words, num_data_words) for i, ((kind, _), num_headers, num_data_words) in enumerate(runs)], creator.message_bit_width, creator.code_bit_width, creator.address_bit_width)
+
+
+def _split_is_valid(message_bit_width: int, code_bit_width: int, address_bit_width: int, config_sizes_and_names: list, pointer_sizes_and_names: list, memory_sizes_and_names: Dict) -> bool:
+    """Whether a bit-width split can address the whole layout and passes the parameter checks of the RTL."""
+
+    num_transactions_bit_width = message_bit_width - code_bit_width - address_bit_width - 1
+
+    # spi_client needs at least one transaction bit and no more transaction bits than address bits
+    if not 0 < num_transactions_bit_width <= address_bit_width:
+        return False
+
+    if len(memory_sizes_and_names) + 1 > 2**code_bit_width:
+        return False
+
+    for memory in memory_sizes_and_names.values():
+        # memory_manager maps a power-of-two number of messages onto a row
+        messages_per_row = memory["bit_width"] // message_bit_width
+
+        if memory["bit_width"] % message_bit_width or messages_per_row & (messages_per_row - 1):
+            return False
+
+        if 2**math.ceil(math.log2(memory["num_rows"])) * messages_per_row > 2**address_bit_width:
+            return False
+
+    config_size = sum(1 if type(bit_width) is not list else (bit_width[1] if type(bit_width[1]) is int else bit_width[1][0] - bit_width[1][1]) for bit_width, *_ in config_sizes_and_names)
+
+    if max(config_size, len(pointer_sizes_and_names)) > 2**address_bit_width:
+        return False
+
+    bit_widths = [bit_width[0] if type(bit_width) is list else bit_width for bit_width, *_ in config_sizes_and_names]
+
+    return all(type(bit_width) is not int or bit_width <= message_bit_width for bit_width in bit_widths)
+
+
+def sweep_bit_widths(config_sizes_and_names: list, pointer_sizes_and_names: list, memory_sizes_and_names: Dict, workload: Iterable[Operation], sck_frequency: float, core_frequency: float, message_bit_widths: Iterable[int] = (16, 32, 64), transfer_overhead: float = 0.0) -> List[LinkEstimate]:
+    """Estimate a workload for every valid split of the message bit width into start address and number of transactions bits.
+
+    The code bit width is the smallest one that can address all memories, as wider codes only take bits away from the
+    other fields. Splits that violate the parameter checks of `spi_client` or `memory_manager`, that cannot address the
+    whole layout or that cannot write a configuration entry of the workload in one burst are skipped.
+
+    Returns:
+        List[LinkEstimate]: Estimates of all valid splits, fastest first
+    """
+
+    workload = list(workload)
+    code_bit_width = max(1, math.ceil(math.log2(len(memory_sizes_and_names) + 1)))
+
+    estimates = []
+
+    for message_bit_width in message_bit_widths:
+        for address_bit_width in range(1, message_bit_width - code_bit_width - 1):
+            if not _split_is_valid(message_bit_width, code_bit_width, address_bit_width, config_sizes_and_names, pointer_sizes_and_names, memory_sizes_and_names):
+                continue
+
+            register_map = RegisterMap(message_bit_width, code_bit_width, address_bit_width, config_sizes_and_names, pointer_sizes_and_names, memory_sizes_and_names)
+            model = SpiLinkModel(SpiMessageCreator.from_register_map(register_map), sck_frequency, core_frequency, transfer_overhead)
+
+            try:
+                estimates.append(model.estimate_workload(workload))
+            except ValueError:
+                continue
+
+    estimates.sort(key=lambda estimate: (not estimate.feasible, estimate.seconds))
+
+    return estimates
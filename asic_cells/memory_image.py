@@ -0,0 +1,248 @@
+from typing import Iterator, Optional
+
+from pathlib import Path
+
+import mmap
+import re
+
+import numpy as np
+
+from asic_cells.utils import as_word_array
+
+MEMORY_IMAGE_FORMATS = ("bin", "hex", "npy")
+
+HEX_BLOCK_SIZE = 1 << 20
+
+_COMMENTS = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+
+
+def _guess_format(path: Path):
+    suffix = path.suffix.lower()
+
+    if suffix == ".npy":
+        return "npy"
+    elif suffix in (".hex", ".mem", ".memh", ".txt"):
+        return "hex"
+
+    return "bin"
+
+
+class MemoryImage:
+    """Memory-mapped memory initialization image, split into SPI message words.
+
+    Supported formats:
+
+    * `bin`: raw binary file with consecutive words of `message_bit_width` bits in `byteorder`
+    * `npy`: NumPy array of unsigned integers, one message per entry (multi-dimensional arrays are read in C order)
+    * `hex`: Verilog `$readmemh`-style file with one entry per memory row. Entries wider than `message_bit_width` are
+      split into messages least-significant slice first, which is the order in which `memory_manager` maps consecutive
+      SPI addresses onto a row. Comments and `_` separators are supported, `@` directives only if they do not skip
+      addresses.
+
+    The file is never read as a whole: `iter_chunks` decodes one chunk at a time straight from the mapped pages and
+    releases the pages it consumed, such that images that are larger than the available memory can be streamed.
+
+    Example:
+        with MemoryImage("weights.npy", 32) as image:
+            for burst in spi_message_creator.iter_write_memory_words("weights", image):
+                transport.send(spi_message_creator.pack(burst))
+    """
+
+    def __init__(self, path, message_bit_width: int, format: Optional[str] = None, byteorder: str = "little", entry_bit_width: Optional[int] = None):
+        """Open a memory image.
+
+        Args:
+            path: Path to the image file
+            message_bit_width (int): Bit width of a single SPI message
+            format (Optional[str], optional): One of `MEMORY_IMAGE_FORMATS`. Defaults to None (derived from the file extension).
+            byteorder (str, optional): Byte order of the words in a raw binary file. Defaults to "little".
+            entry_bit_width (Optional[int], optional): Bit width of an entry (row) in a hex file. Defaults to None (equal to `message_bit_width`).
+        """
+
+        self.path = Path(path)
+        self.message_bit_width = message_bit_width
+        self.format = format if format is not None else _guess_format(self.path)
+        self.entry_bit_width = entry_bit_width if entry_bit_width is not None else message_bit_width
+
+        if message_bit_width > 64:
+            raise ValueError(f"Memory images only support message bit widths up to 64 (got: {message_bit_width})")
+
+        if self.format not in MEMORY_IMAGE_FORMATS:
+            raise ValueError(f"Unknown memory image format '{self.format}' (options: {MEMORY_IMAGE_FORMATS})")
+
+        if self.entry_bit_width % message_bit_width != 0:
+            raise ValueError(f"Entry bit width ({self.entry_bit_width}) must be a multiple of the message bit width ({message_bit_width})")
+
+        self._messages_per_entry = self.entry_bit_width // message_bit_width
+
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.path.stat().st_size > 0 else None
+
+        if self.format == "bin":
+            if message_bit_width not in (8, 16, 32, 64):
+                raise ValueError(f"Raw binary images require a message bit width of 8, 16, 32 or 64 (got: {message_bit_width})")
+
+            self._dtype = np.dtype(f"u{message_bit_width // 8}").newbyteorder("<" if byteorder == "little" else ">")
+            self._offset = 0
+            self._num_words = self.path.stat().st_size * 8 // message_bit_width
+
+            if self._num_words * message_bit_width != self.path.stat().st_size * 8:
+                raise ValueError(f"Size of {self.path} is not a multiple of {message_bit_width // 8} bytes")
+        elif self.format == "npy":
+            self._read_npy_header()
+        else:
+            self._num_words = self._count_hex_entries() * self._messages_per_entry
+
+    def _read_npy_header(self):
+        version = np.lib.format.read_magic(self._file)
+
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(self._file)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(self._file)
+
+        if fortran_order and len(shape) > 1:
+            raise ValueError(f"Fortran-ordered arrays are not supported ({self.path})")
+
+        if dtype.kind not in "ui":
+            raise ValueError(f"Memory images must contain integers (got dtype: {dtype})")
+
+        self._dtype = dtype
+        self._offset = self._file.tell()
+        self._num_words = int(np.prod(shape))
+
+    def __len__(self):
+        return self._num_words
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+        self._file.close()
+
+    def _release(self, start: int, end: int):
+        """Drop the already consumed pages of the mapping from the resident set."""
+
+        if not hasattr(mmap, "MADV_DONTNEED"):
+            return
+
+        start -= start % mmap.PAGESIZE
+        end -= end % mmap.PAGESIZE
+
+        if end > start:
+            self._mmap.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+    def iter_chunks(self, chunk_size: int) -> Iterator[np.ndarray]:
+        """Decode the image chunk by chunk.
+
+        Args:
+            chunk_size (int): Number of message words per chunk
+
+        Yields:
+            np.ndarray: Chunks of (at most) `chunk_size` message words as uint64
+        """
+
+        if self._num_words == 0:
+            return
+
+        if self.format == "hex":
+            yield from self._iter_hex_chunks(chunk_size)
+            return
+
+        item_size = self._dtype.itemsize
+
+        for start in range(0, self._num_words, chunk_size):
+            count = min(chunk_size, self._num_words - start)
+            byte_start = self._offset + start * item_size
+
+            view = np.frombuffer(self._mmap, dtype=self._dtype, count=count, offset=byte_start)
+            words = as_word_array(view, self.message_bit_width)
+
+            # Never hand out views of the mapping, as those would keep it alive after closing
+            if np.may_share_memory(words, view):
+                words = words.copy()
+
+            del view
+
+            yield words
+
+            self._release(self._offset, byte_start + count * item_size)
+
+    def _iter_hex_tokens(self) -> Iterator[list]:
+        """Split the hex file into blocks of tokens, without ever splitting a token or comment across two blocks."""
+
+        size = len(self._mmap)
+        position = 0
+        carry = ""
+
+        while position < size:
+            end = min(position + HEX_BLOCK_SIZE, size)
+            text = carry + self._mmap[position:end].decode("ascii")
+
+            self._release(0, end)
+            position = end
+
+            if position < size:
+                # Only parse up to the last line break, the remainder is carried over to the next block
+                cut = text.rfind("\n") + 1
+                text, carry = text[:cut], text[cut:]
+            else:
+                carry = ""
+
+            text = _COMMENTS.sub(" ", text)
+
+            # Block comments that continue into the next block are carried over as well
+            unterminated = text.find("/*")
+
+            if unterminated != -1:
+                if position >= size:
+                    raise ValueError(f"Unterminated block comment in {self.path}")
+
+                text, carry = text[:unterminated], text[unterminated:] + carry
+
+            yield text.split()
+
+    def _count_hex_entries(self):
+        if self._mmap is None:
+            return 0
+
+        count = 0
+
+        for tokens in self._iter_hex_tokens():
+            for token in tokens:
+                if token.startswith("@"):
+                    if int(token[1:], 16) != count:
+                        raise ValueError(f"Address directive {token} in {self.path} skips addresses, which is not supported")
+                else:
+                    count += 1
+
+        return count
+
+    def _iter_hex_chunks(self, chunk_size: int):
+        entry_mask = 2**self.message_bit_width - 1
+        words = []
+
+        for tokens in self._iter_hex_tokens():
+            entries = [int(token, 16) for token in tokens if not token.startswith("@")]
+
+            if entries and max(entries) >= 2**self.entry_bit_width:
+                raise ValueError(f"Entry in {self.path} exceeds the entry bit width of {self.entry_bit_width} bits")
+
+            if self._messages_per_entry == 1:
+                words.extend(entries)
+            else:
+                words.extend((entry >> (i * self.message_bit_width)) & entry_mask for entry in entries for i in range(self._messages_per_entry))
+
+            while len(words) >= chunk_size:
+                yield as_word_array(words[:chunk_size], self.message_bit_width)
+                del words[:chunk_size]
+
+        if words:
+            yield as_word_array(words, self.message_bit_width)
@@ -0,0 +1,215 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from asic_cells.register_map import constant_value, evaluate_bit_width
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.utils import as_word_array, unpack_words
+
+
+class SpiChipModel:
+    """Transaction-level model of `spi_client` together with `config_memory`, `pointers` and `memory_manager`s.
+
+    The model interprets the words that are sent on MOSI exactly like the SPI client does: every header
+    (read | code | start_address | num_transactions) is followed by `num_transactions` data words that are written to, or
+    read from, consecutive addresses. Code 0 writes go to the configuration registers, code 0 reads to the pointers and
+    code `i + 1` accesses the `i`-th memory in `memory_sizes_and_names`. Memories are stored as message words in SPI
+    address order, where address `a` holds slice `a % messages_per_row` of row `a // messages_per_row`, as in
+    `memory_manager` (assuming that only the addressed slice of a row is written). Only the headers are interpreted in
+    Python, all data is moved with array operations, so the model can be used as a fast golden reference.
+
+    The model is stateful: a burst may be split over multiple calls of `transfer`.
+    """
+
+    def __init__(self, spi_message_creator: SpiMessageCreator, parameters: Optional[Dict[str, int]] = None):
+        """Create a model with all registers and memories set to zero.
+
+        Args:
+            spi_message_creator (SpiMessageCreator): Message creator with the layout of the chip
+            parameters (Optional[Dict[str, int]], optional): Values of the Verilog parameters that bit widths are expressed in. Registers with an unknown bit width are not truncated. Defaults to None.
+        """
+
+        if spi_message_creator.message_bit_width > 64:
+            raise ValueError(f"The model supports message bit widths up to 64 (got: {spi_message_creator.message_bit_width})")
+
+        self.spi_message_creator = spi_message_creator
+
+        parameters = dict(parameters or {})
+        parameters.setdefault("MESSAGE_BIT_WIDTH", spi_message_creator.message_bit_width)
+        parameters.setdefault("START_ADDRESS_BIT_WIDTH", spi_message_creator.address_bit_width)
+
+        register_map = spi_message_creator.register_map
+        full_mask = 2**spi_message_creator.message_bit_width - 1
+
+        self.config = np.zeros(register_map.config_size, dtype=np.uint64)
+        self._config_masks = np.full(register_map.config_size, full_mask, dtype=np.uint64)
+
+        for register in register_map.registers.values():
+            bit_width = evaluate_bit_width(register.bit_width, parameters)
+
+            if bit_width is not None and bit_width < spi_message_creator.message_bit_width:
+                self._config_masks[register.address:register.address+register.count] = 2**bit_width - 1
+
+        self.pointers = np.zeros(len(register_map.pointers), dtype=np.uint64)
+        self._pointer_masks = np.full(len(register_map.pointers), full_mask, dtype=np.uint64)
+
+        for pointer in register_map.pointers.values():
+            bit_width = evaluate_bit_width(pointer.bit_width, parameters)
+
+            if bit_width is not None and bit_width < spi_message_creator.message_bit_width:
+                self._pointer_masks[pointer.address] = 2**bit_width - 1
+
+            if pointer.constant is not None:
+                value = constant_value(pointer.constant)
+
+                if value is None:
+                    raise ValueError(f"Unsupported value {pointer.constant!r} of constant pointer {pointer.name}")
+
+                self.pointers[pointer.address] = value & full_mask
+
+        self.memories: Dict[str, np.ndarray] = {}
+        self._memories_by_code: Dict[int, np.ndarray] = {}
+
+        for name, memory in register_map.memories.items():
+            self.memories[name] = np.zeros(memory.max_address, dtype=np.uint64)
+            self._memories_by_code[memory.code] = self.memories[name]
+
+        self.num_words = 0
+        self.num_headers = 0
+
+        self._reset_protocol()
+
+    def _reset_protocol(self):
+        self._read = False
+        self._code = 0
+        self._address = 0
+        self._remaining = 0
+        self._pointer_out = 0
+
+    def reset(self):
+        """Asynchronous reset: registers that require a reset are cleared and the client waits for a new header."""
+
+        for register in self.spi_message_creator.register_map.registers.values():
+            if register.requires_reset:
+                self.config[register.address:register.address+register.count] = 0
+
+        self._reset_protocol()
+
+    def config_value(self, key: str) -> Union[int, List[int]]:
+        """Value of a configuration register, or the list of values of a register array."""
+
+        register = self.spi_message_creator.register_map.registers[key]
+        values = self.config[register.address:register.address+register.count].tolist()
+
+        return values if register.is_array else values[0]
+
+    def set_pointer(self, key: str, value: int):
+        """Set the on-chip value of a pointer, which is returned when the pointer is read."""
+
+        if self.spi_message_creator.register_map.pointers[key].constant is not None:
+            raise ValueError(f"Pointer {key} is a constant")
+
+        self.pointers[self.spi_message_creator._pointer_addresses[key]] = value
+
+    def memory_rows(self, key: str, output: str = "limbs", bitorder: str = "big"):
+        """Contents of a memory as full-width rows, see `SpiMessageCreator.words_to_rows`."""
+
+        return self.spi_message_creator.words_to_rows(key, self.memories[key], output, bitorder)
+
+    def _addresses(self, count: int):
+        return (self._address + np.arange(count, dtype=np.int64)) % 2**self.spi_message_creator.address_bit_width
+
+    def _write(self, data: np.ndarray):
+        addresses = self._addresses(data.size)
+
+        if self._code == 0:
+            # Addresses without a configuration register are not decoded by the case statement of the config memory
+            valid = addresses < self.config.size
+            self.config[addresses[valid]] = data[valid] & self._config_masks[addresses[valid]]
+        elif self._code in self._memories_by_code:
+            memory = self._memories_by_code[self._code]
+
+            if addresses.max() >= memory.size:
+                raise ValueError(f"Write to address {int(addresses.max())} of memory with code {self._code}, which only has {memory.size} addresses")
+
+            memory[addresses] = data
+
+    def _read_words(self, count: int):
+        addresses = self._addresses(count)
+
+        if self._code == 0:
+            out = np.zeros(count, dtype=np.uint64)
+            valid = addresses < self.pointers.size
+            out[valid] = self.pointers[addresses[valid]] & self._pointer_masks[addresses[valid]]
+
+            # The pointer bridge keeps its previous output for addresses without a pointer
+            for i in np.flatnonzero(~valid):
+                out[i] = out[i-1] if i > 0 else self._pointer_out
+
+            self._pointer_out = int(out[-1])
+
+            return out
+        elif self._code in self._memories_by_code:
+            memory = self._memories_by_code[self._code]
+
+            if addresses.max() >= memory.size:
+                raise ValueError(f"Read from address {int(addresses.max())} of memory with code {self._code}, which only has {memory.size} addresses")
+
+            return memory[addresses]
+
+        return np.zeros(count, dtype=np.uint64)
+
+    def transfer(self, mosi: Union[List[int], np.ndarray, bytes], byteorder: str = "big", bit_order: str = "msb") -> np.ndarray:
+        """Clock a sequence of words into the model and return the words that the chip shifts out at the same time.
+
+        Args:
+            mosi (Union[List[int], np.ndarray, bytes]): Words sent on MOSI, as words or as a buffer packed by `SpiMessageCreator.pack`
+            byteorder (str, optional): Byte order of a packed buffer. Defaults to "big".
+            bit_order (str, optional): Bit order of a packed buffer. Defaults to "msb".
+
+        Returns:
+            np.ndarray: Words on MISO, which are zero for everything but read data
+        """
+
+        creator = self.spi_message_creator
+
+        if isinstance(mosi, (bytes, bytearray, memoryview)):
+            mosi = unpack_words(mosi, creator.message_bit_width, byteorder, bit_order)
+        else:
+            mosi = as_word_array(mosi, creator.message_bit_width)
+
+        miso = np.zeros(mosi.size, dtype=np.uint64)
+
+        num_transactions_mask = 2**creator.num_transactions_bit_width - 1
+        address_mask = 2**creator.address_bit_width - 1
+        code_mask = 2**creator.code_bit_width - 1
+
+        position = 0
+
+        while position < mosi.size:
+            if self._remaining == 0:
+                header = int(mosi[position])
+
+                self._read = bool(header >> (creator.message_bit_width - 1))
+                self._code = (header >> (creator.address_bit_width + creator.num_transactions_bit_width)) & code_mask
+                self._address = (header >> creator.num_transactions_bit_width) & address_mask
+                self._remaining = header & num_transactions_mask
+
+                self.num_headers += 1
+                position += 1
+                continue
+
+            count = min(self._remaining, mosi.size - position)
+
+            if self._read:
+                miso[position:position+count] = self._read_words(count)
+            else:
+                self._write(mosi[position:position+count])
+
+            self._address += count
+            self._remaining -= count
+            position += count
+
+        self.num_words += mosi.size
+
+        return miso
@@ -0,0 +1,271 @@
+from typing import Dict, Optional, Union
+
+from pathlib import Path
+
+import ast
+import functools
+import hashlib
+import json
+import operator
+
+REGISTER_MAP_CACHE_VERSION = 1
+
+
+class Register:
+    """Configuration register (or register array) in the configuration memory."""
+
+    __slots__ = ("name", "address", "bit_width", "count", "is_array", "requires_reset", "header_prefix")
+
+    def __init__(self, name: str, address: int, bit_width: Union[int, str], count: int, is_array: bool, requires_reset: bool, header_prefix: int):
+        self.name = name
+        self.address = address
+        self.bit_width = bit_width
+        self.count = count
+        self.is_array = is_array
+        self.requires_reset = requires_reset
+        self.header_prefix = header_prefix
+
+    def __repr__(self):
+        return f"Register(name={self.name!r}, address={self.address}, bit_width={self.bit_width!r}, count={self.count})"
+
+
+class Pointer:
+    """On-chip register that can be read via the pointer memory.
+
+    A constant pointer (a layout entry like `[5, "version", True]`) has no input: the pointer bridge returns its value,
+    which is stored in `constant`, as a full-width message.
+    """
+
+    __slots__ = ("name", "address", "bit_width", "header", "constant")
+
+    def __init__(self, name: str, address: int, bit_width: Union[int, str], header: int, constant: Optional[Union[int, str]] = None):
+        self.name = name
+        self.address = address
+        self.bit_width = bit_width
+        self.header = header
+        self.constant = constant
+
+    def __repr__(self):
+        if self.constant is not None:
+            return f"Pointer(name={self.name!r}, address={self.address}, constant={self.constant!r})"
+
+        return f"Pointer(name={self.name!r}, address={self.address}, bit_width={self.bit_width!r})"
+
+
+class Memory:
+    """On-chip memory that is accessed via a `memory_manager`."""
+
+    __slots__ = ("name", "index", "code", "num_rows", "bit_width", "max_address", "write_header_prefix", "read_header_prefix")
+
+    def __init__(self, name: str, index: int, code: int, num_rows: int, bit_width: int, max_address: int, write_header_prefix: int, read_header_prefix: int):
+        self.name = name
+        self.index = index
+        self.code = code
+        self.num_rows = num_rows
+        self.bit_width = bit_width
+        self.max_address = max_address
+        self.write_header_prefix = write_header_prefix
+        self.read_header_prefix = read_header_prefix
+
+    def __repr__(self):
+        return f"Memory(name={self.name!r}, code={self.code}, num_rows={self.num_rows}, bit_width={self.bit_width})"
+
+
+_OPERATORS = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.FloorDiv: operator.floordiv}
+
+
+def evaluate_bit_width(bit_width: Union[int, str], parameters: Dict[str, int]) -> Optional[int]:
+    """Evaluate a bit width from a layout, which is either an integer or an expression of (Verilog) parameters.
+
+    Args:
+        bit_width (Union[int, str]): Bit width, for example `8` or `"NUM_NEURONS-1"`
+        parameters (Dict[str, int]): Values of the parameters that can be used in the expression
+
+    Returns:
+        Optional[int]: Value of the bit width, or None if it depends on a parameter without a known value or uses Verilog syntax that is not supported (for example `$clog2`)
+    """
+
+    if type(bit_width) is int:
+        return bit_width
+
+    def evaluate(node):
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        elif isinstance(node, ast.Name):
+            if node.id not in parameters:
+                raise KeyError(node.id)
+
+            return parameters[node.id]
+        elif isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+            return _OPERATORS[type(node.op)](evaluate(node.left), evaluate(node.right))
+
+        raise ValueError(f"Unsupported bit width expression: {bit_width}")
+
+    try:
+        return evaluate(ast.parse(bit_width, mode="eval").body)
+    except (KeyError, SyntaxError, ValueError, TypeError, ZeroDivisionError):
+        return None
+
+
+def is_constant_pointer(entry: list) -> bool:
+    """Whether a `pointer_sizes_and_names` entry is a constant, in the same way as `generate_pointers` decides it."""
+
+    value = entry[0]
+
+    return len(entry) == 3 and entry[2] == True and (type(value) is int or (type(value) is str and value[:1].isdigit()))
+
+
+def constant_value(constant: Union[int, str]) -> Optional[int]:
+    """Value of a constant pointer, which is an integer or a Verilog literal such as `"16'hBEEF"`.
+
+    Returns:
+        Optional[int]: Value of the constant, or None if it is not a literal that is supported
+    """
+
+    if type(constant) is int:
+        return constant
+
+    bases = {"b": 2, "o": 8, "d": 10, "h": 16}
+    literal = constant.replace("_", "")
+
+    try:
+        if "'" not in literal:
+            return int(literal)
+
+        _, value = literal.split("'", 1)
+        value = value.lstrip("sS")
+
+        return int(value[1:], bases[value[0].lower()])
+    except (ValueError, KeyError, IndexError):
+        return None
+
+
+def layout_hash(message_bit_width: int, code_bit_width: int, address_bit_width: int, config_sizes_and_names: list, pointer_sizes_and_names: list, memory_sizes_and_names: Dict) -> str:
+    """Compute a hash that uniquely identifies an SPI layout.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest of the canonical JSON representation of the layout
+    """
+
+    layout = [REGISTER_MAP_CACHE_VERSION, message_bit_width, code_bit_width, address_bit_width, config_sizes_and_names, pointer_sizes_and_names, memory_sizes_and_names]
+
+    return hashlib.sha256(json.dumps(layout, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class RegisterMap:
+    """Compiled register map of an SPI layout, with O(1) lookups by name.
+
+    The register map is built once from the JSON layout (the `config_sizes_and_names`, `pointer_sizes_and_names` and
+    `memory_sizes_and_names` entries) and stores, per name, the address, bit width, number of entries and the
+    precomputed instruction message prefix, such that only the remaining fields have to be OR-ed in when creating
+    messages. Compiling a layout is as fast as loading a stored register map, so register maps are not cached; `save`
+    and `load` are meant for tools that only have the generated `<name>_register_map.json`.
+    """
+
+    def __init__(self, message_bit_width: int, code_bit_width: int, address_bit_width: int, config_sizes_and_names: list, pointer_sizes_and_names: list, memory_sizes_and_names: Dict):
+        self.message_bit_width = message_bit_width
+        self.code_bit_width = code_bit_width
+        self.address_bit_width = address_bit_width
+        self.num_transactions_bit_width = message_bit_width - code_bit_width - address_bit_width - 1
+
+        self.config_sizes_and_names = config_sizes_and_names
+        self.pointer_sizes_and_names = pointer_sizes_and_names
+        self.memory_sizes_and_names = memory_sizes_and_names
+
+        self.registers: Dict[str, Register] = {}
+        self.pointers: Dict[str, Pointer] = {}
+        self.memories: Dict[str, Memory] = {}
+
+        address = 0
+
+        for bit_width, name, *rest in config_sizes_and_names:
+            is_array = type(bit_width) is list
+            count = 1
+
+            if is_array:
+                count = bit_width[1] if type(bit_width[1]) is int else bit_width[1][0] - bit_width[1][1]
+                bit_width = bit_width[0]
+
+            self.registers[name] = Register(name, address, bit_width, count, is_array, bool(rest[0]) if rest else False, self.header(False, 0, address, 0))
+
+            address += count
+
+        self.config_size = address
+
+        for address, entry in enumerate(pointer_sizes_and_names):
+            bit_width, name = entry[0], entry[1]
+
+            if is_constant_pointer(entry):
+                # The bridge assigns the literal to the whole output register
+                self.pointers[name] = Pointer(name, address, "MESSAGE_BIT_WIDTH", self.header(True, 0, address, 1), bit_width)
+            else:
+                self.pointers[name] = Pointer(name, address, bit_width, self.header(True, 0, address, 1))
+
+        for index, (name, memory) in enumerate(memory_sizes_and_names.items()):
+            # We add plus one to the code as code 0 is the configuration memory
+            code = index + 1
+
+            max_address = int(memory["num_rows"] * memory["bit_width"] / message_bit_width)
+
+            self.memories[name] = Memory(name, index, code, memory["num_rows"], memory["bit_width"], max_address, self.header(False, code, 0, 0), self.header(True, code, 0, 0))
+
+    @functools.cached_property
+    def layout_hash(self) -> str:
+        """Hash of the layout, see `layout_hash`; only computed when it is used, as it serializes the whole layout."""
+
+        return layout_hash(self.message_bit_width, self.code_bit_width, self.address_bit_width, self.config_sizes_and_names, self.pointer_sizes_and_names, self.memory_sizes_and_names)
+
+    def header(self, read: bool, code: int, start_address: int, num_transactions: int) -> int:
+        """Assemble an instruction message: read(1)/write(0) | code | start_address | num_transactions"""
+
+        return (int(read) << (self.message_bit_width - 1)) | (code << (self.address_bit_width + self.num_transactions_bit_width)) | (start_address << self.num_transactions_bit_width) | num_transactions
+
+    def to_dict(self):
+        return {
+            "version": REGISTER_MAP_CACHE_VERSION,
+            "layout_hash": self.layout_hash,
+            "message_bit_width": self.message_bit_width,
+            "code_bit_width": self.code_bit_width,
+            "address_bit_width": self.address_bit_width,
+            "config_sizes_and_names": self.config_sizes_and_names,
+            "pointer_sizes_and_names": self.pointer_sizes_and_names,
+            "memory_sizes_and_names": self.memory_sizes_and_names,
+            "registers": [[r.name, r.address, r.bit_width, r.count, r.is_array, r.requires_reset, r.header_prefix] for r in self.registers.values()],
+            "pointers": [[p.name, p.address, p.bit_width, p.header, p.constant] for p in self.pointers.values()],
+            "memories": [[m.name, m.index, m.code, m.num_rows, m.bit_width, m.max_address, m.write_header_prefix, m.read_header_prefix] for m in self.memories.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict):
+        """Restore a compiled register map from `to_dict` output, without recompiling it."""
+
+        if data.get("version") != REGISTER_MAP_CACHE_VERSION:
+            raise ValueError(f"Unsupported register map version {data.get('version')} (expected: {REGISTER_MAP_CACHE_VERSION})")
+
+        register_map = cls.__new__(cls)
+
+        register_map.message_bit_width = data["message_bit_width"]
+        register_map.code_bit_width = data["code_bit_width"]
+        register_map.address_bit_width = data["address_bit_width"]
+        register_map.num_transactions_bit_width = register_map.message_bit_width - register_map.code_bit_width - register_map.address_bit_width - 1
+
+        register_map.config_sizes_and_names = data["config_sizes_and_names"]
+        register_map.pointer_sizes_and_names = data["pointer_sizes_and_names"]
+        register_map.memory_sizes_and_names = data["memory_sizes_and_names"]
+        register_map.layout_hash = data["layout_hash"]
+
+        register_map.registers = {entry[0]: Register(*entry) for entry in data["registers"]}
+        register_map.pointers = {entry[0]: Pointer(*entry) for entry in data["pointers"]}
+        register_map.memories = {entry[0]: Memory(*entry) for entry in data["memories"]}
+        register_map.config_size = sum(register.count for register in register_map.registers.values())
+
+        return register_map
+
+    def save(self, path: Union[str, Path]):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
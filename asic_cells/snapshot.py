@@ -0,0 +1,341 @@
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from pathlib import Path
+
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+
+from asic_cells.config_shadow import ConfigShadow
+from asic_cells.decoder import SpiResponseDecoder
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.utils import as_word_array
+
+SNAPSHOT_MAGIC = b"ASICSNAP"
+SNAPSHOT_VERSION = 1
+
+# Sections start at multiples of this many bytes, such that every section can be mapped as an aligned array
+SECTION_ALIGNMENT = 64
+
+_PREFIX = struct.Struct("<8sII")
+
+Transfer = Callable[[np.ndarray], np.ndarray]
+
+
+def _word_dtype(message_bit_width: int) -> np.dtype:
+    """Smallest little-endian unsigned integer type that holds a message."""
+
+    for num_bytes in (1, 2, 4, 8):
+        if message_bit_width <= 8 * num_bytes:
+            return np.dtype(f"<u{num_bytes}")
+
+    raise ValueError(f"Snapshots support message bit widths up to 64 (got: {message_bit_width})")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // SECTION_ALIGNMENT) * SECTION_ALIGNMENT
+
+
+class ChipSnapshot:
+    """State of a chip: the configuration registers, pointers and memories of its SPI layout, one message word per address.
+
+    The configuration memory cannot be read over SPI, so its values come from the host (see `capture`) and addresses
+    whose value is not known are marked in `config_known`. Pointers are read-only status registers: they are stored for
+    inspection, but never restored.
+
+    Snapshots are saved in a compact binary file: a fixed prefix (magic, version and header length), a JSON header with
+    the layout hash and the offset of every section, and one aligned array of little-endian words per section, in the
+    smallest integer type that holds a message. `load` maps the file instead of reading it, so memories are only paged
+    in as far as they are used.
+    """
+
+    def __init__(self, layout_hash: str, message_bit_width: int, config: np.ndarray, config_known: np.ndarray, pointers: np.ndarray, memories: Dict[str, np.ndarray]):
+        self.layout_hash = layout_hash
+        self.message_bit_width = message_bit_width
+        self.config = config
+        self.config_known = config_known
+        self.pointers = pointers
+        self.memories = memories
+
+        self._mmap: Optional[mmap.mmap] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Release the mapping of a loaded snapshot; its arrays cannot be used afterwards."""
+
+        if self._mmap is not None:
+            self.config = self.config_known = self.pointers = None
+            self.memories = {}
+
+            # Views of the arrays that are still in use keep the mapping alive until they are released
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass
+
+            self._mmap = None
+
+    def check_layout(self, spi_message_creator: SpiMessageCreator):
+        """Raise a ValueError if the snapshot was taken for a different layout than that of `spi_message_creator`."""
+
+        if self.layout_hash != spi_message_creator.register_map.layout_hash:
+            raise ValueError(f"Snapshot was taken for layout {self.layout_hash[:16]}, not for layout {spi_message_creator.register_map.layout_hash[:16]}")
+
+    @property
+    def num_bytes(self):
+        """Number of bytes of all sections."""
+
+        return sum(array.nbytes for array in (self.config, self.config_known, self.pointers, *self.memories.values()))
+
+    @classmethod
+    def capture(cls, spi_message_creator: SpiMessageCreator, transfer: Transfer, config: Optional[Union[Dict[str, Union[int, List[int]]], ConfigShadow]] = None):
+        """Read all pointers and memories of a chip with maximal burst reads.
+
+        Args:
+            spi_message_creator (SpiMessageCreator): Message creator with the layout of the chip
+            transfer (Transfer): Function that sends words on MOSI and returns the words received on MISO, for example `SpiChipModel.transfer` or the blocking transfer of an SPI adapter
+            config (Optional[Union[Dict[str, Union[int, List[int]]], ConfigShadow]], optional): Configuration that was written to the chip, as values or as the `ConfigShadow` that wrote them. Defaults to None (unknown).
+
+        Returns:
+            ChipSnapshot: Snapshot of the chip
+        """
+
+        creator = spi_message_creator
+        register_map = creator.register_map
+
+        config_values = np.zeros(register_map.config_size, dtype=np.uint64)
+        config_known = np.zeros(register_map.config_size, dtype=bool)
+
+        if isinstance(config, ConfigShadow):
+            values = dict(config._values)
+        else:
+            values = {}
+
+            for key, value in (config or {}).items():
+                start_address = creator._config_start_addresses[key]
+
+                for offset, word in enumerate(creator._config_values(key, value)):
+                    values[start_address + offset] = word
+
+        if values:
+            addresses = np.fromiter(values.keys(), dtype=np.int64, count=len(values))
+            config_values[addresses] = np.fromiter(values.values(), dtype=np.uint64, count=len(values))
+            config_known[addresses] = True
+
+        streams = []
+
+        if register_map.pointers:
+            # Every gap is cheaper to read than a header, so all pointers end up in as few bursts as possible
+            streams.append(creator.create_pointer_burst_words(register_map.pointers, header_cost=float("inf")))
+
+        for key, memory in register_map.memories.items():
+            streams.append(creator.create_read_memory_array(key, 0, memory.max_address))
+
+        pointers = np.zeros(len(register_map.pointers), dtype=np.uint64)
+        memories = {key: np.zeros(memory.max_address, dtype=np.uint64) for key, memory in register_map.memories.items()}
+
+        if streams:
+            words = np.concatenate(streams)
+            decoded = SpiResponseDecoder(creator).decode(words, as_word_array(transfer(words), creator.message_bit_width))
+
+            for key, value in decoded.pointers.items():
+                pointers[register_map.pointers[key].address] = value
+
+            for key in memories:
+                memories[key] = decoded.memory(key)
+
+        return cls(register_map.layout_hash, creator.message_bit_width, config_values, config_known, pointers, memories)
+
+    def save(self, path: Union[str, Path]):
+        """Write the snapshot to a file, see the class documentation for the format."""
+
+        dtype = _word_dtype(self.message_bit_width)
+
+        arrays = [("config", None, np.asarray(self.config).astype(dtype)), ("config_known", None, np.asarray(self.config_known).astype(np.uint8)), ("pointers", None, np.asarray(self.pointers).astype(dtype))]
+        arrays += [("memory", key, np.asarray(memory).astype(dtype)) for key, memory in self.memories.items()]
+
+        sections = []
+        offset = 0
+
+        for kind, name, array in arrays:
+            sections.append({"kind": kind, "name": name, "offset": offset, "count": int(array.size), "dtype": array.dtype.str})
+            offset = _align(offset + array.nbytes)
+
+        header = {"layout_hash": self.layout_hash, "message_bit_width": self.message_bit_width, "sections": sections}
+        header_bytes = json.dumps(header, separators=(",", ":")).encode()
+
+        data_offset = _align(_PREFIX.size + len(header_bytes))
+        path = Path(path)
+
+        # Write to a temporary file first, such that an interrupted save never leaves a truncated snapshot behind
+        temporary_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+        with open(temporary_path, "wb") as f:
+            f.write(_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+
+            for section, (_, _, array) in zip(sections, arrays):
+                f.seek(data_offset + section["offset"])
+                f.write(array.tobytes())
+
+            f.truncate(data_offset + offset)
+
+        temporary_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Union[str, Path], spi_message_creator: Optional[SpiMessageCreator] = None):
+        """Map a snapshot file; the arrays of the snapshot are read-only views of the file until `close` is called.
+
+        Args:
+            path (Union[str, Path]): Path of the snapshot file
+            spi_message_creator (Optional[SpiMessageCreator], optional): When given, check that the snapshot belongs to its layout. Defaults to None.
+
+        Returns:
+            ChipSnapshot: Snapshot
+        """
+
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, header_length = _PREFIX.unpack_from(mapping)
+
+            if magic != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a chip snapshot")
+
+            if version != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported snapshot version {version} (expected: {SNAPSHOT_VERSION})")
+
+            header = json.loads(mapping[_PREFIX.size:_PREFIX.size+header_length])
+
+            if spi_message_creator is not None and header["layout_hash"] != spi_message_creator.register_map.layout_hash:
+                raise ValueError(f"Snapshot was taken for layout {header['layout_hash'][:16]}, not for layout {spi_message_creator.register_map.layout_hash[:16]}")
+
+            data_offset = _align(_PREFIX.size + header_length)
+
+            arrays = {}
+            memories = {}
+
+            for section in header["sections"]:
+                array = np.frombuffer(mapping, dtype=np.dtype(section["dtype"]), count=section["count"], offset=data_offset + section["offset"])
+
+                if section["kind"] == "memory":
+                    memories[section["name"]] = array
+                else:
+                    arrays[section["kind"]] = array
+        except Exception:
+            mapping.close()
+            raise
+
+        snapshot = cls(header["layout_hash"], header["message_bit_width"], arrays["config"], arrays["config_known"].view(bool), arrays["pointers"], memories)
+        snapshot._mmap = mapping
+
+        return snapshot
+
+
+def _changed_runs(changed: np.ndarray, fillable: np.ndarray, max_gap: float) -> List[Tuple[int, int]]:
+    """Merge changed addresses into runs, bridging gaps of at most `max_gap` addresses that can be rewritten as well.
+
+    Returns:
+        List[Tuple[int, int]]: Start and end (exclusive) address of every run
+    """
+
+    addresses = np.flatnonzero(changed)
+
+    if addresses.size == 0:
+        return []
+
+    gaps = np.diff(addresses) - 1
+
+    # A gap can only be bridged if all of its addresses can be rewritten with their target value
+    unfillable = np.cumsum(~fillable)
+    bridgeable = (gaps <= max_gap) & (unfillable[addresses[1:]] == unfillable[addresses[:-1]])
+
+    starts = addresses[np.r_[True, ~bridgeable]]
+    ends = addresses[np.r_[~bridgeable, True]] + 1
+
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def create_restore_words(spi_message_creator: SpiMessageCreator, snapshot: ChipSnapshot, baseline: Optional[ChipSnapshot] = None, header_cost: float = 1.0) -> np.ndarray:
+    """Create the words that bring a chip from the state in `baseline` to the state in `snapshot`.
+
+    Without a baseline (a cold restore) all memories and all known configuration registers are written. With a baseline
+    (a warm restore) only the addresses that differ are written, where changed addresses that are at most `header_cost`
+    addresses apart are written as one run, as rewriting the unchanged words in between is cheaper than another header.
+    Configuration registers that are unknown in the baseline are always written, those that are unknown in the snapshot
+    never.
+
+    Args:
+        spi_message_creator (SpiMessageCreator): Message creator with the layout of the chip
+        snapshot (ChipSnapshot): Target state
+        baseline (Optional[ChipSnapshot], optional): Current state of the chip. Defaults to None.
+        header_cost (float, optional): Cost of an extra burst, in words. Defaults to 1.0.
+
+    Returns:
+        np.ndarray: Array of uint64 words representing the messages
+    """
+
+    start_time = time.perf_counter()
+
+    creator = spi_message_creator
+    register_map = creator.register_map
+
+    snapshot.check_layout(creator)
+
+    if baseline is not None:
+        baseline.check_layout(creator)
+
+    streams = []
+
+    config = np.asarray(snapshot.config, dtype=np.uint64)
+    config_known = np.asarray(snapshot.config_known, dtype=bool)
+
+    if baseline is not None:
+        changed = config_known & (~np.asarray(baseline.config_known, dtype=bool) | (config != np.asarray(baseline.config, dtype=np.uint64)))
+    else:
+        changed = config_known
+
+    for start, end in _changed_runs(changed, config_known, header_cost):
+        streams.append(creator._interleave_headers(register_map.header(False, 0, 0, 0), config[start:end], start))
+
+    for key, memory in register_map.memories.items():
+        target = np.asarray(snapshot.memories[key], dtype=np.uint64)
+
+        if baseline is not None:
+            changed = target != np.asarray(baseline.memories[key], dtype=np.uint64)
+        else:
+            changed = np.ones(target.size, dtype=bool)
+
+        for start, end in _changed_runs(changed, np.ones(target.size, dtype=bool), header_cost):
+            streams.append(creator._interleave_headers(memory.write_header_prefix, target[start:end], start))
+
+    words = np.concatenate(streams) if streams else np.zeros(0, dtype=np.uint64)
+
+    creator._record_words("create_restore_words", start_time, words)
+
+    return words
+
+
+def restore(spi_message_creator: SpiMessageCreator, transfer: Transfer, snapshot: ChipSnapshot, baseline: Optional[ChipSnapshot] = None, header_cost: float = 1.0) -> int:
+    """Bring a chip to the state in `snapshot`, see `create_restore_words`.
+
+    Returns:
+        int: Number of words that were sent
+    """
+
+    words = create_restore_words(spi_message_creator, snapshot, baseline, header_cost)
+
+    if words.size:
+        transfer(words)
+
+    return words.size
@@ -1,33 +1,27 @@
-from typing import Union, List, Dict
+from typing import Callable, Union, List, Dict, Iterable, Iterator, Optional
 import random
+import time
 import warnings
 
-from asic_cells.utils import chunk_list, to_binary_string
+import numpy as np
 
+from asic_cells.instrumentation import Instrumentation, SpiCall, SpiStats
+from asic_cells.memory_image import MemoryImage
+from asic_cells.register_map import RegisterMap
+from asic_cells.utils import as_flat_array, as_word_array, chunk_list, check_bit_width, is_buffer, iter_chunks, join_rows, pack_words, split_rows, to_binary_string
 
-def _compute_start_address(config_sizes_and_names: list):
-    start_addresses = {}
 
-    last_start = 0
-
-    for name, entry_width in [(entry[1], entry[0]) for entry in config_sizes_and_names]:
-        start_addresses[name] = last_start
-
-        number_of_entries = 1
-
-        if type(entry_width) is list:
-            if type(entry_width[1]) is list:
-                number_of_entries = entry_width[1][0] - entry_width[1][1]
-            else:
-                number_of_entries = entry_width[1]
-
-        last_start += number_of_entries
+class SpiMessageCreator:
+    def __init__(self, message_bit_width: int, code_bit_width: int, address_bit_width: int, config_sizes_and_names: list, pointer_sizes_and_names: list, memory_sizes_and_names: Dict, register_map: Optional[RegisterMap] = None):
+        if "config_sizes_and_names" in config_sizes_and_names:
+            warnings.warn("You likely forgot select the entry with key 'config_sizes_and_names' after loading the json configuration file into a dictionary")
 
-    return start_addresses
+        if "pointer_sizes_and_names" in pointer_sizes_and_names:
+            warnings.warn("You likely forgot to select the entry with key 'pointer_sizes_and_names' after loading the json configuration file into a dictionary")
 
+        if register_map is None:
+            register_map = RegisterMap(message_bit_width, code_bit_width, address_bit_width, config_sizes_and_names, pointer_sizes_and_names, memory_sizes_and_names)
 
-class SpiMessageCreator:
-    def __init__(self, message_bit_width: int, code_bit_width: int, address_bit_width: int, config_sizes_and_names: list, pointer_sizes_and_names: list, memory_sizes_and_names: Dict):
         self.message_bit_width = message_bit_width
         self.code_bit_width = code_bit_width
         self.address_bit_width = address_bit_width
@@ -37,19 +31,92 @@ class SpiMessageCreator:
         self.pointer_sizes_and_names = pointer_sizes_and_names
         self.memory_sizes_and_names = memory_sizes_and_names
 
-        if "config_sizes_and_names" in config_sizes_and_names:
-            warnings.warn("You likely forgot select the entry with key 'config_sizes_and_names' after loading the json configuration file into a dictionary")
+        self.register_map = register_map
 
-        if "pointer_sizes_and_names" in pointer_sizes_and_names:
-            warnings.warn("You likely forgot to select the entry with key 'pointer_sizes_and_names' after loading the json configuration file into a dictionary")
+        self._config_start_addresses = {name: register.address for name, register in register_map.registers.items()}
+        self._pointer_addresses = {name: pointer.address for name, pointer in register_map.pointers.items()}
+        self._memory_indices_and_max_addresses = {name: (memory.index, memory.max_address) for name, memory in register_map.memories.items()}
+
+        self._instrumentation: Optional[Instrumentation] = None
 
-        self._config_start_addresses = _compute_start_address(self.config_sizes_and_names)
-        self._pointer_addresses = dict(map(lambda x: (x[1][1], x[0]), enumerate(self.pointer_sizes_and_names)))
+    @classmethod
+    def from_register_map(cls, register_map: RegisterMap):
+        """Create a message creator from an already compiled (for example cached) register map.
 
-        memory_indices = range(len(self.memory_sizes_and_names))
-        max_memory_addresses = map(int, map(lambda x: self.memory_sizes_and_names[x]["num_rows"] * self.memory_sizes_and_names[x]["bit_width"] / self.message_bit_width, self.memory_sizes_and_names))
+        Args:
+            register_map (RegisterMap): Compiled register map
+
+        Returns:
+            SpiMessageCreator: Message creator for the layout of the register map
+        """
 
-        self._memory_indices_and_max_addresses = dict(zip(self.memory_sizes_and_names.keys(), zip(memory_indices, max_memory_addresses)))
+        return cls(register_map.message_bit_width, register_map.code_bit_width, register_map.address_bit_width, register_map.config_sizes_and_names, register_map.pointer_sizes_and_names, register_map.memory_sizes_and_names, register_map)
+
+    def enable_instrumentation(self, callback: Optional[Callable[[SpiCall], None]] = None) -> SpiStats:
+        """Start counting headers, data words, bytes per code and chunk splits, and timing every call to the public methods.
+
+        Instrumentation replaces the public methods of this instance only; when it is disabled the methods of the class are
+        used directly, so an uninstrumented creator pays nothing for it. Instrumentation is not thread-safe.
+
+        Args:
+            callback (Optional[Callable[[SpiCall], None]], optional): Called with the statistics of every call, for example to export them to a metrics system. Defaults to None.
+
+        Returns:
+            SpiStats: Counters that accumulate over all calls, see `SpiStats.snapshot`
+        """
+
+        self.disable_instrumentation()
+
+        self._instrumentation = Instrumentation(self, callback)
+        self._instrumentation.install()
+
+        return self._instrumentation.stats
+
+    def disable_instrumentation(self):
+        """Stop instrumenting this creator and restore the plain methods."""
+
+        if self._instrumentation is not None:
+            self._instrumentation.uninstall()
+            self._instrumentation = None
+
+    @property
+    def stats(self) -> Optional[SpiStats]:
+        """Counters of the instrumentation, or None if it is disabled."""
+
+        return self._instrumentation.stats if self._instrumentation is not None else None
+
+    def _record_words(self, method: str, start_time: float, words):
+        """Count words that another part of the package created from the private helpers, see `SpiStats`.
+
+        Args:
+            method (str): Name under which the words are counted
+            start_time (float): `time.perf_counter()` at the start of the method
+            words: Words that the method created
+        """
+
+        if self._instrumentation is not None:
+            self._instrumentation.record_words(method, time.perf_counter() - start_time, words)
+
+    def _create_instruction_word(self, read: bool, code: int, start_address: int, num_transactions: int):
+        """Create an instruction/header word for the SPI interface.
+
+        Format of the word: read(1)/write(0) | code | start_address | num_transactions
+
+        Args:
+            read (bool): Whether the message is a read or write message
+            code (int): Code/location of the data to be read/written
+            start_address (int): Start address of the data to be read/written
+            num_transactions (int): Number of transactions to be read/written
+
+        Returns:
+            int: Integer of the message of width `self.message_bit_width`
+        """
+
+        check_bit_width(code, self.code_bit_width)
+        check_bit_width(start_address, self.address_bit_width)
+        check_bit_width(num_transactions, self.num_transactions_bit_width)
+
+        return (int(read) << (self.message_bit_width - 1)) | (code << (self.address_bit_width + self.num_transactions_bit_width)) | (start_address << self.num_transactions_bit_width) | num_transactions
 
     def _create_instruction_message(self, read: bool, code: int, start_address: int, num_transactions: int):
         """Create an instruction/header message for the SPI interface.
@@ -66,13 +133,55 @@ class SpiMessageCreator:
             str: Binary string of the message of length `self.message_bit_width`
         """
 
-        bin_read = to_binary_string(read * 1, 1)
-        bin_code = to_binary_string(code, self.code_bit_width)
-        bin_start_address = to_binary_string(start_address, self.address_bit_width)
-        bin_num_transactions = to_binary_string(num_transactions, self.num_transactions_bit_width)
+        return to_binary_string(self._create_instruction_word(read, code, start_address, num_transactions), self.message_bit_width)
+
+    def _to_messages(self, words: List[int]):
+        return [to_binary_string(word, self.message_bit_width) for word in words]
+
+    def _config_values(self, key: str, value: Union[int, List[int]]):
+        """Check a configuration value and convert it into the data words that are written from its start address onwards.
+
+        Args:
+            key (str): Configuration entry name
+            value (Union[int, List[int]]): Value of the configuration entry
+
+        Returns:
+            List[int]: Data words
+        """
+
+        if type(value) is not list:
+            return [self.create_data_word(value)]
+
+        register = self.register_map.registers[key]
+
+        if not register.is_array:
+            raise ValueError("Cannot store a list-type value in a single-value configuration register")
+
+        if len(value) > register.count:
+            raise ValueError(f"Too many entries for {key} (max: {register.count})")
+
+        return [self.create_data_word(entry) for entry in value]
+
+    def create_config_words(self, config: Dict[str, Union[int, List[int]]]):
+        """Create words that write to the configuration memory.
+
+        Args:
+            config (Dict[str, Union[int, List[int]]]): Dictionary with the configuration values
+
+        Returns:
+            List[int]: List of integers representing the messages
+        """
+
+        words = []
+
+        for key, value in config.items():
+            values = self._config_values(key, value)
+
+            words.append(self._create_instruction_word(False, 0, self._config_start_addresses[key], len(values)))
+            words += values
+
+        return words
 
-        return bin_read + bin_code + bin_start_address + bin_num_transactions
-    
     def create_config_messages(self, config: Dict[str, Union[int, List[int]]]):
         """Create messages that write to the configuration memory.
 
@@ -80,35 +189,22 @@ class SpiMessageCreator:
             config (Dict[str, Union[int, List[int]]]): Dictionary with the configuration values
 
         Returns:
-            List[int]: List of integers representing the binary messages
+            List[str]: List of binary strings representing the messages
         """
 
-        messages = []
+        return self._to_messages(self.create_config_words(config))
 
-        for key, value in config.items():
-            is_value_list = type(value) is list
-
-            messages.append(self._create_instruction_message(False, 0, self._config_start_addresses[key], len(value) if is_value_list else 1))
-            
-            if is_value_list:
-                config_size = next(entry[0] for entry in self.config_sizes_and_names if entry[1] == key)
-
-                if type(config_size) is int:
-                    raise ValueError(f"Cannot store a list-type value in a single-value configuration register")
-                
-                _, config_size_length = config_size
-                
-                num_entries = config_size_length if type(config_size_length) is int else config_size_length[0] - config_size_length[1]
-
-                if len(value) <= num_entries:
-                    for entry in value:
-                        messages.append(self.create_data_message(entry))
-                else:
-                    raise ValueError(f"Too many entries for {key} (max: {num_entries})")
-            else:
-                messages.append(self.create_data_message(value))
-
-        return messages
+    def create_pointer_word(self, key: str):
+        """Create a word to read a single pointer; use `create_pointer_burst_words` to read several pointers in bursts.
+
+        Args:
+            key (str): Pointer name
+
+        Returns:
+            int: Integer of the message of width `self.message_bit_width`
+        """
+
+        return self._create_instruction_word(True, 0, self._pointer_addresses[key], 1)
     
     def create_pointer_message(self, key: str):
         """Create a message to read from the pointer memory.
@@ -120,10 +216,79 @@ class SpiMessageCreator:
             str: Binary string of the message of length `self.message_bit_width`
         """
 
-        # TODO: only size 1????//
-        return self._create_instruction_message(True, 0, self._pointer_addresses[key], 1)
-    
-    def create_write_memory_messages(self, key: str, data: list[int], start_address: int = 0):
+        return to_binary_string(self.create_pointer_word(key), self.message_bit_width)
+
+    def plan_pointer_reads(self, keys: Iterable[str], header_cost: float = 1.0):
+        """Cover a set of pointers with the cheapest set of contiguous burst reads.
+
+        The pointers are sorted by address. Two neighbouring pointers end up in the same burst when reading the unused
+        addresses in between is not more expensive than sending an extra header, i.e. when the gap is at most
+        `header_cost` words, and as long as the burst does not exceed `2**self.num_transactions_bit_width-1` words.
+
+        Args:
+            keys (Iterable[str]): Pointer names
+            header_cost (float, optional): Cost of an extra burst, in words. Increase it when every burst also costs a round trip. Defaults to 1.0.
+
+        Returns:
+            List[Tuple[int, int]]: Start address and number of transactions of each burst
+        """
+
+        addresses = sorted(set(self._pointer_addresses[key] for key in keys))
+        max_burst_length = 2**self.num_transactions_bit_width-1
+
+        bursts = []
+
+        for address in addresses:
+            if bursts:
+                start_address, num_transactions = bursts[-1]
+                gap = address - (start_address + num_transactions)
+
+                if gap <= header_cost and address - start_address + 1 <= max_burst_length:
+                    bursts[-1] = (start_address, address - start_address + 1)
+                    continue
+
+            bursts.append((address, 1))
+
+        return bursts
+
+    def create_pointer_burst_words(self, keys: Iterable[str], header_cost: float = 1.0):
+        """Create the words that read a set of pointers with as few burst reads as possible, see `plan_pointer_reads`.
+
+        Every read header is followed by one zero-valued placeholder word per transaction, during which the chip shifts
+        out the pointer values on MISO. Use `asic_cells.decoder.SpiResponseDecoder` to map the received words back to the
+        pointer names.
+
+        Args:
+            keys (Iterable[str]): Pointer names
+            header_cost (float, optional): Cost of an extra burst, in words. Defaults to 1.0.
+
+        Returns:
+            np.ndarray: Array of uint64 words representing the messages
+        """
+
+        bursts = self.plan_pointer_reads(keys, header_cost)
+
+        words = np.zeros(len(bursts) + sum(num_transactions for _, num_transactions in bursts), dtype=np.uint64)
+        position = 0
+
+        for start_address, num_transactions in bursts:
+            words[position] = self._create_instruction_word(True, 0, start_address, num_transactions)
+            position += 1 + num_transactions
+
+        return words
+
+    def create_write_memory_words(self, key: str, data: List[int], start_address: int = 0):
+        """Create words that write data to a memory, split into bursts of at most `2**self.num_transactions_bit_width-1` words.
+
+        Args:
+            key (str): Memory name
+            data (List[int]): Data to be written, one entry per message
+            start_address (int, optional): Start address of the data to be written. Defaults to 0.
+
+        Returns:
+            List[int]: List of integers representing the messages
+        """
+
         code, max_data_length = self._memory_indices_and_max_addresses[key]
 
         assert start_address >= 0, "Start address must be non-negative"
@@ -135,19 +300,270 @@ class SpiMessageCreator:
         if len(data) + start_address > max_data_length:
             raise ValueError(f"Too many transactions ({len(data)}) for {key} at start address {start_address} (max: {max_data_length-start_address})")
 
-        messages = []
+        words = []
 
         for chunk in chunk_list(data, 2**self.num_transactions_bit_width-1):
-            messages.append(self._create_instruction_message(False, code, start_address, len(chunk)))
+            words.append(self._create_instruction_word(False, code, start_address, len(chunk)))
 
-            messages += list(map(self.create_data_message, chunk))
+            words += list(map(self.create_data_word, chunk))
 
             start_address += len(chunk)
         
-        return messages
-    
-    def create_read_memory_message(self, key: str, start_address: int, num_transactions: int):
-        """Create a message to read from a memory.
+        return words
+
+    def create_write_memory_array(self, key: str, data, start_address: int = 0):
+        """Vectorized version of `create_write_memory_words` for large memory images.
+
+        The whole of `data` is range-checked at once, all burst headers are computed with array arithmetic and headers and
+        payload are interleaved into one preallocated array. The output is identical to that of `create_write_memory_words`.
+
+        Args:
+            key (str): Memory name
+            data: NumPy array, list or buffer-protocol object with the data to be written, one entry per message
+            start_address (int, optional): Start address of the data to be written. Defaults to 0.
+
+        Returns:
+            np.ndarray: Array of uint64 words representing the messages
+        """
+
+        code, max_data_length = self._memory_indices_and_max_addresses[key]
+
+        data = as_word_array(data, self.message_bit_width)
+
+        assert start_address >= 0, "Start address must be non-negative"
+        assert data.size > 0, "Data must not be empty"
+
+        # We add plus one to the code as code 0 is the configuration memory
+        code += 1
+
+        if data.size + start_address > max_data_length:
+            raise ValueError(f"Too many transactions ({data.size}) for {key} at start address {start_address} (max: {max_data_length-start_address})")
+
+        return self._interleave_headers(self.register_map.memories[key].write_header_prefix, data, start_address)
+
+    def _interleave_headers(self, header_prefix: int, payload: np.ndarray, start_address: int):
+        """Split a payload into bursts of at most `2**self.num_transactions_bit_width-1` words and put a header before each.
+
+        Args:
+            header_prefix (int): Read bit and code of the headers
+            payload (np.ndarray): Array of uint64 words
+            start_address (int): Start address of the first burst
+
+        Returns:
+            np.ndarray: Array of uint64 words representing the messages
+        """
+
+        chunk_size = 2**self.num_transactions_bit_width-1
+        num_chunks = -(-payload.size // chunk_size)
+        num_full_chunks = payload.size // chunk_size
+
+        chunk_offsets = np.arange(num_chunks, dtype=np.uint64) * np.uint64(chunk_size)
+        chunk_lengths = np.minimum(np.uint64(chunk_size), np.uint64(payload.size) - chunk_offsets)
+
+        check_bit_width(start_address + int(chunk_offsets[-1]), self.address_bit_width)
+
+        headers = header_prefix | ((np.uint64(start_address) + chunk_offsets) << np.uint64(self.num_transactions_bit_width)) | chunk_lengths
+
+        words = np.empty(payload.size + num_chunks, dtype=np.uint64)
+
+        # Full chunks are written as rows of (header, payload...), the remaining words form the last, shorter burst
+        full = words[:num_full_chunks*(chunk_size+1)].reshape(num_full_chunks, chunk_size+1)
+        full[:, 0] = headers[:num_full_chunks]
+        full[:, 1:] = payload[:num_full_chunks*chunk_size].reshape(num_full_chunks, chunk_size)
+
+        if num_chunks > num_full_chunks:
+            words[num_full_chunks*(chunk_size+1)] = headers[-1]
+            words[num_full_chunks*(chunk_size+1)+1:] = payload[num_full_chunks*chunk_size:]
+
+        return words
+
+    def create_write_memory_messages(self, key: str, data: List[int], start_address: int = 0):
+        """Create messages that write data to a memory, split into bursts of at most `2**self.num_transactions_bit_width-1` messages.
+
+        Args:
+            key (str): Memory name
+            data (List[int]): Data to be written, one entry per message
+            start_address (int, optional): Start address of the data to be written. Defaults to 0.
+
+        Returns:
+            List[str]: List of binary strings representing the messages
+        """
+
+        return self._to_messages(self.create_write_memory_words(key, data, start_address))
+
+    def _burst_length(self, max_burst_length: Optional[int]):
+        limit = 2**self.num_transactions_bit_width-1
+
+        if max_burst_length is None:
+            return limit
+
+        if not 0 < max_burst_length <= limit:
+            raise ValueError(f"Maximum burst length must be between 1 and {limit} (got: {max_burst_length})")
+
+        return max_burst_length
+
+    def _create_burst(self, header: int, payload):
+        burst = np.empty(len(payload) + 1, dtype=np.uint64)
+        burst[0] = header
+        burst[1:] = payload
+
+        return burst
+
+    def iter_write_memory_words(self, key: str, data: Union[Iterable[int], np.ndarray, MemoryImage], start_address: int = 0, max_burst_length: Optional[int] = None) -> Iterator[np.ndarray]:
+        """Lazily create the bursts that write data to a memory, so that they can be sent and discarded one by one.
+
+        Buffers (NumPy arrays, memory maps, bytes-like objects) are sliced per burst without being copied as a whole, a
+        `MemoryImage` is decoded per burst straight from the mapped file and any other iterable is consumed
+        `max_burst_length` entries at a time. With the default `max_burst_length`, the concatenation of all bursts equals
+        the output of `create_write_memory_words`.
+
+        Args:
+            key (str): Memory name
+            data (Union[Iterable[int], np.ndarray, MemoryImage]): Data to be written, one entry per message
+            start_address (int, optional): Start address of the data to be written. Defaults to 0.
+            max_burst_length (Optional[int], optional): Maximum number of data words per burst, at most `2**self.num_transactions_bit_width-1`. Smaller bursts let a host overlap encoding with the SPI transfer. Defaults to None (the maximum).
+
+        Yields:
+            np.ndarray: Bursts of uint64 words, one header followed by its data words
+        """
+
+        code, max_data_length = self._memory_indices_and_max_addresses[key]
+        burst_length = self._burst_length(max_burst_length)
+
+        assert start_address >= 0, "Start address must be non-negative"
+
+        if isinstance(data, MemoryImage):
+            if data.message_bit_width != self.message_bit_width:
+                raise ValueError(f"Memory image has a message bit width of {data.message_bit_width} instead of {self.message_bit_width}")
+
+            chunks = data.iter_chunks(burst_length)
+        elif is_buffer(data):
+            data = as_flat_array(data)
+            chunks = (data[i:i+burst_length] for i in range(0, data.size, burst_length))
+        else:
+            chunks = iter_chunks(data, burst_length)
+
+        if hasattr(data, "__len__"):
+            assert len(data) > 0, "Data must not be empty"
+
+            if len(data) + start_address > max_data_length:
+                raise ValueError(f"Too many transactions ({len(data)}) for {key} at start address {start_address} (max: {max_data_length-start_address})")
+
+        # We add plus one to the code as code 0 is the configuration memory
+        return self._iter_write_memory_words(key, code + 1, chunks, start_address, max_data_length)
+
+    def _iter_write_memory_words(self, key: str, code: int, chunks: Iterator, start_address: int, max_data_length: int):
+        for chunk in chunks:
+            payload = as_word_array(chunk, self.message_bit_width)
+
+            if payload.size + start_address > max_data_length:
+                raise ValueError(f"Too many transactions for {key} at start address {start_address} (max: {max_data_length})")
+
+            yield self._create_burst(self._create_instruction_word(False, code, start_address, payload.size), payload)
+
+            start_address += payload.size
+
+    def iter_write_memory_messages(self, key: str, data: Union[Iterable[int], np.ndarray, MemoryImage], start_address: int = 0, max_burst_length: Optional[int] = None) -> Iterator[List[str]]:
+        """Binary string version of `iter_write_memory_words`.
+
+        Yields:
+            List[str]: Bursts of binary strings, one header followed by its data messages
+        """
+
+        for burst in self.iter_write_memory_words(key, data, start_address, max_burst_length):
+            yield self._to_messages(burst.tolist())
+
+    def iter_config_words(self, config: Dict[str, Union[int, List[int]]]) -> Iterator[np.ndarray]:
+        """Lazily create the bursts that write to the configuration memory, one burst per configuration entry.
+
+        Args:
+            config (Dict[str, Union[int, List[int]]]): Dictionary with the configuration values
+
+        Yields:
+            np.ndarray: Bursts of uint64 words, one header followed by its data words
+        """
+
+        for key, value in config.items():
+            yield np.array(self.create_config_words({key: value}), dtype=np.uint64)
+
+    def iter_config_messages(self, config: Dict[str, Union[int, List[int]]]) -> Iterator[List[str]]:
+        """Binary string version of `iter_config_words`.
+
+        Yields:
+            List[str]: Bursts of binary strings, one header followed by its data messages
+        """
+
+        for key, value in config.items():
+            yield self.create_config_messages({key: value})
+
+    def _messages_per_row(self, key: str):
+        """Number of SPI addresses that `memory_manager` maps onto a single row of a memory.
+
+        The memory manager uses the lowest `$clog2(WORD_BIT_WIDTH / MESSAGE_BIT_WIDTH)` address bits as the slice index
+        within a row, so consecutive addresses only map onto consecutive slices when the number of slices is a power of two.
+        """
+
+        bit_width = self.memory_sizes_and_names[key]["bit_width"]
+        messages_per_row = bit_width // self.message_bit_width
+
+        if bit_width % self.message_bit_width != 0 or messages_per_row & (messages_per_row - 1) != 0:
+            raise ValueError(f"Bit width of {key} ({bit_width}) must be a power-of-two multiple of the message bit width ({self.message_bit_width})")
+
+        return messages_per_row
+
+    def rows_to_words(self, key: str, rows: np.ndarray, bitorder: str = "big"):
+        """Split full-width rows of a memory into data words in SPI address order, as expected by `memory_manager`.
+
+        Row `r` is written to addresses `r * messages_per_row` up to and including `(r + 1) * messages_per_row - 1`, where
+        the first address holds the least-significant `self.message_bit_width` bits of the row.
+
+        Args:
+            key (str): Memory name
+            rows (np.ndarray): Rows as bits, shape `(num_rows, bit_width)`, or as 64-bit limbs with the least-significant limb first, shape `(num_rows, ceil(bit_width / 64))`
+            bitorder (str, optional): For rows given as bits, whether the first column is the most ("big") or least ("little") significant bit. Defaults to "big".
+
+        Returns:
+            np.ndarray: Array of uint64 data words
+        """
+
+        self._messages_per_row(key)
+
+        return split_rows(rows, self.memory_sizes_and_names[key]["bit_width"], self.message_bit_width, bitorder)
+
+    def words_to_rows(self, key: str, words: np.ndarray, output: str = "limbs", bitorder: str = "big"):
+        """Reassemble full-width rows of a memory from data words in SPI address order, for example from a burst read.
+
+        Args:
+            key (str): Memory name
+            words (np.ndarray): Data words, starting at the first slice of a row
+            output (str, optional): "limbs" or "bits", see `rows_to_words`. Defaults to "limbs".
+            bitorder (str, optional): For "bits" output, whether the first column is the most ("big") or least ("little") significant bit. Defaults to "big".
+
+        Returns:
+            np.ndarray: Rows as uint64 limbs or uint8 bits
+        """
+
+        self._messages_per_row(key)
+
+        return join_rows(words, self.memory_sizes_and_names[key]["bit_width"], self.message_bit_width, output, bitorder)
+
+    def create_write_rows_array(self, key: str, rows: np.ndarray, start_row: int = 0, bitorder: str = "big"):
+        """Create the words that write full-width rows to a memory, see `rows_to_words` and `create_write_memory_array`.
+
+        Args:
+            key (str): Memory name
+            rows (np.ndarray): Rows as bits or 64-bit limbs
+            start_row (int, optional): First row to be written. Defaults to 0.
+            bitorder (str, optional): For rows given as bits, whether the first column is the most ("big") or least ("little") significant bit. Defaults to "big".
+
+        Returns:
+            np.ndarray: Array of uint64 words representing the messages
+        """
+
+        return self.create_write_memory_array(key, self.rows_to_words(key, rows, bitorder), start_row * self._messages_per_row(key))
+
+    def create_read_memory_word(self, key: str, start_address: int, num_transactions: int):
+        """Create a word to read from a memory.
 
         Args:
             key (str): Memory name
@@ -155,7 +571,7 @@ class SpiMessageCreator:
             num_transactions (int): Number of transactions to be read
 
         Returns:
-            str: Binary string of the message of length `self.message_bit_width`
+            int: Integer of the message of width `self.message_bit_width`
         """
 
         code, max_data_length = self._memory_indices_and_max_addresses[key]
@@ -169,19 +585,81 @@ class SpiMessageCreator:
         if start_address + num_transactions > max_data_length:
             raise ValueError(f"Too many transactions for {key} at start address {start_address} (max: {max_data_length-start_address})")
 
-        return self._create_instruction_message(True, code, start_address, num_transactions)
+        return self._create_instruction_word(True, code, start_address, num_transactions)
+    
+    def create_read_memory_array(self, key: str, start_address: int, num_transactions: int):
+        """Create the words that read an arbitrarily long range from a memory.
+
+        The range is split into bursts of at most `2**self.num_transactions_bit_width-1` words. Every read header is
+        followed by one zero-valued placeholder word per transaction, during which the chip shifts out the read data on
+        MISO. Use `asic_cells.decoder.SpiResponseDecoder` to extract the data from the received words.
+
+        Args:
+            key (str): Memory name
+            start_address (int): Start address of the data to be read
+            num_transactions (int): Number of transactions to be read
+
+        Returns:
+            np.ndarray: Array of uint64 words representing the messages
+        """
+
+        _, max_data_length = self._memory_indices_and_max_addresses[key]
+
+        assert start_address >= 0, "Start address must be non-negative"
+        assert num_transactions > 0, "Number of transactions must be positive"
+
+        if start_address + num_transactions > max_data_length:
+            raise ValueError(f"Too many transactions for {key} at start address {start_address} (max: {max_data_length-start_address})")
+
+        return self._interleave_headers(self.register_map.memories[key].read_header_prefix, np.zeros(num_transactions, dtype=np.uint64), start_address)
+
+    def create_read_memory_message(self, key: str, start_address: int, num_transactions: int):
+        """Create a message to read from a memory.
+
+        Args:
+            key (str): Memory name
+            start_address (int): Start address of the data to be read
+            num_transactions (int): Number of transactions to be read
+
+        Returns:
+            str: Binary string of the message of length `self.message_bit_width`
+        """
+
+        return to_binary_string(self.create_read_memory_word(key, start_address, num_transactions), self.message_bit_width)
     
-    def create_random_data_message(self):
+    def create_random_data_message(self, rng: Optional[np.random.Generator] = None):
         """Create a randomly-valued data message of length `self.message_bit_width`
 
+        For reproducible or bulk random traffic, see `asic_cells.traffic.RandomTrafficGenerator`.
+
+        Args:
+            rng (Optional[np.random.Generator], optional): Generator to draw the data from. Defaults to None (the global `random` state).
+
         Returns:
             str: Binary string of the message of length `self.message_bit_width`
         """
 
-        data = random.randint(0, 2**self.message_bit_width-1)
+        if rng is not None:
+            data = int.from_bytes(rng.bytes(-(-self.message_bit_width // 8)), "big") & (2**self.message_bit_width-1)
+        else:
+            data = random.randint(0, 2**self.message_bit_width-1)
 
         return self.create_data_message(data)
 
+    def create_data_word(self, data: int):
+        """Create an SPI data word from some data, checking that it fits in the SPI message bit width.
+
+        Args:
+            data (int): Data to be converted into an SPI message
+
+        Returns:
+            int: Integer of the message of width `self.message_bit_width`
+        """
+
+        check_bit_width(data, self.message_bit_width)
+
+        return data
+
     def create_data_message(self, data: int):
         """Create an SPI data message from some data using the SPI message bit width.
 
@@ -193,3 +671,18 @@ class SpiMessageCreator:
         """
 
         return to_binary_string(data, self.message_bit_width)
+
+    def pack(self, words: List[int], output: str = "bytes", byteorder: str = "big", bit_order: str = "msb"):
+        """Pack the words of a whole transaction into one contiguous buffer that can be handed to the SPI transport as is.
+
+        Args:
+            words (List[int]): Words as created by the `create_*_word(s)` methods
+            output (str, optional): "bytes", "bytearray", "uint32" or "uint64". Defaults to "bytes".
+            byteorder (str, optional): Order of the bytes within a word, "big" or "little". Defaults to "big".
+            bit_order (str, optional): Order in which the host shifts out the bits of a byte, "msb" or "lsb". Defaults to "msb".
+
+        Returns:
+            Union[bytes, bytearray, np.ndarray]: Packed buffer, see `asic_cells.utils.pack_words`
+        """
+
+        return pack_words(words, self.message_bit_width, output, byteorder, bit_order)
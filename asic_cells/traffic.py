@@ -0,0 +1,217 @@
+from typing import Dict, Optional, Union
+
+import time
+
+import numpy as np
+
+from asic_cells.register_map import evaluate_bit_width
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.utils import pack_words
+
+OPERATION_KINDS = ("config", "write_memory", "read_memory", "read_pointers")
+BURST_LENGTH_DISTRIBUTIONS = ("uniform", "geometric", "max")
+
+
+class RandomTraffic:
+    """Message stream of random operations, together with the parameters of every operation.
+
+    Every operation is a single burst: one header followed by `num_transactions` data words, which are zero-valued
+    placeholders for reads. `kinds` holds indices into `OPERATION_KINDS` and `codes` the code of every header.
+    """
+
+    def __init__(self, words: np.ndarray, kinds: np.ndarray, codes: np.ndarray, start_addresses: np.ndarray, num_transactions: np.ndarray, header_positions: np.ndarray, message_bit_width: int):
+        self.words = words
+        self.kinds = kinds
+        self.codes = codes
+        self.start_addresses = start_addresses
+        self.num_transactions = num_transactions
+        self.header_positions = header_positions
+
+        self._message_bit_width = message_bit_width
+
+    @property
+    def num_operations(self):
+        return self.kinds.size
+
+    @property
+    def num_words(self):
+        return self.words.size
+
+    def counts(self) -> Dict[str, int]:
+        """Number of operations per kind."""
+
+        return dict(zip(OPERATION_KINDS, np.bincount(self.kinds, minlength=len(OPERATION_KINDS)).tolist()))
+
+    def pack(self, output: str = "bytes", byteorder: str = "big", bit_order: str = "msb"):
+        """Pack all words into one contiguous buffer, see `SpiMessageCreator.pack`."""
+
+        return pack_words(self.words, self._message_bit_width, output, byteorder, bit_order)
+
+
+class RandomTrafficGenerator:
+    """Seeded bulk generator of legal random SPI traffic for stress and soak tests.
+
+    All operations are drawn at once with array operations from a NumPy `Generator`, so millions of words take
+    milliseconds and the same seed gives the same traffic in every process. Every burst stays within the limits of its
+    target: configuration writes within the configuration memory (with values that fit the register bit widths), memory
+    writes and reads within `max_address` of the memory and pointer reads within the pointers, all of at most
+    `2**num_transactions_bit_width-1` words. Addresses that do not fit in the start address field of a header cannot be
+    reached by any burst, so every burst also ends at or before address `2**address_bit_width`.
+
+    Burst lengths are drawn from a distribution: "uniform" between 1 and the longest legal burst, "geometric" with mean
+    `mean_burst_length`, or always "max". A fraction `edge_case_rate` of the operations is replaced by an edge case: a
+    burst of the maximum legal length or of a single word, at the first address or ending at the last address.
+    """
+
+    def __init__(self, spi_message_creator: SpiMessageCreator, seed: Optional[Union[int, np.random.Generator]] = None, mix: Optional[Dict[str, float]] = None, burst_length: str = "uniform", mean_burst_length: float = 8.0, edge_case_rate: float = 0.0, parameters: Optional[Dict[str, int]] = None):
+        """Create a generator.
+
+        Args:
+            spi_message_creator (SpiMessageCreator): Message creator with the layout of the chip
+            seed (Optional[Union[int, np.random.Generator]], optional): Seed or generator of the random numbers. Defaults to None (fresh entropy).
+            mix (Optional[Dict[str, float]], optional): Relative weight of every kind in `OPERATION_KINDS`; missing kinds get weight 0. Defaults to None (all kinds that the layout supports are equally likely).
+            burst_length (str, optional): Distribution of the burst lengths, one of `BURST_LENGTH_DISTRIBUTIONS`. Defaults to "uniform".
+            mean_burst_length (float, optional): Mean of the "geometric" distribution. Defaults to 8.0.
+            edge_case_rate (float, optional): Fraction of the operations that is an edge case. Defaults to 0.0.
+            parameters (Optional[Dict[str, int]], optional): Values of the Verilog parameters that register bit widths are expressed in. Registers with an unknown bit width get random values of the full message bit width. Defaults to None.
+        """
+
+        if spi_message_creator.message_bit_width > 64:
+            raise ValueError(f"Random traffic supports message bit widths up to 64 (got: {spi_message_creator.message_bit_width})")
+
+        if burst_length not in BURST_LENGTH_DISTRIBUTIONS:
+            raise ValueError(f"Unknown burst length distribution {burst_length} (supported: {BURST_LENGTH_DISTRIBUTIONS})")
+
+        assert mean_burst_length >= 1, "Mean burst length must be at least 1"
+        assert 0 <= edge_case_rate <= 1, "Edge case rate must be between 0 and 1"
+
+        self.spi_message_creator = spi_message_creator
+        self.rng = np.random.default_rng(seed)
+        self.burst_length = burst_length
+        self.mean_burst_length = mean_burst_length
+        self.edge_case_rate = edge_case_rate
+
+        register_map = spi_message_creator.register_map
+
+        # Operation kinds that the layout has targets for
+        available = {"config": register_map.config_size > 0, "write_memory": len(register_map.memories) > 0, "read_memory": len(register_map.memories) > 0, "read_pointers": len(register_map.pointers) > 0}
+
+        if mix is None:
+            mix = {kind: 1.0 for kind in OPERATION_KINDS if available[kind]}
+
+        for kind, weight in mix.items():
+            if kind not in OPERATION_KINDS:
+                raise ValueError(f"Unknown operation kind {kind} (supported: {OPERATION_KINDS})")
+
+            if weight < 0:
+                raise ValueError(f"Weight of {kind} must not be negative (got: {weight})")
+
+            if weight > 0 and not available[kind]:
+                raise ValueError(f"Layout has no targets for operation kind {kind}")
+
+        weights = np.array([mix.get(kind, 0.0) for kind in OPERATION_KINDS], dtype=float)
+
+        if weights.sum() <= 0:
+            raise ValueError("At least one operation kind must have a positive weight")
+
+        self.probabilities = weights / weights.sum()
+
+        parameters = dict(parameters or {})
+        parameters.setdefault("MESSAGE_BIT_WIDTH", spi_message_creator.message_bit_width)
+        parameters.setdefault("START_ADDRESS_BIT_WIDTH", spi_message_creator.address_bit_width)
+
+        self._full_mask = np.uint64(2**spi_message_creator.message_bit_width - 1)
+        self._config_masks = np.full(register_map.config_size, self._full_mask, dtype=np.uint64)
+
+        for register in register_map.registers.values():
+            bit_width = evaluate_bit_width(register.bit_width, parameters)
+
+            if bit_width is not None and bit_width < spi_message_creator.message_bit_width:
+                self._config_masks[register.address:register.address+register.count] = 2**bit_width - 1
+
+        self._memory_codes = np.array([memory.code for memory in register_map.memories.values()], dtype=np.uint64)
+        self._memory_sizes = np.array([memory.max_address for memory in register_map.memories.values()], dtype=np.int64)
+
+    def _random_words(self, size: int):
+        return self.rng.integers(0, np.iinfo(np.uint64).max, size=size, dtype=np.uint64, endpoint=True) & self._full_mask
+
+    def _burst_lengths(self, max_lengths: np.ndarray):
+        if self.burst_length == "max":
+            return max_lengths.copy()
+
+        if self.burst_length == "geometric":
+            return np.minimum(self.rng.geometric(1 / self.mean_burst_length, size=max_lengths.size), max_lengths)
+
+        return self.rng.integers(1, max_lengths, endpoint=True)
+
+    def generate(self, num_operations: int) -> RandomTraffic:
+        """Draw `num_operations` random operations.
+
+        Args:
+            num_operations (int): Number of operations (bursts)
+
+        Returns:
+            RandomTraffic: Message stream and parameters of the operations
+        """
+
+        assert num_operations >= 0, "Number of operations must be non-negative"
+
+        start_time = time.perf_counter()
+
+        creator = self.spi_message_creator
+        register_map = creator.register_map
+        rng = self.rng
+
+        kinds = rng.choice(len(OPERATION_KINDS), size=num_operations, p=self.probabilities).astype(np.int8)
+
+        is_config = kinds == OPERATION_KINDS.index("config")
+        is_pointers = kinds == OPERATION_KINDS.index("read_pointers")
+        is_memory = ~(is_config | is_pointers)
+        is_read = (kinds == OPERATION_KINDS.index("read_memory")) | is_pointers
+
+        codes = np.zeros(num_operations, dtype=np.uint64)
+        sizes = np.where(is_config, register_map.config_size, len(register_map.pointers)).astype(np.int64)
+
+        if self._memory_codes.size:
+            memories = rng.integers(0, self._memory_codes.size, size=num_operations)
+            codes[is_memory] = self._memory_codes[memories[is_memory]]
+            sizes[is_memory] = self._memory_sizes[memories[is_memory]]
+
+        # Start addresses have to fit in the header, like `check_bit_width` demands in `_create_instruction_word`
+        sizes = np.minimum(sizes, 2**creator.address_bit_width)
+
+        max_lengths = np.minimum(sizes, 2**creator.num_transactions_bit_width - 1)
+        num_transactions = self._burst_lengths(max_lengths)
+        start_addresses = rng.integers(0, sizes - num_transactions, endpoint=True)
+
+        if self.edge_case_rate > 0:
+            edge = rng.random(num_operations) < self.edge_case_rate
+            num_transactions = np.where(edge & (rng.random(num_operations) < 0.5), max_lengths, np.where(edge, 1, num_transactions))
+            start_addresses = np.where(edge, np.where(rng.random(num_operations) < 0.5, 0, sizes - num_transactions), start_addresses)
+
+        num_transactions = num_transactions.astype(np.int64)
+        start_addresses = start_addresses.astype(np.int64)
+
+        headers = (is_read.astype(np.uint64) << np.uint64(creator.message_bit_width - 1)) | (codes << np.uint64(creator.address_bit_width + creator.num_transactions_bit_width)) | (start_addresses.astype(np.uint64) << np.uint64(creator.num_transactions_bit_width)) | num_transactions.astype(np.uint64)
+
+        header_positions = np.arange(num_operations, dtype=np.int64) + np.cumsum(num_transactions) - num_transactions
+        num_words = num_operations + int(num_transactions.sum())
+
+        # Data masks per data word: the register bit width for configuration writes, nothing for the read placeholders
+        operations = np.repeat(np.arange(num_operations), num_transactions)
+        offsets = np.arange(operations.size, dtype=np.int64) - np.repeat(np.cumsum(num_transactions) - num_transactions, num_transactions)
+
+        masks = np.where(is_read[operations], np.uint64(0), self._full_mask)
+        config_words = is_config[operations]
+        masks[config_words] = self._config_masks[start_addresses[operations[config_words]] + offsets[config_words]]
+
+        is_data = np.ones(num_words, dtype=bool)
+        is_data[header_positions] = False
+
+        words = np.empty(num_words, dtype=np.uint64)
+        words[header_positions] = headers
+        words[is_data] = self._random_words(operations.size) & masks
+
+        creator._record_words("RandomTrafficGenerator.generate", start_time, words)
+
+        return RandomTraffic(words, kinds, codes, start_addresses, num_transactions, header_positions, creator.message_bit_width)
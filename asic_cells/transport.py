@@ -0,0 +1,282 @@
+from typing import Dict, Iterable, List, Optional, Union
+
+import abc
+import asyncio
+
+import numpy as np
+
+from asic_cells.decoder import SpiResponseDecoder
+from asic_cells.model import SpiChipModel
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.utils import as_word_array, unpack_words
+
+
+class SpiBackend(abc.ABC):
+    """Full-duplex SPI bus: every transfer shifts out a packed buffer on MOSI and returns what was received on MISO."""
+
+    @abc.abstractmethod
+    async def transfer(self, mosi: bytes) -> bytes:
+        """Transfer a packed buffer.
+
+        Args:
+            mosi (bytes): Buffer to shift out on MOSI
+
+        Returns:
+            bytes: Buffer of the same length that was shifted in on MISO
+        """
+
+    async def close(self):
+        pass
+
+
+class BlockingSpiBackend(SpiBackend):
+    """Base class for backends with a blocking driver, for example spidev or an FTDI adapter.
+
+    Subclasses implement `transfer_blocking`, which runs in a worker thread, such that the event loop can keep encoding and
+    decoding while the bus is busy.
+    """
+
+    @abc.abstractmethod
+    def transfer_blocking(self, mosi: bytes) -> bytes:
+        """Blocking version of `SpiBackend.transfer`."""
+
+    async def transfer(self, mosi: bytes) -> bytes:
+        return await asyncio.get_running_loop().run_in_executor(None, self.transfer_blocking, mosi)
+
+
+class LoopbackBackend(SpiBackend):
+    """In-process backend that connects the transport to a `SpiChipModel`, for testing without hardware."""
+
+    def __init__(self, model: SpiChipModel, sck_frequency: Optional[float] = None, byteorder: str = "big", bit_order: str = "msb"):
+        """Create a loopback backend.
+
+        Args:
+            model (SpiChipModel): Model of the chip
+            sck_frequency (Optional[float], optional): When given, every transfer takes as long as it would on a bus with this SPI clock frequency (in Hz). Defaults to None.
+            byteorder (str, optional): Byte order of the packed buffers. Defaults to "big".
+            bit_order (str, optional): Bit order of the packed buffers. Defaults to "msb".
+        """
+
+        self.model = model
+        self.sck_frequency = sck_frequency
+        self.byteorder = byteorder
+        self.bit_order = bit_order
+
+        self.num_transfers = 0
+
+    async def transfer(self, mosi: bytes) -> bytes:
+        creator = self.model.spi_message_creator
+
+        miso = self.model.transfer(mosi, self.byteorder, self.bit_order)
+        self.num_transfers += 1
+
+        if self.sck_frequency is not None:
+            await asyncio.sleep(len(mosi) * 8 / self.sck_frequency)
+
+        return creator.pack(miso, "bytes", self.byteorder, self.bit_order)
+
+
+class _Request:
+    __slots__ = ("words", "future")
+
+    def __init__(self, words: np.ndarray, future: asyncio.Future):
+        self.words = words
+        self.future = future
+
+
+class SpiTransport:
+    """Asynchronous, pipelined SPI transport on top of `SpiMessageCreator`.
+
+    Submitted transactions are queued and coalesced into transfers of at most `max_transfer_bytes`. While the backend
+    transfers one buffer, the next one is already packed (double buffering), and callers can keep encoding new
+    transactions until `max_in_flight_bytes` are queued or on the bus, after which `submit` waits. Every submission
+    returns a future that resolves to the words received for exactly that submission, so each submission must be a
+    complete transaction (headers together with all of their data words).
+
+    Example:
+        async with SpiTransport(spi_message_creator, backend) as transport:
+            await transport.write_memory("weights", weights)
+            pointers = await transport.read_pointers(["state", "counter"])
+    """
+
+    def __init__(self, spi_message_creator: SpiMessageCreator, backend: SpiBackend, max_in_flight_bytes: int = 1 << 20, max_transfer_bytes: int = 1 << 16, byteorder: str = "big", bit_order: str = "msb"):
+        """Create a transport.
+
+        Args:
+            spi_message_creator (SpiMessageCreator): Message creator with the layout of the chip
+            backend (SpiBackend): Backend that performs the transfers
+            max_in_flight_bytes (int, optional): Maximum number of bytes that are queued or being transferred. Defaults to 1 MiB.
+            max_transfer_bytes (int, optional): Maximum number of bytes that are coalesced into one backend transfer. Defaults to 64 KiB.
+            byteorder (str, optional): Byte order of the packed buffers. Defaults to "big".
+            bit_order (str, optional): Bit order of the packed buffers. Defaults to "msb".
+        """
+
+        self.spi_message_creator = spi_message_creator
+        self.backend = backend
+        self.max_in_flight_bytes = max_in_flight_bytes
+        self.max_transfer_bytes = max_transfer_bytes
+        self.byteorder = byteorder
+        self.bit_order = bit_order
+
+        self.decoder = SpiResponseDecoder(spi_message_creator)
+
+        self.bytes_transferred = 0
+        self.num_transfers = 0
+
+        self._bytes_per_word = spi_message_creator.message_bit_width // 8
+        self._queue: List[_Request] = []
+        self._in_flight_bytes = 0
+        self._condition: Optional[asyncio.Condition] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def __aenter__(self):
+        self.start()
+
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def start(self):
+        """Start the worker that feeds the backend; called automatically by `submit`."""
+
+        if self._worker is None:
+            self._condition = asyncio.Condition()
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def close(self):
+        """Wait until all submitted transactions are transferred and stop the worker."""
+
+        if self._worker is None:
+            return
+
+        async with self._condition:
+            self._closing = True
+            self._condition.notify_all()
+
+        await self._worker
+        await self.backend.close()
+
+        self._worker = None
+
+    async def submit(self, words: Union[List[int], np.ndarray]) -> asyncio.Future:
+        """Queue a transaction for transfer, waiting while the maximum number of in-flight bytes is reached.
+
+        Args:
+            words (Union[List[int], np.ndarray]): Words of one or more complete transactions
+
+        Returns:
+            asyncio.Future: Future that resolves to the words received during this transaction
+        """
+
+        self.start()
+
+        words = as_word_array(words, self.spi_message_creator.message_bit_width)
+        num_bytes = words.size * self._bytes_per_word
+
+        future = asyncio.get_running_loop().create_future()
+
+        async with self._condition:
+            if self._closing:
+                raise RuntimeError("Transport is closed")
+
+            # A transaction that is larger than the limit on its own is allowed when nothing else is in flight
+            await self._condition.wait_for(lambda: self._in_flight_bytes == 0 or self._in_flight_bytes + num_bytes <= self.max_in_flight_bytes)
+
+            self._in_flight_bytes += num_bytes
+            self._queue.append(_Request(words, future))
+            self._condition.notify_all()
+
+        return future
+
+    async def _next_batch(self) -> List[_Request]:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._queue or self._closing)
+
+            batch = []
+            num_bytes = 0
+
+            while self._queue and (not batch or num_bytes + self._queue[0].words.size * self._bytes_per_word <= self.max_transfer_bytes):
+                request = self._queue.pop(0)
+                batch.append(request)
+                num_bytes += request.words.size * self._bytes_per_word
+
+            return batch
+
+    async def _transfer(self, batch: List[_Request], buffer: bytes):
+        try:
+            miso = unpack_words(await self.backend.transfer(buffer), self.spi_message_creator.message_bit_width, self.byteorder, self.bit_order)
+        except Exception as e:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+        else:
+            position = 0
+
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_result(miso[position:position+request.words.size])
+
+                position += request.words.size
+
+        self.bytes_transferred += len(buffer)
+        self.num_transfers += 1
+
+        async with self._condition:
+            self._in_flight_bytes -= len(buffer)
+            self._condition.notify_all()
+
+    async def _run(self):
+        current = None
+
+        while True:
+            batch = await self._next_batch()
+
+            if not batch:
+                break
+
+            # Pack the next buffer while the previous one is still on the bus
+            buffer = self.spi_message_creator.pack(np.concatenate([request.words for request in batch]), "bytes", self.byteorder, self.bit_order)
+
+            if current is not None:
+                await current
+
+            current = asyncio.ensure_future(self._transfer(batch, buffer))
+
+        if current is not None:
+            await current
+
+    async def write_config(self, config: Dict[str, Union[int, List[int]]]):
+        """Write to the configuration memory and wait until the words are on the bus."""
+
+        await (await self.submit(self.spi_message_creator.create_config_words(config)))
+
+    async def write_memory(self, key: str, data, start_address: int = 0):
+        """Write data to a memory and wait until the words are on the bus."""
+
+        await (await self.submit(self.spi_message_creator.create_write_memory_array(key, data, start_address)))
+
+    async def read_memory(self, key: str, start_address: int, num_transactions: int) -> np.ndarray:
+        """Read a range from a memory.
+
+        Returns:
+            np.ndarray: Array of uint64 data words
+        """
+
+        words = self.spi_message_creator.create_read_memory_array(key, start_address, num_transactions)
+
+        return self.decoder.decode(words, await (await self.submit(words))).memory(key)
+
+    async def read_pointers(self, keys: Iterable[str]) -> Dict[str, int]:
+        """Read a set of pointers with as few burst reads as possible.
+
+        Returns:
+            Dict[str, int]: Value per requested pointer
+        """
+
+        keys = list(keys)
+        words = self.spi_message_creator.create_pointer_burst_words(keys)
+        pointers = self.decoder.decode(words, await (await self.submit(words))).pointers
+
+        return {key: pointers[key] for key in keys}
@@ -1,4 +1,15 @@
-from typing import List
+from typing import Iterable, Iterator, List, Sequence, Union
+
+from itertools import islice
+
+import numpy as np
+
+BYTE_ORDERS = ("big", "little")
+BIT_ORDERS = ("msb", "lsb")
+PACKED_OUTPUTS = ("bytes", "bytearray", "uint32", "uint64")
+
+# Lookup table that reverses the order of the bits within a byte
+_REVERSED_BITS = np.array([int(format(i, "08b")[::-1], 2) for i in range(256)], dtype=np.uint8)
 
 
 def chunk_list(input_list: list, chunk_size: int):
@@ -15,6 +26,40 @@ def chunk_list(input_list: list, chunk_size: int):
     return [input_list[i:i+chunk_size] for i in range(0, len(input_list), chunk_size)]
 
 
+def iter_chunks(iterable: Iterable, chunk_size: int) -> Iterator[list]:
+    """Lazily chunk any iterable into lists of a given size, without materializing the input.
+
+    Args:
+        iterable (Iterable): Input iterable
+        chunk_size (int): Size of the chunks
+
+    Yields:
+        list: Chunks of size `chunk_size` (the last chunk may be shorter)
+    """
+
+    iterator = iter(iterable)
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def check_bit_width(value: int, n_bits: int):
+    """Check that an integer can be represented with a certain number of bits.
+
+    Args:
+        value (int): Value to check
+        n_bits (int): Available bit width
+    """
+
+    assert value >= 0, "Value must be non-negative"
+    assert value < 2**n_bits, f"Value exceeds the maximum possible value for the given bit width (max: {2**n_bits-1})"
+
+
 def to_binary_string(value: int, n_bits: int):
     """Function to convert integer to binary string with certain bit width.
 
@@ -26,8 +71,7 @@ def to_binary_string(value: int, n_bits: int):
         str: Binary string
     """
 
-    assert value >= 0, "Value must be non-negative"
-    assert value < 2**n_bits, f"Value exceeds the maximum possible value for the given bit width (max: {2**n_bits-1})"
+    check_bit_width(value, n_bits)
 
     return format(value, f"0{n_bits}b")
 
@@ -39,3 +83,286 @@ def flatten_list_of_lists(matrix: List[List[int]]) -> List[int]:
         flat_list.extend(row)
 
     return flat_list
+
+
+def is_buffer(data) -> bool:
+    """Whether `data` is a NumPy array or another object that supports the buffer protocol."""
+
+    return isinstance(data, (np.ndarray, bytes, bytearray, memoryview))
+
+
+def as_flat_array(data) -> np.ndarray:
+    """View a sequence or buffer-protocol object as a flat NumPy array, without copying or converting buffers.
+
+    Args:
+        data: List of integers, NumPy array or any object that supports the buffer protocol
+
+    Returns:
+        np.ndarray: Flat array
+    """
+
+    if isinstance(data, np.ndarray):
+        return data.reshape(-1)
+    elif is_buffer(data):
+        return np.asarray(memoryview(data)).reshape(-1)
+
+    return np.asarray(data).reshape(-1)
+
+
+def as_word_array(data, n_bits: int):
+    """Convert a sequence or buffer-protocol object into a flat uint64 array, checking that every entry fits in `n_bits`.
+
+    Args:
+        data: List of integers, NumPy array or any object that supports the buffer protocol
+        n_bits (int): Bit width of a single word, at most 64
+
+    Returns:
+        np.ndarray: Flat array of uint64 words
+    """
+
+    if n_bits > 64:
+        raise ValueError(f"Word arrays only support bit widths up to 64 (got: {n_bits})")
+
+    array = as_flat_array(data)
+
+    if array.dtype == object:
+        assert all(value >= 0 for value in array), "Value must be non-negative"
+        assert all(value < 2**n_bits for value in array), f"Value exceeds the maximum possible value for the given bit width (max: {2**n_bits-1})"
+
+        return array.astype(np.uint64)
+
+    if array.dtype.kind not in "uib":
+        raise ValueError(f"Words must be integers (got dtype: {array.dtype})")
+
+    if array.size == 0:
+        return array.astype(np.uint64)
+
+    if array.dtype.kind == "i":
+        assert array.min() >= 0, "Value must be non-negative"
+
+    if n_bits < array.dtype.itemsize * 8:
+        assert int(array.max()) < 2**n_bits, f"Value exceeds the maximum possible value for the given bit width (max: {2**n_bits-1})"
+
+    return array.astype(np.uint64, copy=False)
+
+
+def _check_packing_arguments(n_bits: int, byteorder: str, bit_order: str):
+    if n_bits % 8 != 0:
+        raise ValueError(f"Only bit widths that are a multiple of 8 can be packed (got: {n_bits})")
+
+    if byteorder not in BYTE_ORDERS:
+        raise ValueError(f"Unknown byte order '{byteorder}' (options: {BYTE_ORDERS})")
+
+    if bit_order not in BIT_ORDERS:
+        raise ValueError(f"Unknown bit order '{bit_order}' (options: {BIT_ORDERS})")
+
+
+def pack_words(words: Union[Sequence[int], np.ndarray], n_bits: int, output: str = "bytes", byteorder: str = "big", bit_order: str = "msb"):
+    """Pack a sequence of `n_bits` wide words into one contiguous buffer.
+
+    Every word occupies `n_bits // 8` bytes, ordered according to `byteorder`. With the default big-endian byte order
+    and MSB-first bit order, shifting the buffer out byte by byte, MSB first, puts each word on the wire MSB first, which
+    is the order in which the SPI client expects them. Use `bit_order="lsb"` for hosts that shift out every byte LSB
+    first: the bits within each byte are then reversed so that the wire order stays the same.
+
+    The array outputs are views of the packed byte stream, which means that every element holds exactly one word when
+    the width of the dtype equals `n_bits`.
+
+    Args:
+        words (Union[Sequence[int], np.ndarray]): Words to pack
+        n_bits (int): Bit width of a single word, must be a multiple of 8
+        output (str, optional): Type of the returned buffer, one of `PACKED_OUTPUTS`. Defaults to "bytes".
+        byteorder (str, optional): Order of the bytes within a word, "big" or "little". Defaults to "big".
+        bit_order (str, optional): Order in which the host shifts out the bits of a byte, "msb" or "lsb". Defaults to "msb".
+
+    Returns:
+        Union[bytes, bytearray, np.ndarray]: Packed buffer
+    """
+
+    _check_packing_arguments(n_bits, byteorder, bit_order)
+
+    if output not in PACKED_OUTPUTS:
+        raise ValueError(f"Unknown packed output '{output}' (options: {PACKED_OUTPUTS})")
+
+    n_bytes = n_bits // 8
+
+    if n_bits <= 64:
+        array = np.asarray(words, dtype=np.uint64).reshape(-1)
+
+        if n_bits < 64 and np.any(array >> np.uint64(n_bits)):
+            raise ValueError(f"Words exceed the maximum possible value for the given bit width (max: {2**n_bits-1})")
+
+        # Serialize every word as a 64-bit integer and only keep the bytes that belong to the word itself
+        as_bytes = array.astype(">u8" if byteorder == "big" else "<u8").view(np.uint8).reshape(-1, 8)
+        as_bytes = as_bytes[:, 8-n_bytes:] if byteorder == "big" else as_bytes[:, :n_bytes]
+        buffer = np.ascontiguousarray(as_bytes).reshape(-1)
+    else:
+        for word in words:
+            check_bit_width(int(word), n_bits)
+
+        buffer = np.frombuffer(b"".join(int(word).to_bytes(n_bytes, byteorder) for word in words), dtype=np.uint8)
+
+    if bit_order == "lsb":
+        buffer = _REVERSED_BITS[buffer]
+
+    if output == "bytes":
+        return buffer.tobytes()
+    elif output == "bytearray":
+        return bytearray(buffer.tobytes())
+
+    dtype = np.dtype(output).newbyteorder(">" if byteorder == "big" else "<")
+
+    if buffer.size % dtype.itemsize != 0:
+        raise ValueError(f"Packed buffer of {buffer.size} bytes cannot be viewed as an array of {output}")
+
+    return buffer.view(dtype)
+
+
+def unpack_words(buffer: Union[bytes, bytearray, memoryview, np.ndarray], n_bits: int, byteorder: str = "big", bit_order: str = "msb"):
+    """Unpack a contiguous buffer into `n_bits` wide words; the inverse of `pack_words`.
+
+    Args:
+        buffer (Union[bytes, bytearray, memoryview, np.ndarray]): Packed buffer
+        n_bits (int): Bit width of a single word, must be a multiple of 8
+        byteorder (str, optional): Order of the bytes within a word, "big" or "little". Defaults to "big".
+        bit_order (str, optional): Order in which the host shifts out the bits of a byte, "msb" or "lsb". Defaults to "msb".
+
+    Returns:
+        Union[np.ndarray, List[int]]: Array of uint64 words, or a list of Python integers for bit widths larger than 64
+    """
+
+    _check_packing_arguments(n_bits, byteorder, bit_order)
+
+    n_bytes = n_bits // 8
+
+    buffer = np.frombuffer(buffer, dtype=np.uint8) if not isinstance(buffer, np.ndarray) else buffer.reshape(-1).view(np.uint8)
+
+    if buffer.size % n_bytes != 0:
+        raise ValueError(f"Buffer of {buffer.size} bytes does not contain a whole number of {n_bits}-bit words")
+
+    if bit_order == "lsb":
+        buffer = _REVERSED_BITS[buffer]
+
+    if n_bits > 64:
+        return [int.from_bytes(buffer[i:i+n_bytes].tobytes(), byteorder) for i in range(0, buffer.size, n_bytes)]
+
+    as_bytes = np.zeros((buffer.size // n_bytes, 8), dtype=np.uint8)
+
+    if byteorder == "big":
+        as_bytes[:, 8-n_bytes:] = buffer.reshape(-1, n_bytes)
+    else:
+        as_bytes[:, :n_bytes] = buffer.reshape(-1, n_bytes)
+
+    return as_bytes.view(">u8" if byteorder == "big" else "<u8").reshape(-1).astype(np.uint64)
+
+
+def _limbs_per_row(row_bit_width: int):
+    return -(-row_bit_width // 64)
+
+
+def split_rows(rows: np.ndarray, row_bit_width: int, message_bit_width: int, bitorder: str = "big") -> np.ndarray:
+    """Split full-width memory rows into consecutive message words, least-significant slice first.
+
+    Rows can be given either as bits, with shape `(num_rows, row_bit_width)`, or as 64-bit limbs, with shape
+    `(num_rows, ceil(row_bit_width / 64))` and the least-significant limb first. A flat array is interpreted as one
+    limb per row.
+
+    Args:
+        rows (np.ndarray): Rows as bits or limbs
+        row_bit_width (int): Bit width of a row, a multiple of `message_bit_width`
+        message_bit_width (int): Bit width of a message, at most 64
+        bitorder (str, optional): For rows given as bits, whether the first column holds the most ("big") or least ("little") significant bit. Defaults to "big".
+
+    Returns:
+        np.ndarray: Flat array of `num_rows * row_bit_width / message_bit_width` uint64 words
+    """
+
+    if message_bit_width > 64 or row_bit_width % message_bit_width != 0:
+        raise ValueError(f"Row bit width ({row_bit_width}) must be a multiple of the message bit width ({message_bit_width}), which can be at most 64")
+
+    if bitorder not in BYTE_ORDERS:
+        raise ValueError(f"Unknown bit order '{bitorder}' (options: {BYTE_ORDERS})")
+
+    rows = np.asarray(rows)
+    messages_per_row = row_bit_width // message_bit_width
+    num_limbs = _limbs_per_row(row_bit_width)
+
+    if rows.ndim == 2 and rows.shape[1] == row_bit_width and (rows.dtype == bool or rows.dtype == np.uint8) and row_bit_width > num_limbs:
+        assert np.all(rows <= 1), "Bits must be either 0 or 1"
+
+        bits = rows[:, ::-1] if bitorder == "big" else rows
+        bits = np.ascontiguousarray(bits, dtype=np.uint8).reshape(-1, message_bit_width)
+
+        # Pack every message LSB first into (at most) 8 bytes and read those as one little-endian integer
+        as_bytes = np.zeros((bits.shape[0], 8), dtype=np.uint8)
+        packed = np.packbits(bits, axis=1, bitorder="little")
+        as_bytes[:, :packed.shape[1]] = packed
+
+        return as_bytes.view("<u8").reshape(-1).astype(np.uint64)
+
+    if rows.ndim == 1 and num_limbs == 1:
+        rows = rows.reshape(-1, 1)
+
+    if rows.ndim != 2 or rows.shape[1] != num_limbs:
+        raise ValueError(f"Rows must have shape (num_rows, {row_bit_width}) for bits or (num_rows, {num_limbs}) for 64-bit limbs (got: {rows.shape})")
+
+    limbs = as_word_array(rows, 64).reshape(-1, num_limbs)
+
+    if row_bit_width % 64 != 0:
+        assert not np.any(limbs[:, -1] >> np.uint64(row_bit_width % 64)), f"Rows exceed the maximum possible value for the given bit width ({row_bit_width})"
+
+    messages_per_limb = 64 // message_bit_width if message_bit_width < 64 else 1
+    shifts = np.arange(messages_per_limb, dtype=np.uint64) * np.uint64(message_bit_width)
+    mask = np.uint64(2**message_bit_width - 1)
+
+    words = (limbs[:, :, None] >> shifts) & mask
+
+    return words.reshape(limbs.shape[0], -1)[:, :messages_per_row].reshape(-1)
+
+
+def join_rows(words: np.ndarray, row_bit_width: int, message_bit_width: int, output: str = "limbs", bitorder: str = "big") -> np.ndarray:
+    """Reassemble full-width memory rows from consecutive message words; the inverse of `split_rows`.
+
+    Args:
+        words (np.ndarray): Message words, least-significant slice of every row first
+        row_bit_width (int): Bit width of a row, a multiple of `message_bit_width`
+        message_bit_width (int): Bit width of a message, at most 64
+        output (str, optional): "limbs" for an array of shape `(num_rows, ceil(row_bit_width / 64))` with the least-significant limb first or "bits" for an array of shape `(num_rows, row_bit_width)`. Defaults to "limbs".
+        bitorder (str, optional): For "bits" output, whether the first column holds the most ("big") or least ("little") significant bit. Defaults to "big".
+
+    Returns:
+        np.ndarray: Rows as uint64 limbs or uint8 bits
+    """
+
+    if message_bit_width > 64 or row_bit_width % message_bit_width != 0:
+        raise ValueError(f"Row bit width ({row_bit_width}) must be a multiple of the message bit width ({message_bit_width}), which can be at most 64")
+
+    if output not in ("limbs", "bits"):
+        raise ValueError(f"Unknown row output '{output}' (options: ('limbs', 'bits'))")
+
+    if bitorder not in BYTE_ORDERS:
+        raise ValueError(f"Unknown bit order '{bitorder}' (options: {BYTE_ORDERS})")
+
+    messages_per_row = row_bit_width // message_bit_width
+    words = as_word_array(words, message_bit_width)
+
+    if words.size % messages_per_row != 0:
+        raise ValueError(f"Number of words ({words.size}) is not a multiple of the number of messages per row ({messages_per_row})")
+
+    words = words.reshape(-1, messages_per_row)
+
+    if output == "bits":
+        as_bytes = words.astype("<u8").view(np.uint8).reshape(-1, 8)
+        bits = np.unpackbits(as_bytes, axis=1, bitorder="little")[:, :message_bit_width].reshape(words.shape[0], row_bit_width)
+
+        return np.ascontiguousarray(bits[:, ::-1]) if bitorder == "big" else bits
+
+    messages_per_limb = 64 // message_bit_width if message_bit_width < 64 else 1
+    num_limbs = _limbs_per_row(row_bit_width)
+
+    padded = np.zeros((words.shape[0], num_limbs * messages_per_limb), dtype=np.uint64)
+    padded[:, :messages_per_row] = words
+
+    shifts = np.arange(messages_per_limb, dtype=np.uint64) * np.uint64(message_bit_width)
+
+    return np.bitwise_or.reduce(padded.reshape(-1, num_limbs, messages_per_limb) << shifts, axis=2)
@@ -0,0 +1,95 @@
+"""Compare the unrolled and ranged config_memory generation modes for growing array sizes.
+
+For every array size, a layout with a few scalar registers and four register arrays of that size (two of which are
+reset) is generated in both modes. The benchmark reports the number of generated lines, the time it takes to render
+the template and, if Verilator is installed, the time it takes to build the Verilated model.
+
+Usage:
+    python benchmarks/config_memory_codegen.py --sizes 16 256 1024 4096 --json results.json
+"""
+
+from pathlib import Path
+
+import argparse
+import json
+import shlex
+import shutil
+import subprocess
+import tempfile
+import time
+
+from asic_cells.codegen.config_memory import CONFIG_MEMORY_MODES, generate_config_memory
+
+
+def create_layout(array_size: int):
+    return [
+        [1, "enable", True],
+        [8, "threshold", True],
+        [[16, array_size], "weights", True],
+        [[8, array_size], "delays", False],
+        [[12, [array_size + 4, 4]], "offsets", True],
+        [[1, array_size], "masks", False],
+        [12, "leak", False],
+    ]
+
+
+def verilator_build_time(source: str, build_dir: Path, jobs: int, extra_args: list):
+    source_path = build_dir / "config_memory.sv"
+    source_path.write_text(source)
+
+    start = time.perf_counter()
+    subprocess.run(["verilator", "--cc", "--build", "-j", str(jobs), "-Wno-fatal", "-Wno-lint", "-Wno-style", "--Mdir", str(build_dir / "obj_dir"), "--top-module", "config_memory", *extra_args, str(source_path)], check=True, capture_output=True)
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256, 1024, 4096], help="Array sizes to generate")
+    parser.add_argument("--no-build", action="store_true", help="Skip the Verilator builds")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of parallel jobs of the C++ build")
+    parser.add_argument("--verilator-args", default="", help="Extra arguments for Verilator, for example '-MAKEFLAGS \"OPT_FAST=-O1\"'")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+
+    args = parser.parse_args()
+
+    build = not args.no_build and shutil.which("verilator") is not None
+
+    if not args.no_build and not build:
+        print("Verilator was not found, only measuring the generated code")
+
+    results = []
+
+    print(f"{'size':>6} {'mode':>9} {'lines':>8} {'render (ms)':>12} {'build (s)':>10}")
+
+    for size in args.sizes:
+        layout = create_layout(size)
+
+        for mode in CONFIG_MEMORY_MODES:
+            start = time.perf_counter()
+            source = generate_config_memory(layout, mode)
+            render_time = time.perf_counter() - start
+
+            result = {"array_size": size, "mode": mode, "lines": source.count("\n") + 1, "render_time": render_time, "build_time": None}
+
+            if build:
+                with tempfile.TemporaryDirectory() as build_dir:
+                    try:
+                        result["build_time"] = verilator_build_time(source, Path(build_dir), args.jobs, shlex.split(args.verilator_args))
+                    except subprocess.CalledProcessError as e:
+                        # Large unrolled memories can run out of memory during the C++ build
+                        result["build_error"] = f"exit status {e.returncode}"
+
+            results.append(result)
+
+            build_time = f"{result['build_time']:10.2f}" if result["build_time"] is not None else f"{result.get('build_error', '-'):>10}"
+            print(f"{size:6d} {mode:>9} {result['lines']:8d} {render_time*1e3:12.1f} {build_time}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
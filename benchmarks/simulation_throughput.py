@@ -0,0 +1,403 @@
+"""Measure how fast the RTL cells simulate in Verilator, with and without tracing and coverage.
+
+Every cell is wrapped in a generated toplevel that only has a clock input: a xorshift generator drives all data inputs
+with new random values every cycle, resets are released after a few cycles and all outputs are folded into a checksum,
+such that Verilator cannot optimize any logic away. A small C++ main clocks the model for a given number of cycles and
+reports the simulated cycles per second. This measures the cost of the RTL itself, without the overhead of cocotb.
+
+Results are written as JSON. With `--update-baseline`, the results are stored together with a minimum throughput per
+benchmark (`--tolerance` below the measured one); with `--baseline`, the results are compared against such a file and
+the script exits with a non-zero status if a benchmark got slower than its threshold.
+
+Usage:
+    python benchmarks/simulation_throughput.py --json results.json
+    python benchmarks/simulation_throughput.py --cells clock_divider single_port_type_t_sram --configs plain trace_coverage
+    python benchmarks/simulation_throughput.py --baseline baseline.json
+"""
+
+from typing import Callable, Dict, List, Tuple, Union
+
+from pathlib import Path
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+SOURCE_DIR = Path(__file__).resolve().parent / ".." / "src"
+BUILD_DIR = Path(__file__).resolve().parent / "sim_build"
+
+Width = Union[int, Callable[[Dict[str, int]], int]]
+
+# Verilator flags per configuration; the tests currently always use --trace and --coverage
+CONFIGS = {
+    "plain": [],
+    "trace": ["--trace"],
+    "coverage": ["--coverage"],
+    "trace_coverage": ["--trace", "--coverage"],
+}
+
+
+def clog2(value: int) -> int:
+    return max(1, (value - 1).bit_length())
+
+
+class Cell:
+    """RTL cell with the ports that the benchmark wrapper has to drive and observe.
+
+    Inputs are (name, kind, width) with kind "clock" (the benchmark clock), "slow_clock" (the benchmark clock divided by
+    two, for cells with a second clock domain), "reset" (high during the first cycles) or "data" (random every cycle).
+    """
+
+    def __init__(self, name: str, sources: List[str], inputs: List[Tuple[str, str, Width]], outputs: List[Tuple[str, Width]], sweep: List[Dict[str, int]]):
+        self.name = name
+        self.sources = [SOURCE_DIR / source for source in sources]
+        self.inputs = inputs
+        self.outputs = outputs
+        self.sweep = sweep
+
+
+def _width(width: Width, parameters: Dict[str, int]) -> int:
+    return width(parameters) if callable(width) else width
+
+
+SYNCHRONIZER_PORTS = [("clk", "clock", 1), ("rst", "reset", 1), ("enable", "data", 1), ("in", "data", 1)]
+
+CELLS = {cell.name: cell for cell in [
+    Cell("single_port_type_t_sram", ["sram/single_port_type_t_sram.sv"],
+         [("CLK", "clock", 1), ("CEB", "data", 1), ("WEB", "data", 1), ("A", "data", lambda p: clog2(p["NUM_ROWS"])), ("D", "data", lambda p: p["WIDTH"]), ("M", "data", lambda p: p["WIDTH"])],
+         [("Q", lambda p: p["WIDTH"])],
+         [{"WIDTH": 8, "NUM_ROWS": 128}, {"WIDTH": 32, "NUM_ROWS": 1024}, {"WIDTH": 128, "NUM_ROWS": 4096}]),
+    Cell("double_port_type_t_sram", ["sram/double_port_type_t_sram.sv"],
+         [("CLK", "clock", 1), ("REB", "data", 1), ("WEB", "data", 1), ("AA", "data", lambda p: clog2(p["NUM_ROWS"])), ("AB", "data", lambda p: clog2(p["NUM_ROWS"])), ("D", "data", lambda p: p["WIDTH"]), ("M", "data", lambda p: p["WIDTH"])],
+         [("Q", lambda p: p["WIDTH"])],
+         [{"WIDTH": 8, "NUM_ROWS": 128}, {"WIDTH": 32, "NUM_ROWS": 1024}, {"WIDTH": 128, "NUM_ROWS": 4096}]),
+    Cell("clock_divider", ["clock/clock_divider.v"],
+         [("clk", "clock", 1), ("rst", "reset", 1)],
+         [("clk_div", 1)],
+         [{"NUM_STAGES": 1}, {"NUM_STAGES": 3}, {"NUM_STAGES": 7}]),
+    Cell("double_flop_synchronizer", ["clock_domain_crossing/double_flop_synchronizer.v"], SYNCHRONIZER_PORTS, [("out", 1)], [{"AT_POSEDGE_RST": 1}]),
+    Cell("triple_flop_synchronizer", ["clock_domain_crossing/triple_flop_synchronizer.v"], SYNCHRONIZER_PORTS, [("out", 1)], [{"AT_POSEDGE_RST": 1}]),
+    Cell("triple_flop_toggle_synchronizer", ["clock_domain_crossing/triple_flop_toggle_synchronizer.v"], SYNCHRONIZER_PORTS, [("out", 1)], [{"AT_POSEDGE_RST": 1}]),
+    Cell("wide_double_flop_synchronizer", ["clock_domain_crossing/wide_double_flop_synchronizer.v"],
+         [("clk", "clock", 1), ("rst", "reset", 1), ("enable", "data", 1), ("in", "data", lambda p: p["WIDTH"])],
+         [("out", lambda p: p["WIDTH"])],
+         [{"WIDTH": 8}, {"WIDTH": 64}, {"WIDTH": 256}]),
+    Cell("memory_manager", ["spi_interface/memory_manager.v"],
+         [("program_memory_new", "data", 1), ("read_memory_sync", "data", 1), ("is_code_for_this_memory", "data", 1),
+          ("spi_address", "data", lambda p: p["START_ADDRESS_BIT_WIDTH"]), ("spi_data_in", "data", lambda p: p["MESSAGE_BIT_WIDTH"]), ("memory_data_out", "data", lambda p: p["WORD_BIT_WIDTH"]),
+          ("control_chip_select", "data", 1), ("control_write_enable", "data", 1), ("global_power_down", "data", 1), ("control_address", "data", lambda p: p["ADDRESS_BIT_WIDTH"]),
+          ("control_data_in", "data", lambda p: p["WORD_BIT_WIDTH"]), ("control_mask", "data", lambda p: p["WORD_BIT_WIDTH"])],
+         [("spi_data_out", lambda p: p["MESSAGE_BIT_WIDTH"]), ("chip_select", 1), ("write_enable", 1), ("read_enable", 1), ("program_this_memory_new", 1),
+          ("address", lambda p: p["ADDRESS_BIT_WIDTH"]), ("data_in", lambda p: p["WORD_BIT_WIDTH"]), ("mask", lambda p: p["WORD_BIT_WIDTH"])],
+         [{"WORD_BIT_WIDTH": 64, "ADDRESS_BIT_WIDTH": 9, "START_ADDRESS_BIT_WIDTH": 14, "MESSAGE_BIT_WIDTH": 32},
+          {"WORD_BIT_WIDTH": 128, "ADDRESS_BIT_WIDTH": 12, "START_ADDRESS_BIT_WIDTH": 16, "MESSAGE_BIT_WIDTH": 32},
+          {"WORD_BIT_WIDTH": 512, "ADDRESS_BIT_WIDTH": 12, "START_ADDRESS_BIT_WIDTH": 16, "MESSAGE_BIT_WIDTH": 32}]),
+    Cell("spi_client", ["spi_interface/spi_client.sv"],
+         [("rst_async", "reset", 1), ("SCK", "slow_clock", 1), ("MOSI", "data", 1), ("clk", "clock", 1), ("rst", "reset", 1), ("enable_configuration", "data", 1), ("MISO_data", "data", lambda p: p["MESSAGE_BIT_WIDTH"])],
+         [("MISO", 1), ("code", lambda p: p["CODE_BIT_WIDTH"]), ("current_address", lambda p: p["START_ADDRESS_BIT_WIDTH"]), ("MOSI_data", lambda p: p["MESSAGE_BIT_WIDTH"]),
+          ("config_data_ready", 1), ("current_config_address", lambda p: p["START_ADDRESS_BIT_WIDTH"]), ("config_data", lambda p: p["MESSAGE_BIT_WIDTH"]), ("write_new", 1), ("read_sync", 1)],
+         [{"MESSAGE_BIT_WIDTH": 16, "CODE_BIT_WIDTH": 3, "START_ADDRESS_BIT_WIDTH": 8},
+          {"MESSAGE_BIT_WIDTH": 32, "CODE_BIT_WIDTH": 4, "START_ADDRESS_BIT_WIDTH": 16},
+          {"MESSAGE_BIT_WIDTH": 64, "CODE_BIT_WIDTH": 4, "START_ADDRESS_BIT_WIDTH": 32}]),
+    Cell("high_speed_in_bus", ["aer/high_speed_in_bus.v"],
+         [("clk", "clock", 1), ("rst", "reset", 1), ("data_required", "data", 1), ("request", "data", 1)],
+         [("data_available", 1), ("acknowledge", 1)],
+         [{}]),
+    Cell("high_speed_out_bus", ["aer/high_speed_out_bus.v"],
+         [("clk", "clock", 1), ("rst", "reset", 1), ("in_idle", "data", 1), ("sending", "data", 1), ("will_stop_sending", "data", 1), ("data_ready_for_sending", "data", 1),
+          ("num_sends", "data", lambda p: p["SENT_COUNTER_BIT_WIDTH"]), ("in", "data", lambda p: p["HIGH_SPEED_OUT_PINS"]), ("acknowledge", "data", 1)],
+         [("request", 1), ("out", lambda p: p["HIGH_SPEED_OUT_PINS"]), ("sent_counter", lambda p: p["SENT_COUNTER_BIT_WIDTH"]), ("done_sending", 1)],
+         [{"HIGH_SPEED_OUT_PINS": 8, "SENT_COUNTER_BIT_WIDTH": 4}, {"HIGH_SPEED_OUT_PINS": 32, "SENT_COUNTER_BIT_WIDTH": 8}]),
+]}
+
+MAIN_CPP = r"""
+#include <chrono>
+#include <cinttypes>
+#include <cstdio>
+#include <cstdlib>
+
+#include "Vbench_top.h"
+#include "verilated.h"
+
+#if VM_TRACE
+#include "verilated_vcd_c.h"
+#endif
+
+int main(int argc, char** argv) {
+    const uint64_t cycles = argc > 1 ? std::strtoull(argv[1], nullptr, 10) : 100000;
+
+    VerilatedContext* context = new VerilatedContext;
+    Vbench_top* top = new Vbench_top{context};
+
+#if VM_TRACE
+    context->traceEverOn(true);
+    VerilatedVcdC* trace = new VerilatedVcdC;
+    top->trace(trace, 99);
+    trace->open("dump.vcd");
+#endif
+
+    uint64_t time = 0;
+    const auto start = std::chrono::steady_clock::now();
+
+    for (uint64_t cycle = 0; cycle < cycles; cycle++) {
+        top->clk = 0;
+        top->eval();
+#if VM_TRACE
+        trace->dump(time);
+#endif
+        time++;
+
+        top->clk = 1;
+        top->eval();
+#if VM_TRACE
+        trace->dump(time);
+#endif
+        time++;
+    }
+
+#if VM_TRACE
+    trace->close();
+#endif
+#if VM_COVERAGE
+    context->coveragep()->write("coverage.dat");
+#endif
+
+    const double seconds = std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+
+    std::printf("{\"cycles\": %" PRIu64 ", \"seconds\": %.9f, \"checksum\": %" PRIu64 "}\n", cycles, seconds, (uint64_t)top->checksum);
+
+    top->final();
+    delete top;
+    delete context;
+
+    return 0;
+}
+"""
+
+
+def create_wrapper(cell: Cell, parameters: Dict[str, int]) -> str:
+    """Generate the benchmark toplevel (`bench_top`) of a cell."""
+
+    data_inputs = [(name, _width(width, parameters)) for name, kind, width in cell.inputs if kind == "data"]
+    outputs = [(name, _width(width, parameters)) for name, width in cell.outputs]
+
+    num_stimulus_words = max(1, -(-sum(width for _, width in data_inputs) // 64))
+    num_observed_bits = sum(width for _, width in outputs)
+
+    lines = [
+        "module bench_top (",
+        "    input clk,",
+        "    output reg [63:0] checksum",
+        ");",
+        "    reg [63:0] state = 64'h9E3779B97F4A7C15;",
+        "    reg [3:0] reset_counter = 0;",
+        "    reg slow_clock = 0;",
+        "",
+        "    wire reset = reset_counter != 4'hF;",
+        f"    wire [{num_stimulus_words * 64}-1:0] stimulus = {{{num_stimulus_words}{{state}}}};",
+        "",
+        "    // xorshift64",
+        "    wire [63:0] shifted_13 = state ^ (state << 13);",
+        "    wire [63:0] shifted_7 = shifted_13 ^ (shifted_13 >> 7);",
+        "",
+        "    always @(posedge clk) begin",
+        "        state <= shifted_7 ^ (shifted_7 << 17);",
+        "        if (reset) reset_counter <= reset_counter + 1;",
+        "        slow_clock <= ~slow_clock;",
+        "    end",
+        "",
+    ]
+
+    connections = []
+    offset = 0
+
+    for name, kind, width in cell.inputs:
+        if kind == "clock":
+            connections.append(f".{name}(clk)")
+        elif kind == "slow_clock":
+            connections.append(f".{name}(slow_clock)")
+        elif kind == "reset":
+            connections.append(f".{name}(reset)")
+        else:
+            width = _width(width, parameters)
+            connections.append(f".{name}(stimulus[{offset + width - 1}:{offset}])")
+            offset += width
+
+    for name, width in outputs:
+        lines.append(f"    wire [{width}-1:0] out_{name};")
+        connections.append(f".{name}(out_{name})")
+
+    parameter_list = ", ".join(f".{name}({value})" for name, value in parameters.items())
+
+    lines.append("")
+    lines.append(f"    {cell.name} {'#(' + parameter_list + ') ' if parameter_list else ''}dut (")
+    lines.append(",\n".join(f"        {connection}" for connection in connections))
+    lines.append("    );")
+    lines.append("")
+
+    # Fold all outputs into 64 bits, such that every output bit affects the checksum
+    padded_bits = -(-num_observed_bits // 64) * 64
+    observed = ", ".join(f"out_{name}" for name, _ in outputs)
+
+    lines.append(f"    wire [{padded_bits}-1:0] observed = {{{padded_bits - num_observed_bits}'b0, {observed}}};" if padded_bits > num_observed_bits else f"    wire [{padded_bits}-1:0] observed = {{{observed}}};")
+    lines.append(f"    wire [63:0] folded = {' ^ '.join(f'observed[{i * 64} +: 64]' for i in range(padded_bits // 64))};")
+    lines.append("")
+    lines.append("    always @(posedge clk) checksum <= {checksum[62:0], checksum[63]} ^ folded;")
+    lines.append("endmodule")
+
+    return "\n".join(lines) + "\n"
+
+
+def build(cell: Cell, parameters: Dict[str, int], config: str, verilator_args: List[str]) -> Tuple[Path, float]:
+    """Build the benchmark executable of a cell, or reuse it if nothing changed.
+
+    Returns:
+        Tuple[Path, float]: Path to the executable and the build time in seconds (zero if it was reused)
+    """
+
+    wrapper = create_wrapper(cell, parameters)
+    arguments = ["-O3", "--x-assign", "fast", "--x-initial", "fast", "-Wno-fatal", "-Wno-lint", "-Wno-style", *CONFIGS[config], *verilator_args]
+
+    hash_ = hashlib.sha256(json.dumps([wrapper, MAIN_CPP, arguments]).encode())
+
+    for source in sorted(SOURCE_DIR.rglob("*.*v")):
+        hash_.update(source.read_bytes())
+
+    build_dir = BUILD_DIR / cell.name / hash_.hexdigest()[:16]
+    executable = build_dir / "obj_dir" / "bench"
+
+    if executable.exists():
+        return executable, 0.0
+
+    shutil.rmtree(build_dir, ignore_errors=True)
+    build_dir.mkdir(parents=True)
+
+    (build_dir / "bench_top.sv").write_text(wrapper)
+    (build_dir / "main.cpp").write_text(MAIN_CPP)
+
+    # Submodules (for example the synchronizers in the AER buses) are found via the search paths
+    search_paths = [argument for directory in sorted({str(source.parent.resolve()) for source in SOURCE_DIR.rglob("*.*v")}) for argument in ("-y", directory)]
+
+    start = time.perf_counter()
+    process = subprocess.run(["verilator", "--cc", "--exe", "--build", "--top-module", "bench_top", "-o", "bench", "--Mdir", str(build_dir / "obj_dir"), *arguments, *search_paths,
+                              str(build_dir / "bench_top.sv"), *map(str, cell.sources), str(build_dir / "main.cpp")], capture_output=True, text=True, cwd=build_dir)
+
+    if process.returncode != 0:
+        raise RuntimeError(f"Building the benchmark of {cell.name} failed:\n{process.stdout[-2000:]}{process.stderr[-2000:]}")
+
+    return executable, time.perf_counter() - start
+
+
+def run(executable: Path, cycles: int) -> Dict:
+    with tempfile.TemporaryDirectory() as run_dir:
+        start = time.perf_counter()
+        output = subprocess.run([str(executable), str(cycles)], check=True, capture_output=True, text=True, cwd=run_dir).stdout
+        wall_time = time.perf_counter() - start
+
+        result = json.loads(output.strip().splitlines()[-1])
+        result["wall_time"] = wall_time
+
+        trace_path = Path(run_dir) / "dump.vcd"
+        result["trace_bytes"] = trace_path.stat().st_size if trace_path.exists() else 0
+
+    return result
+
+
+def benchmark_key(result: Dict) -> str:
+    return f"{result['cell']}[{','.join(f'{k}={v}' for k, v in result['parameters'].items())}]/{result['config']}"
+
+
+def compare(results: List[Dict], baseline: Dict) -> List[str]:
+    """Compare results against the thresholds of a baseline file.
+
+    Returns:
+        List[str]: Description of every benchmark that is slower than its threshold
+    """
+
+    thresholds = {benchmark_key(result): result["min_cycles_per_second"] for result in baseline["results"]}
+
+    return [f"{benchmark_key(result)}: {result['cycles_per_second']:.0f} cycles/s < {thresholds[benchmark_key(result)]:.0f} cycles/s"
+            for result in results if benchmark_key(result) in thresholds and result["cycles_per_second"] < thresholds[benchmark_key(result)]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+
+    parser.add_argument("--cells", nargs="+", choices=sorted(CELLS), default=sorted(CELLS), help="Cells to benchmark (default: all)")
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS), default=["plain", "trace_coverage"], help="Verilator configurations (default: plain and trace_coverage)")
+    parser.add_argument("--cycles", type=int, default=200000, help="Number of simulated clock cycles per benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per benchmark, the fastest run is reported")
+    parser.add_argument("--verilator-args", default="", help="Extra arguments for Verilator")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Fail if a benchmark is slower than the threshold in this baseline file")
+    parser.add_argument("--update-baseline", help="Write the results, with thresholds, to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown relative to the measured throughput when updating the baseline")
+
+    args = parser.parse_args()
+
+    if shutil.which("verilator") is None:
+        sys.exit("Verilator was not found")
+
+    results = []
+
+    print(f"{'cell':<32} {'parameters':<70} {'config':<15} {'build (s)':>9} {'cycles/s':>12} {'trace (MB)':>10}")
+
+    for name, config in itertools.product(args.cells, args.configs):
+        cell = CELLS[name]
+
+        for parameters in cell.sweep:
+            executable, build_time = build(cell, parameters, config, shlex.split(args.verilator_args))
+            runs = [run(executable, args.cycles) for _ in range(args.repeat)]
+            fastest = min(runs, key=lambda r: r["seconds"])
+
+            result = {
+                "cell": name,
+                "parameters": parameters,
+                "config": config,
+                "cycles": args.cycles,
+                "seconds": fastest["seconds"],
+                "wall_time": fastest["wall_time"],
+                "cycles_per_second": args.cycles / fastest["seconds"],
+                "build_time": build_time,
+                "trace_bytes": fastest["trace_bytes"],
+            }
+
+            results.append(result)
+
+            parameter_string = ", ".join(f"{k}={v}" for k, v in parameters.items())
+            print(f"{name:<32} {parameter_string:<70} {config:<15} {build_time:9.1f} {result['cycles_per_second']:12.0f} {result['trace_bytes'] / 1e6:10.1f}", flush=True)
+
+    document = {"verilator": subprocess.run(["verilator", "--version"], capture_output=True, text=True).stdout.strip(), "machine": os.uname().machine, "results": results}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(document, f, indent=4)
+
+    if args.update_baseline:
+        for result in results:
+            result["min_cycles_per_second"] = result["cycles_per_second"] * (1 - args.tolerance)
+
+        with open(args.update_baseline, "w") as f:
+            json.dump(document, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f))
+
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
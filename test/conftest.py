@@ -0,0 +1,28 @@
+import pytest
+
+from asic_cells.spi import SpiMessageCreator
+
+CONFIG_SIZES_AND_NAMES = [
+    [1, "enable", True],
+    [8, "threshold", True],
+    [[16, 4], "weights", False],
+    [[8, [6, 2]], "offsets", False],
+    [12, "leak", True],
+]
+
+POINTER_SIZES_AND_NAMES = [
+    [8, "state"],
+    [16, "counter"],
+    ["MESSAGE_BIT_WIDTH", "status"],
+    [4, "errors"],
+]
+
+MEMORY_SIZES_AND_NAMES = {
+    "neurons": {"num_rows": 64, "bit_width": 128},
+    "synapses": {"num_rows": 4096, "bit_width": 32},
+}
+
+
+@pytest.fixture
+def spi_message_creator():
+    return SpiMessageCreator(32, 4, 16, CONFIG_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES)
@@ -0,0 +1,179 @@
+"""Shared cocotb/Verilator harness with a build cache.
+
+Compiled Verilator models are cached in `SIM_BUILD_DIR`, in a directory per model that is keyed by a hash of the source
+files, the toplevel, the parameters, the compile arguments and the Verilator and cocotb versions. A model is therefore
+only compiled once, no matter how often (or from how many processes) it is simulated. Simulations run in a directory
+per testcase and seed inside the build directory, which is emptied before every run: the results, traces and coverage
+files of the last run are kept for inspection, but repeated runs do not pile up, and runs with different testcases or
+seeds do not clash.
+
+`build_all` compiles the models of a parameter sweep concurrently, which is where almost all of the time goes; the
+simulations themselves then only start the cached executable. Running the tests with pytest-xdist (`pytest -n auto`)
+is safe as well: builds of the same model are serialized with a file lock.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import fcntl
+import functools
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+
+import cocotb
+
+from cocotb_test.simulator import Verilator
+
+SIM_BUILD_DIR = Path(os.environ.get("SIM_BUILD_DIR", Path(__file__).resolve().parent / "sim_build"))
+SOURCE_DIR = Path(__file__).resolve().parent / ".." / "src"
+
+HARNESS_VERSION = 1
+
+
+@functools.lru_cache(maxsize=None)
+def verilator_version() -> str:
+    return subprocess.run(["verilator", "--version"], capture_output=True, text=True, check=True).stdout.strip()
+
+
+class CachedVerilator(Verilator):
+    """Verilator simulator of cocotb-test that skips compilation if the model is already built."""
+
+    def __init__(self, *args, cached: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.cached = cached
+
+        # Verilator 5 needs at least C++14, so leave the choice of the standard to Verilator's own makefiles
+        self.env["CXXFLAGS"] = self.env.get("CXXFLAGS", "").replace(" -std=c++11", "")
+
+    def build_command(self):
+        commands = super().build_command()
+
+        # The last command starts the simulation, the ones before build the model
+        return commands[-1:] if self.cached else commands
+
+
+def build_key(toplevel: str, verilog_sources: List[str], parameters: Dict[str, str], compile_args: List[str]) -> str:
+    """Hash of everything that determines a compiled model."""
+
+    hash_ = hashlib.sha256()
+    hash_.update(json.dumps([HARNESS_VERSION, verilator_version(), cocotb.__version__, toplevel, sorted((k, str(v)) for k, v in parameters.items()), compile_args]).encode())
+
+    for source in verilog_sources:
+        hash_.update(Path(source).read_bytes())
+
+    return hash_.hexdigest()
+
+
+class Simulation:
+    """A cocotb test module that runs on a (cached) Verilator model of a toplevel."""
+
+    def __init__(self, toplevel: str, verilog_sources: List[str], module: str, parameters: Optional[Dict[str, str]] = None, compile_args: Iterable[str] = (), extra_args: Iterable[str] = ()):
+        """Create a simulation.
+
+        Args:
+            toplevel (str): Name of the toplevel module
+            verilog_sources (List[str]): Paths to the source files
+            module (str): Python module with the cocotb tests
+            parameters (Optional[Dict[str, str]], optional): Verilog parameters of the toplevel. Defaults to None.
+            compile_args (Iterable[str], optional): Extra arguments for Verilator. Defaults to ().
+            extra_args (Iterable[str], optional): Extra arguments for both Verilator and the simulation, for example "--trace". Defaults to ().
+        """
+
+        self.toplevel = toplevel
+        self.verilog_sources = [str(Path(source).resolve()) for source in verilog_sources]
+        self.module = module
+        self.parameters = dict(parameters or {})
+        self.compile_args = list(compile_args)
+        self.extra_args = list(extra_args)
+
+        self.key = build_key(toplevel, self.verilog_sources, self.parameters, self.compile_args + self.extra_args)
+        self.build_dir = SIM_BUILD_DIR / toplevel / self.key[:16]
+
+    def _simulator(self, **kwargs):
+        return CachedVerilator(
+            toplevel=self.toplevel,
+            module=self.module,
+            verilog_sources=self.verilog_sources,
+            parameters=self.parameters,
+            compile_args=self.compile_args,
+            extra_args=self.extra_args,
+            sim_build=str(self.build_dir),
+            python_search=[str(Path(__file__).resolve().parent)],
+            **kwargs,
+        )
+
+    @property
+    def is_built(self) -> bool:
+        try:
+            return (self.build_dir / ".build_key").read_text() == self.key
+        except OSError:
+            return False
+
+    def build(self):
+        """Compile the model, unless it is cached already."""
+
+        if self.is_built:
+            return
+
+        self.build_dir.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.build_dir.parent / f"{self.build_dir.name}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            # Another process may have built the model while we were waiting for the lock
+            if self.is_built:
+                return
+
+            shutil.rmtree(self.build_dir, ignore_errors=True)
+
+            self._simulator(compile_only=True).run()
+
+            (self.build_dir / ".build_key").write_text(self.key)
+
+    def run(self, testcase: Optional[str] = None, seed: Optional[int] = None, extra_env: Optional[Dict[str, str]] = None) -> str:
+        """Build the model if needed and run the cocotb tests on it.
+
+        Returns:
+            str: Path to the results file
+        """
+
+        self.build()
+
+        work_dir = self.build_dir / f"run_{testcase or 'all'}_{seed if seed is not None else 'random'}"
+
+        # Concurrent runs of the same testcase and seed share the directory, so they take turns
+        with open(f"{work_dir}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            shutil.rmtree(work_dir, ignore_errors=True)
+            work_dir.mkdir()
+
+            return self._simulator(cached=True, work_dir=str(work_dir), testcase=testcase, seed=seed, extra_env=extra_env).run()
+
+
+def build_all(simulations: Iterable[Simulation], jobs: Optional[int] = None):
+    """Compile the models of several simulations concurrently.
+
+    Args:
+        simulations (Iterable[Simulation]): Simulations to build; models that are cached already are skipped
+        jobs (Optional[int], optional): Number of models that are built at the same time. Defaults to the number of CPUs.
+    """
+
+    simulations = [simulation for simulation in simulations if not simulation.is_built]
+
+    # Builds run in subprocesses, so threads are enough to keep all cores busy
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+        for future in [executor.submit(simulation.build) for simulation in simulations]:
+            future.result()
+
+
+def cell_sources(*paths: str) -> List[str]:
+    """Paths of RTL files relative to `src`, for example `cell_sources("sram/single_port_type_t_sram.sv")`."""
+
+    return [str((SOURCE_DIR / path).resolve()) for path in paths]
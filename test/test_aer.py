@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from asic_cells.aer import HANDSHAKE_CASES, AerCodec, HandshakeModel, words_from_trace
+
+
+@pytest.mark.parametrize("word_order", ["msb", "lsb"])
+def test_codec_round_trip(word_order):
+    rng = np.random.default_rng(0)
+    codec = AerCodec(pins=8, num_sends=3, fields=[("neuron", 16), ("timestamp", 8)], word_order=word_order)
+
+    fields = {"neuron": rng.integers(0, 2**16, 100), "timestamp": rng.integers(0, 2**8, 100)}
+    words = codec.pack(fields)
+
+    assert words.size == 300 and words.max() < 256
+    assert codec.pack([0x123456]).tolist() == ([0x12, 0x34, 0x56] if word_order == "msb" else [0x56, 0x34, 0x12])
+
+    decoded = codec.unpack(words, "fields")
+    assert all(np.array_equal(decoded[name], fields[name]) for name in fields)
+
+    with pytest.raises(ValueError):
+        codec.unpack(words[:-1])
+
+    with pytest.raises(ValueError):
+        codec.pack([2**24])
+
+
+def test_words_from_trace():
+    codec = AerCodec(pins=4, num_sends=2)
+    words = codec.pack([0xAB, 0x3C])
+
+    # Request high for two samples per word with the data held, acknowledge one sample later
+    request = np.array([0, 1, 1, 0, 0] * 4)
+    acknowledge = np.roll(request, 1)
+    data = np.repeat(words, 5)
+    bits = (data[:, None] >> np.arange(3, -1, -1, dtype=np.uint64)) & np.uint64(1)
+
+    assert np.array_equal(words_from_trace(request, data), words)
+    assert np.array_equal(codec.unpack(words_from_trace(request, bits, acknowledge)), [0xAB, 0x3C])
+
+
+@pytest.mark.parametrize("out_frequency, in_frequency", [(100e6, 100e6), (100e6, 37e6), (20e6, 150e6)])
+def test_handshake_model(out_frequency, in_frequency):
+    model = HandshakeModel(out_frequency, in_frequency)
+    best, mean, worst = (model.word_time(case) for case in HANDSHAKE_CASES)
+
+    # Four crossings of two synchronizer flops plus a register
+    assert mean == pytest.approx(5 / out_frequency + 5 / in_frequency)
+
+    simulated = model.simulate(200, np.random.default_rng(1))
+    assert best <= simulated <= worst
+
+    assert model.events_per_second(3) == pytest.approx(1 / (3 * mean))
+    assert model.events_per_second(3, gap_cycles=4) < model.events_per_second(3)
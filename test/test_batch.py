@@ -0,0 +1,71 @@
+import numpy as np
+
+from asic_cells.batch import TransactionBatch
+
+
+def test_batch_merges_and_reorders(spi_message_creator):
+    creator = spi_message_creator
+    batch = TransactionBatch(creator)
+
+    batch.write_config({"enable": 1})
+    batch.write_config({"threshold": 2, "weights": [3, 4]})
+    batch.read_memory("synapses", 0, 4)
+    batch.write_memory("neurons", [1, 2, 3], 10)
+    batch.read_pointers(["counter"])
+    batch.write_memory("neurons", [4, 5], 13)
+    batch.write_memory("neurons", [6], 11)
+    batch.read_pointers(["state"])
+    batch.read_memory("synapses", 4, 4)
+
+    result = batch.build()
+
+    expected = np.concatenate([
+        [creator._create_instruction_word(False, 0, 0, 4), 1, 2, 3, 4],
+        creator.create_write_memory_array("neurons", [1, 6, 3, 4, 5], 10),
+        creator.create_pointer_burst_words(["state", "counter"]),
+        creator.create_read_memory_array("synapses", 0, 8),
+    ])
+
+    assert result.words.tolist() == expected.tolist()
+    assert result.num_headers == 4
+    assert result.num_words == 5 + 6 + 3 + 9
+    assert result.unbatched_num_words == 5 + 4 + 2 + 2 + 3 + 3 + 2 + 2 + 2 + 5
+    assert result.bus_time(1e6) == result.num_words * 32 / 1e6
+
+
+def test_batch_respects_read_after_write(spi_message_creator):
+    creator = spi_message_creator
+    batch = TransactionBatch(creator)
+
+    batch.write_memory("synapses", [1, 2], 0)
+    batch.read_memory("synapses", 1, 1)
+    batch.write_memory("synapses", [3], 1)
+    batch.read_memory("synapses", 0, 2)
+
+    assert batch.build().words.tolist() == np.concatenate([
+        creator.create_write_memory_array("synapses", [1, 2], 0),
+        creator.create_read_memory_array("synapses", 1, 1),
+        creator.create_write_memory_array("synapses", [3], 1),
+        creator.create_read_memory_array("synapses", 0, 2),
+    ]).tolist()
+
+
+def test_batch_orders_config_writes(spi_message_creator):
+    creator = spi_message_creator
+    batch = TransactionBatch(creator)
+
+    # Memories are loaded before the chip is enabled
+    batch.write_memory("neurons", [1, 2], 0)
+    batch.write_config({"enable": 1})
+
+    # The pointer read sees the intermediate value of the register
+    batch.write_config({"leak": 1})
+    batch.read_pointers(["state"])
+    batch.write_config({"leak": 0})
+
+    assert batch.build().words.tolist() == np.concatenate([
+        creator.create_write_memory_array("neurons", [1, 2], 0),
+        creator.create_config_words({"enable": 1, "leak": 1}),
+        creator.create_pointer_burst_words(["state"]),
+        creator.create_config_words({"leak": 0}),
+    ]).tolist()
@@ -1,27 +1,33 @@
-from pathlib import Path
-
 import pytest
 
-from cocotb_test.simulator import run
+from harness import Simulation, build_all, cell_sources
 
+PARAMETERS = [{"NUM_STAGES": "1"}, {"NUM_STAGES": "2"}, {"NUM_STAGES": "3"}, {"NUM_STAGES": "7"}]
 
-@pytest.mark.parametrize("parameters", [{"NUM_STAGES": "1"}, {"NUM_STAGES": "2"}, {"NUM_STAGES": "3"}, {"NUM_STAGES": "7"}])
-def test_clock_divider(parameters):
-    module_name = "clock_divider"
 
-    file_dir = Path(__file__).resolve().parent
-    source_dir = str(file_dir / ".." / "src" / "clock")
+def create_simulation(parameters):
+    module_name = "clock_divider"
 
-    run(
-        simulator="verilator",
-        verilog_sources=[f"{source_dir}/{module_name}.v"],
+    return Simulation(
         toplevel=module_name,
+        verilog_sources=cell_sources(f"clock/{module_name}.v"),
         module=f"tests.{module_name}_tests",
         parameters=parameters,
-        compile_args=[f"+incdir+{source_dir}"],
+        compile_args=[f"+incdir+{cell_sources('clock')[0]}"],
         extra_args=["--trace", "--coverage"],
     )
 
 
+@pytest.fixture(scope="module", autouse=True)
+def build_models():
+    # Compile all parametrizations concurrently, the tests below then only run the cached models
+    build_all(create_simulation(parameters) for parameters in PARAMETERS)
+
+
+@pytest.mark.parametrize("parameters", PARAMETERS)
+def test_clock_divider(parameters):
+    create_simulation(parameters).run()
+
+
 if __name__ == "__main__":
     test_clock_divider({"NUM_STAGES": "2"})
@@ -0,0 +1,70 @@
+import json
+
+from asic_cells.codegen import generate_config_memory, generate_config_memory_file, generate_pointers_file
+from asic_cells.codegen.cli import main
+from asic_cells.register_map import RegisterMap
+
+from conftest import CONFIG_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES
+
+
+def test_unchanged_layout_is_not_rewritten(tmp_path):
+    output_path = tmp_path / "config_memory.sv"
+
+    assert generate_config_memory_file(CONFIG_SIZES_AND_NAMES, output_path)
+    assert output_path.read_text() == generate_config_memory(CONFIG_SIZES_AND_NAMES)
+
+    mtime = output_path.stat().st_mtime_ns
+
+    assert not generate_config_memory_file(CONFIG_SIZES_AND_NAMES, output_path)
+    assert not generate_config_memory_file(CONFIG_SIZES_AND_NAMES, output_path, force=True)
+    assert output_path.stat().st_mtime_ns == mtime
+
+    # A changed layout and a modified output file are both regenerated
+    assert generate_config_memory_file(CONFIG_SIZES_AND_NAMES[:-1], output_path)
+    output_path.write_text("modified")
+    assert generate_config_memory_file(CONFIG_SIZES_AND_NAMES[:-1], output_path)
+    assert output_path.read_text() == generate_config_memory(CONFIG_SIZES_AND_NAMES[:-1])
+
+
+def test_pointers_file(tmp_path):
+    output_path = tmp_path / "pointers.v"
+
+    assert generate_pointers_file(POINTER_SIZES_AND_NAMES, output_path)
+    assert not generate_pointers_file(POINTER_SIZES_AND_NAMES, output_path)
+    assert generate_pointers_file(POINTER_SIZES_AND_NAMES[:2], output_path)
+
+
+def test_cli_generates_all_layouts(tmp_path, capsys):
+    for i in range(3):
+        (tmp_path / "chips" / f"chip_{i}").mkdir(parents=True)
+
+        with open(tmp_path / "chips" / f"chip_{i}" / f"chip_{i}.json", "w") as f:
+            json.dump({"config_sizes_and_names": CONFIG_SIZES_AND_NAMES[i:], "pointer_sizes_and_names": POINTER_SIZES_AND_NAMES, "memory_sizes_and_names": MEMORY_SIZES_AND_NAMES}, f)
+
+    arguments = [str(tmp_path / "chips" / "**" / "*.json"), "--message-bit-width", "32", "--code-bit-width", "4", "--address-bit-width", "16", "-j", "2"]
+
+    assert main(arguments) == 0
+    assert "3 layouts, 9/9 files written" in capsys.readouterr().out
+
+    register_map = RegisterMap.load(tmp_path / "chips" / "chip_1" / "chip_1_register_map.json")
+    assert register_map.registers["threshold"].address == 0
+    assert (tmp_path / "chips" / "chip_2" / "chip_2.v").exists()
+
+    # Generated register maps are not picked up as layouts, and nothing changed
+    assert main(arguments) == 0
+    assert "3 layouts, 0/9 files written" in capsys.readouterr().out
+
+
+def test_ranged_config_memory_does_not_grow_with_array_size():
+    def layout(array_size):
+        return [[8, "threshold", True], [[16, array_size], "weights", True], [[12, [array_size + 4, 4]], "offsets", False]]
+
+    unrolled = generate_config_memory(layout(1024))
+    ranged = generate_config_memory(layout(1024), "ranged")
+
+    assert unrolled.count("\n") > 2048
+    assert ranged.count("\n") == generate_config_memory(layout(4), "ranged").count("\n")
+
+    assert "weights[reset_index] <= 0;" in ranged
+    assert "if (current_config_address >= 1 && current_config_address < 1025)" in ranged
+    assert "offsets[current_config_address - 1021] <= config_spi_data_in[12-1:0];" in ranged
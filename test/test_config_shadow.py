@@ -0,0 +1,32 @@
+from asic_cells.config_shadow import ConfigShadow
+
+
+def test_config_shadow_only_sends_changes(spi_message_creator):
+    shadow = ConfigShadow(spi_message_creator)
+
+    config = {"enable": 1, "threshold": 7, "weights": [1, 2, 3, 4], "leak": 3}
+
+    # Addresses 0 up to and including 5 are adjacent across the first three entries, so they form a single burst
+    words = shadow.create_config_words(config)
+
+    assert words == [spi_message_creator._create_instruction_word(False, 0, 0, 6), 1, 7, 1, 2, 3, 4] + spi_message_creator.create_config_words({"leak": 3})
+    assert shadow.last_words_saved == 2
+
+    assert shadow.create_config_words(config) == []
+    assert shadow.last_words_saved == 11
+
+    words = shadow.create_config_words({"threshold": 8, "weights": [9, 2, 3, 5], "offsets": [0]})
+
+    assert words == [spi_message_creator._create_instruction_word(False, 0, 1, 2), 8, 9, spi_message_creator._create_instruction_word(False, 0, 5, 2), 5, 0]
+    assert shadow.words_saved == 2 + 11 + 3
+
+    shadow.invalidate()
+
+    assert len(shadow.create_config_words({"leak": 3})) == 2
+
+
+def test_config_shadow_after_reset(spi_message_creator):
+    shadow = ConfigShadow(spi_message_creator, assume_reset=True)
+
+    assert shadow.create_config_words({"enable": 0, "threshold": 0, "leak": 0}) == []
+    assert shadow.create_config_words({"weights": [0]}) == [spi_message_creator._create_instruction_word(False, 0, 2, 1), 0]
@@ -0,0 +1,48 @@
+import numpy as np
+
+from asic_cells.decoder import SpiResponseDecoder
+
+
+def test_decode_pointers_and_memories(spi_message_creator):
+    creator = spi_message_creator
+    decoder = SpiResponseDecoder(creator)
+
+    rows = np.random.default_rng(1).integers(0, 2**64, size=(64, 2), dtype=np.uint64)
+    memory_words = creator.rows_to_words("neurons", rows)
+
+    sent = np.concatenate([
+        [creator.create_pointer_word("counter"), 0],
+        creator.create_write_memory_array("synapses", [1, 2, 3]),
+        creator.create_read_memory_array("neurons", 0, 256),
+        [creator.create_pointer_word("errors"), 0],
+    ])
+
+    # Model the chip: the words following a read header carry the requested data
+    received = np.full(sent.size, 0xFFFFFFFF, dtype=np.uint64)
+    received[1] = 0xABCD1234
+    received[7:7+256] = memory_words
+    received[-1] = 0xFFFFFFF3
+
+    decoded = decoder.decode(creator.pack(sent), creator.pack(received))
+
+    assert decoded.pointers == {"counter": 0x1234, "errors": 0x3}
+    assert np.array_equal(decoded.memory("neurons"), memory_words)
+    assert np.array_equal(decoded.memory("neurons", output="limbs"), rows)
+    assert [result.key for result in decoded.results] == [None, "neurons", None]
+
+
+def test_pointer_burst_reads(spi_message_creator):
+    creator = spi_message_creator
+
+    assert creator.plan_pointer_reads(["errors", "state", "counter"]) == [(0, 4)]
+    assert creator.plan_pointer_reads(["errors", "state", "counter"], header_cost=0) == [(0, 2), (3, 1)]
+    assert creator.plan_pointer_reads(["errors", "state"], header_cost=2) == [(0, 4)]
+    assert creator.plan_pointer_reads(["errors", "state"]) == [(0, 1), (3, 1)]
+
+    sent = creator.create_pointer_burst_words(["errors", "status", "state", "counter"])
+
+    assert sent.tolist() == [creator._create_instruction_word(True, 0, 0, 4), 0, 0, 0, 0]
+
+    received = np.array([0, 0x1FF, 0x12345, 0xDEADBEEF, 0xFF], dtype=np.uint64)
+
+    assert SpiResponseDecoder(creator).decode(sent, received).pointers == {"state": 0xFF, "counter": 0x2345, "status": 0xDEADBEEF, "errors": 0xF}
@@ -0,0 +1,80 @@
+import numpy as np
+
+from asic_cells.batch import TransactionBatch
+from asic_cells.config_shadow import ConfigShadow
+from asic_cells.model import SpiChipModel
+from asic_cells.snapshot import ChipSnapshot, create_restore_words
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.traffic import RandomTrafficGenerator
+
+
+def test_instrumentation_counts(spi_message_creator):
+    calls = []
+    stats = spi_message_creator.enable_instrumentation(calls.append)
+
+    assert spi_message_creator.stats is stats
+
+    spi_message_creator.create_config_messages({"weights": [1, 2, 3, 4], "leak": 5})
+    spi_message_creator.create_write_memory_array("synapses", np.arange(4096))
+    spi_message_creator.create_read_memory_word("neurons", 0, 8)
+    spi_message_creator.pack([1, 2, 3])
+    bursts = list(spi_message_creator.iter_write_memory_messages("neurons", range(16), max_burst_length=10))
+
+    # Nested calls (create_config_messages -> create_config_words) are only counted once
+    assert [call.method for call in calls] == ["create_config_messages", "create_write_memory_array", "create_read_memory_word", "pack", "iter_write_memory_messages", "iter_write_memory_messages"]
+    assert stats.num_calls["iter_write_memory_messages"] == len(bursts) == 2
+
+    # 2 config headers, 3 synapse bursts of at most 2047 words, 1 read header and 2 neuron bursts
+    assert stats.num_headers == 2 + 3 + 1 + 2
+    assert stats.num_data_words == 5 + 4096 + 8 + 16
+    # Two splits of the synapses at 2047 words and one of the neurons at the maximum burst length of the iterator
+    assert stats.num_chunk_splits == 3
+    assert stats.bytes_per_code == {0: 7 * 4, 2: (3 + 4096) * 4, 1: (1 + 8 + 2 + 16) * 4}
+
+    snapshot = stats.snapshot()
+    assert snapshot["num_headers"] == 8 and snapshot["header_overhead"] == 8 / (8 + 4125)
+    assert all(seconds >= 0 for seconds in snapshot["seconds"].values())
+
+    stats.reset()
+    assert stats.num_headers == 0 and stats.num_calls == {}
+
+
+def test_instrumentation_counts_helpers(spi_message_creator):
+    creator = spi_message_creator
+    stats = creator.enable_instrumentation()
+
+    words = ConfigShadow(creator).create_config_words({"leak": 3})
+
+    batch = TransactionBatch(creator)
+    batch.write_memory("synapses", np.arange(3000))
+    batch_words = batch.build().words
+
+    snapshot = ChipSnapshot.capture(creator, SpiChipModel(creator).transfer)
+    restore_words = create_restore_words(creator, snapshot)
+    traffic = RandomTrafficGenerator(creator, seed=0).generate(100)
+
+    assert stats.num_calls["ConfigShadow.create_config_words"] == 1
+    assert stats.num_calls["TransactionBatch.build"] == 1
+    assert stats.num_calls["create_restore_words"] == 1
+    assert stats.num_calls["RandomTrafficGenerator.generate"] == 1
+
+    # The capture reads the four pointers in one burst and the memories in bursts of at most 2047 words, which the
+    # cold restore writes back
+    memory_words = sum(memory.max_address + -(-memory.max_address // 2047) for memory in creator.register_map.memories.values())
+
+    assert restore_words.size == memory_words
+    assert stats.num_headers + stats.num_data_words == len(words) + batch_words.size + (1 + 4 + memory_words) + restore_words.size + traffic.num_words
+    assert stats.num_headers == 1 + 2 + (1 + 1 + 3) + (1 + 3) + traffic.num_operations
+
+
+def test_disabled_instrumentation_uses_plain_methods(spi_message_creator):
+    words = spi_message_creator.create_write_memory_words("neurons", [1, 2, 3])
+
+    spi_message_creator.enable_instrumentation()
+    assert spi_message_creator.create_write_memory_words("neurons", [1, 2, 3]) == words
+
+    spi_message_creator.disable_instrumentation()
+
+    assert spi_message_creator.stats is None
+    assert "create_write_memory_words" not in vars(spi_message_creator)
+    assert spi_message_creator.create_write_memory_words.__func__ is SpiMessageCreator.create_write_memory_words
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from asic_cells.batch import TransactionBatch
+from asic_cells.link import Operation, SpiLinkModel, sweep_bit_widths
+
+from conftest import CONFIG_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES
+
+
+def test_analytical_estimate_matches_trace(spi_message_creator):
+    model = SpiLinkModel(spi_message_creator, sck_frequency=10e6, core_frequency=100e6)
+
+    operations = [Operation.config(["weights", "leak"]), Operation.write_memory("synapses"), Operation.read_memory("neurons", num_rows=10, start_row=3), Operation.read_pointers(["state", "errors"])]
+    words = [
+        spi_message_creator.create_config_words({"weights": [1, 2, 3, 4], "leak": 5}),
+        spi_message_creator.create_write_memory_array("synapses", np.arange(4096)),
+        spi_message_creator.create_read_memory_array("neurons", 12, 40),
+        spi_message_creator.create_pointer_burst_words(["state", "errors"]),
+    ]
+
+    for operation, operation_words in zip(operations, words):
+        estimate = model.estimate(operation)
+        trace = model.estimate_words(operation_words)
+
+        assert len(trace.operations) == 1
+        assert (estimate.num_headers, estimate.num_data_words, estimate.wire_bits) == (trace.operations[0].num_headers, trace.operations[0].num_data_words, trace.wire_bits)
+        assert estimate.wire_time == pytest.approx(len(operation_words) * 32 / 10e6)
+
+    # The synapses need three bursts of at most 2047 words
+    write = model.estimate(operations[1])
+    assert write.num_headers == 3
+    assert write.header_overhead == pytest.approx(3 / 4099)
+    assert write.latency == pytest.approx(4099 * 32 / 10e6 + 3 / 100e6)
+
+    # The pointers at addresses 0 and 3 are read in two bursts, as the gap of two words costs more than a header
+    poll = model.estimate(operations[3])
+    assert (poll.num_headers, poll.num_data_words, poll.num_payload_words) == (2, 2, 2)
+
+    # A whole batch is split into one operation per run of bursts of the same kind
+    batch = TransactionBatch(spi_message_creator)
+    batch.write_config({"enable": 1})
+    batch.write_memory("neurons", np.arange(8))
+    batch.read_pointers(["state"])
+
+    assert [operation.kind for operation in model.estimate_words(batch.build().words).operations] == ["config", "write_memory", "read_pointers"]
+
+
+def test_read_feasibility(spi_message_creator):
+    workload = [Operation.read_memory("neurons"), Operation.write_memory("neurons")]
+
+    # Reads need the data within half an SCK period, which takes three core clock cycles
+    assert SpiLinkModel(spi_message_creator, 10e6, 60e6).estimate_workload(workload).feasible
+    assert not SpiLinkModel(spi_message_creator, 10e6, 50e6).estimate_workload(workload).feasible
+
+
+def test_pointer_reads_cross_like_memory_reads(spi_message_creator):
+    model = SpiLinkModel(spi_message_creator, 10e6, 60e6)
+
+    pointers = model.estimate(Operation.read_pointers(["state"]))
+    memory = model.estimate(Operation.read_memory("neurons", num_rows=1))
+
+    # The pointer bridge registers its output, so pointer data arrives as late as memory data
+    assert pointers.read_slack == pytest.approx(memory.read_slack)
+    assert pointers.read_slack == pytest.approx(0.5 / 10e6 - 3 / 60e6)
+    assert not SpiLinkModel(spi_message_creator, 10e6, 50e6).estimate(Operation.read_pointers(["state"])).feasible
+
+
+def test_sweep_bit_widths():
+    workload = [Operation.write_memory("synapses", repeat=10), Operation.config(["weights"]), Operation.read_pointers(["status"], repeat=1000)]
+
+    estimates = sweep_bit_widths(CONFIG_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES, workload, 10e6, 100e6)
+
+    assert estimates
+    assert [e.seconds for e in estimates] == sorted(e.seconds for e in estimates)
+    assert all(e.code_bit_width == 2 and 0 < e.num_transactions_bit_width <= e.address_bit_width for e in estimates)
+
+    # The synapses need 12 address bits, but spi_client does not allow more transaction bits than address bits
+    assert min(e.address_bit_width for e in estimates if e.message_bit_width == 32) == 15
+    # 16 bits leave no room for the number of transactions and 32-bit synapses cannot be written with 64-bit messages
+    assert {e.message_bit_width for e in estimates} == {32}
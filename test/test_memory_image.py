@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from asic_cells.memory_image import MemoryImage
+
+
+def write_all_formats(tmp_path, data):
+    data.astype("<u4").tofile(tmp_path / "image.bin")
+    np.save(tmp_path / "image.npy", data.astype(np.uint32))
+
+    with open(tmp_path / "image.hex", "w") as f:
+        f.write("// Weights\n@0\n")
+        f.write("\n".join(format(int(value), "08x") for value in data))
+        f.write("\n/* end of\nimage */\n")
+
+    return [tmp_path / "image.bin", tmp_path / "image.npy", tmp_path / "image.hex"]
+
+
+def test_memory_image_streams_identical_bursts(tmp_path, spi_message_creator):
+    creator = spi_message_creator
+
+    data = np.random.default_rng(0).integers(0, 2**32, size=3000, dtype=np.uint64)
+    expected = creator.create_write_memory_words("synapses", data.tolist(), 7)
+
+    for path in write_all_formats(tmp_path, data):
+        with MemoryImage(path, 32) as image:
+            assert len(image) == data.size
+            assert np.concatenate(list(creator.iter_write_memory_words("synapses", image, 7))).tolist() == expected
+
+
+def test_memory_image_splits_wide_hex_entries(tmp_path):
+    (tmp_path / "rows.hex").write_text("0000000300000002_0000000100000000\nffffffff000000000000000000000005\n")
+
+    with MemoryImage(tmp_path / "rows.hex", 32, entry_bit_width=128) as image:
+        assert len(image) == 8
+        assert np.concatenate(list(image.iter_chunks(3))).tolist() == [0, 1, 2, 3, 5, 0, 0, 2**32 - 1]
+
+
+def test_memory_image_is_checked_against_memory_size(tmp_path, spi_message_creator):
+    creator = spi_message_creator
+
+    np.zeros(257, dtype="<u4").tofile(tmp_path / "too_large.bin")
+
+    with MemoryImage(tmp_path / "too_large.bin", 32) as image:
+        with pytest.raises(ValueError):
+            creator.iter_write_memory_words("neurons", image)
+
+    (tmp_path / "gap.hex").write_text("00\n@5\n01\n")
+
+    with pytest.raises(ValueError):
+        MemoryImage(tmp_path / "gap.hex", 32)
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from asic_cells.batch import TransactionBatch
+from asic_cells.decoder import SpiResponseDecoder
+from asic_cells.model import SpiChipModel
+from asic_cells.spi import SpiMessageCreator
+
+from conftest import CONFIG_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES
+
+
+def test_model_config_and_pointers(spi_message_creator):
+    creator = spi_message_creator
+    model = SpiChipModel(creator)
+
+    model.transfer(creator.pack(creator.create_config_words({"threshold": 0x1FF, "offsets": [1, 2], "leak": 7})))
+
+    assert model.config_value("threshold") == 0xFF
+    assert model.config_value("offsets") == [1, 2, 0, 0]
+    assert model.config_value("leak") == 7
+
+    model.reset()
+
+    assert model.config_value("leak") == 0
+    assert model.config_value("offsets") == [1, 2, 0, 0]
+
+    model.set_pointer("counter", 0x12345)
+    model.set_pointer("errors", 3)
+
+    sent = creator.create_pointer_burst_words(["counter", "errors"])
+
+    assert SpiResponseDecoder(creator).decode(sent, model.transfer(sent)).pointers == {"counter": 0x2345, "status": 0, "errors": 3}
+
+
+def test_model_memories_match_written_rows(spi_message_creator):
+    creator = spi_message_creator
+    model = SpiChipModel(creator)
+
+    rows = np.random.default_rng(2).integers(0, 2**64, size=(64, 2), dtype=np.uint64)
+    words = creator.create_write_rows_array("neurons", rows)
+
+    # Bursts may be split over multiple transfers
+    model.transfer(words[:1000])
+    model.transfer(words[1000:])
+
+    assert np.array_equal(model.memory_rows("neurons"), rows)
+
+    batch = TransactionBatch(creator)
+    batch.write_memory("synapses", np.arange(3000), 100)
+    batch.read_memory("synapses", 50, 3100)
+    batch.read_memory("neurons", 0, 256)
+
+    sent = batch.build().words
+    decoded = SpiResponseDecoder(creator).decode(sent, model.transfer(sent))
+
+    assert decoded.memory("synapses").tolist() == [0] * 50 + list(range(3000)) + [0] * 50
+    assert np.array_equal(decoded.memory("neurons", output="limbs"), rows)
+    assert model.num_headers == 1 + 2 + 2 + 1
+
+
+def test_model_constant_pointers():
+    pointers = [[8, "state"], [5, "version", True], ["16'hBEEF", "magic", True], [4, "errors", False]]
+    creator = SpiMessageCreator(32, 4, 16, CONFIG_SIZES_AND_NAMES, pointers, MEMORY_SIZES_AND_NAMES)
+    model = SpiChipModel(creator)
+
+    assert creator.register_map.pointers["version"].constant == 5
+    assert creator.register_map.pointers["errors"].constant is None
+
+    model.set_pointer("state", 0x1FF)
+    model.set_pointer("errors", 0xFF)
+
+    sent = creator.create_pointer_burst_words(["state", "version", "magic", "errors"])
+
+    assert SpiResponseDecoder(creator).decode(sent, model.transfer(sent)).pointers == {"state": 0xFF, "version": 5, "magic": 0xBEEF, "errors": 0xF}
+
+    with pytest.raises(ValueError):
+        model.set_pointer("version", 6)
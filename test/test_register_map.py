@@ -0,0 +1,59 @@
+from asic_cells.decoder import SpiResponseDecoder
+from asic_cells.model import SpiChipModel
+from asic_cells.register_map import RegisterMap, evaluate_bit_width
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.traffic import RandomTrafficGenerator
+
+from conftest import CONFIG_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES
+
+
+def test_register_map_lookups(spi_message_creator):
+    register_map = spi_message_creator.register_map
+
+    assert [(r.address, r.count) for r in register_map.registers.values()] == [(0, 1), (1, 1), (2, 4), (6, 4), (10, 1)]
+    assert register_map.registers["offsets"].bit_width == 8
+    assert register_map.pointers["status"].address == 2
+    assert register_map.pointers["status"].header == spi_message_creator.create_pointer_word("status")
+    assert register_map.memories["neurons"].max_address == 256
+    assert register_map.memories["synapses"].read_header_prefix | 3 << 11 | 5 == spi_message_creator.create_read_memory_word("synapses", 3, 5)
+    assert register_map.registers["weights"].header_prefix | 4 == spi_message_creator._create_instruction_word(False, 0, 2, 4)
+
+
+def test_register_map_save_and_load(tmp_path):
+    layout = (32, 4, 16, CONFIG_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES)
+
+    register_map = RegisterMap(*layout)
+
+    # The layout hash is only computed when it is used
+    assert "layout_hash" not in vars(register_map)
+
+    register_map.save(tmp_path / "register_map.json")
+    loaded_register_map = RegisterMap.load(tmp_path / "register_map.json")
+
+    assert loaded_register_map.to_dict() == register_map.to_dict()
+    assert loaded_register_map.layout_hash == register_map.layout_hash
+
+    creator = SpiMessageCreator.from_register_map(loaded_register_map)
+    config = {"threshold": 3, "offsets": [1, 2]}
+
+    assert creator.create_config_messages(config) == SpiMessageCreator(*layout).create_config_messages(config)
+
+    assert RegisterMap(32, 4, 15, CONFIG_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES).layout_hash != register_map.layout_hash
+
+
+def test_unsupported_bit_widths_are_not_masked():
+    assert evaluate_bit_width("N-1", {"N": 8}) == 7
+    assert evaluate_bit_width("N-1", {}) is None
+    assert evaluate_bit_width("$clog2(N)", {"N": 8}) is None
+    assert evaluate_bit_width("N/2", {"N": 8}) is None
+
+    creator = SpiMessageCreator(32, 4, 16, [[8, "threshold"], ["$clog2(NUM_NEURONS)", "neuron"]], [["$clog2(NUM_NEURONS)", "state"]], MEMORY_SIZES_AND_NAMES)
+
+    model = SpiChipModel(creator, {"NUM_NEURONS": 256})
+    model.transfer(creator.create_config_words({"threshold": 0x1FF, "neuron": 0x1FF}))
+
+    assert model.config_value("threshold") == 0xFF
+    assert model.config_value("neuron") == 0x1FF
+
+    SpiResponseDecoder(creator)
+    RandomTrafficGenerator(creator, seed=0).generate(10)
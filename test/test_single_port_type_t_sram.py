@@ -1,27 +1,39 @@
-from pathlib import Path
+import os
 
 import pytest
 
-from cocotb_test.simulator import run
+from harness import Simulation, build_all, cell_sources
 
+PARAMETERS = [{"WIDTH": "8", "NUM_ROWS": "128"}, {"WIDTH": "3", "NUM_ROWS": "47"}, {"WIDTH": "128", "NUM_ROWS": "256"}]
 
-@pytest.mark.parametrize("parameters", [{"WIDTH": "8", "NUM_ROWS": "128"}, {"WIDTH": "3", "NUM_ROWS": "47"}, {"WIDTH": "128", "NUM_ROWS": "256"}])
-def test_single_port_type_t_sram(parameters):
-    module_name = "single_port_type_t_sram"
+# The full-size macro takes long to build and simulate, so it only runs when SRAM_FULL_SIZE is set
+if os.environ.get("SRAM_FULL_SIZE"):
+    PARAMETERS.append({"WIDTH": "128", "NUM_ROWS": "4096"})
 
-    file_dir = Path(__file__).resolve().parent
-    source_dir = str(file_dir / ".." / "src" / "sram")
 
-    run(
-        simulator="verilator",
-        verilog_sources=[f"{source_dir}/{module_name}.sv"],
+def create_simulation(parameters):
+    module_name = "single_port_type_t_sram"
+
+    return Simulation(
         toplevel=module_name,
-        module=f"tests.{module_name}_tests",
+        verilog_sources=cell_sources(f"sram/{module_name}.sv"),
+        module="tests.single_port_tsmc_sram_tests",
         parameters=parameters,
         # compile_args=[f"+incdir+{source_dir}"], #  '--x-assign unique', '--x-initial unique'
-        extra_args=["--trace", "--coverage"], # Store a VCD file in the sim_build directory
+        extra_args=["--trace", "--coverage"], # Store a VCD file in the run directory
     )
 
 
+@pytest.fixture(scope="module", autouse=True)
+def build_models():
+    # Compile all parametrizations concurrently, the tests below then only run the cached models
+    build_all(create_simulation(parameters) for parameters in PARAMETERS)
+
+
+@pytest.mark.parametrize("parameters", PARAMETERS)
+def test_single_port_type_t_sram(parameters):
+    create_simulation(parameters).run()
+
+
 if __name__ == "__main__":
     test_single_port_type_t_sram({"WIDTH": "8", "NUM_ROWS": "128"})
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from asic_cells.config_shadow import ConfigShadow
+from asic_cells.model import SpiChipModel
+from asic_cells.snapshot import ChipSnapshot, create_restore_words, restore
+from asic_cells.spi import SpiMessageCreator
+
+from conftest import CONFIG_SIZES_AND_NAMES, MEMORY_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES
+
+
+def fill_model(creator, seed=0):
+    model = SpiChipModel(creator)
+    rng = np.random.default_rng(seed)
+
+    shadow = ConfigShadow(creator)
+    model.transfer(np.asarray(shadow.create_config_words({"enable": 1, "threshold": 200, "weights": [1, 2, 3, 4], "leak": 9}), dtype=np.uint64))
+
+    for key, memory in model.memories.items():
+        memory[:] = rng.integers(0, 2**creator.message_bit_width, size=memory.size, dtype=np.uint64)
+
+    model.set_pointer("counter", 0x1234)
+
+    return model, shadow
+
+
+def test_snapshot_round_trip(spi_message_creator, tmp_path):
+    creator = spi_message_creator
+    model, shadow = fill_model(creator)
+
+    snapshot = ChipSnapshot.capture(creator, model.transfer, shadow)
+
+    assert snapshot.pointers[creator.register_map.pointers["counter"].address] == 0x1234
+    assert np.array_equal(snapshot.config[snapshot.config_known], model.config[snapshot.config_known])
+    assert not snapshot.config_known[creator.register_map.registers["offsets"].address]
+
+    snapshot.save(tmp_path / "chip.snap")
+
+    with ChipSnapshot.load(tmp_path / "chip.snap", creator) as loaded:
+        # Words of 32 bits are stored in 4 bytes each
+        assert loaded.memories["synapses"].dtype == np.dtype("<u4")
+        assert loaded.num_bytes < snapshot.num_bytes
+
+        for key, memory in model.memories.items():
+            assert np.array_equal(loaded.memories[key], memory)
+
+        target = SpiChipModel(creator)
+        restore(creator, target.transfer, loaded)
+
+    for key, memory in model.memories.items():
+        assert np.array_equal(target.memories[key], memory)
+
+    assert np.array_equal(target.config, model.config)
+
+
+def test_warm_restore_only_sends_differences(spi_message_creator):
+    creator = spi_message_creator
+    model, shadow = fill_model(creator)
+
+    baseline = ChipSnapshot.capture(creator, model.transfer, shadow)
+
+    model.memories["synapses"][[10, 11, 13, 3000]] += 1
+    model.memories["neurons"][5] ^= 1
+    model.transfer(np.asarray(shadow.create_config_words({"leak": 10}), dtype=np.uint64))
+
+    snapshot = ChipSnapshot.capture(creator, model.transfer, shadow)
+
+    cold = create_restore_words(creator, snapshot)
+    warm = create_restore_words(creator, snapshot, baseline)
+
+    # One burst for the config, two for the synapses (10 up to and including 13, bridging the unchanged 12) and one for the neurons
+    assert warm.size == 2 + 5 + 2 + 2
+    assert warm.size < cold.size / 100
+
+    target = SpiChipModel(creator)
+    restore(creator, target.transfer, baseline)
+
+    assert restore(creator, target.transfer, snapshot, baseline) == warm.size
+
+    for key, memory in model.memories.items():
+        assert np.array_equal(target.memories[key], memory)
+
+    assert np.array_equal(target.config, model.config)
+    assert create_restore_words(creator, snapshot, snapshot).size == 0
+
+
+def test_snapshot_layout_mismatch(spi_message_creator, tmp_path):
+    model, shadow = fill_model(spi_message_creator)
+    ChipSnapshot.capture(spi_message_creator, model.transfer, shadow).save(tmp_path / "chip.snap")
+
+    other = SpiMessageCreator(32, 4, 16, CONFIG_SIZES_AND_NAMES, POINTER_SIZES_AND_NAMES, {"neurons": MEMORY_SIZES_AND_NAMES["neurons"]})
+
+    with pytest.raises(ValueError):
+        ChipSnapshot.load(tmp_path / "chip.snap", other)
+
+    (tmp_path / "other.snap").write_bytes(b"not a snapshot" * 10)
+
+    with pytest.raises(ValueError):
+        ChipSnapshot.load(tmp_path / "other.snap")
@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+from asic_cells.utils import unpack_words
+
+
+def test_instruction_message_format(spi_message_creator):
+    creator = spi_message_creator
+
+    assert creator.num_transactions_bit_width == 11
+    assert creator._create_instruction_message(True, 2, 5, 3) == "1" + "0010" + format(5, "016b") + format(3, "011b")
+
+
+def test_config_messages(spi_message_creator):
+    creator = spi_message_creator
+
+    messages = creator.create_config_messages({"threshold": 7, "offsets": [1, 2, 3]})
+
+    assert messages == [
+        creator._create_instruction_message(False, 0, 1, 1),
+        format(7, "032b"),
+        creator._create_instruction_message(False, 0, 6, 3),
+        format(1, "032b"),
+        format(2, "032b"),
+        format(3, "032b"),
+    ]
+
+    with pytest.raises(ValueError):
+        creator.create_config_messages({"offsets": [0] * 5})
+
+
+def test_write_memory_messages_are_chunked(spi_message_creator):
+    creator = spi_message_creator
+
+    data = list(range(3000))
+    messages = creator.create_write_memory_messages("synapses", data, start_address=10)
+
+    assert len(messages) == len(data) + 2
+    assert messages[0] == creator._create_instruction_message(False, 2, 10, 2047)
+    assert messages[2048] == creator._create_instruction_message(False, 2, 10 + 2047, 3000 - 2047)
+    assert [int(m, 2) for m in messages[1:2048] + messages[2049:]] == data
+
+    with pytest.raises(ValueError):
+        creator.create_write_memory_messages("neurons", [0] * 257)
+
+
+@pytest.mark.parametrize("byteorder", ["big", "little"])
+@pytest.mark.parametrize("bit_order", ["msb", "lsb"])
+def test_packed_output_round_trips(byteorder, bit_order, spi_message_creator):
+    creator = spi_message_creator
+
+    words = creator.create_write_memory_words("neurons", [0, 1, 2**32 - 1, 0x12345678])
+
+    packed = creator.pack(words, "bytes", byteorder, bit_order)
+
+    assert len(packed) == 4 * len(words)
+    assert unpack_words(packed, 32, byteorder, bit_order).tolist() == words
+
+
+def test_packed_output_matches_binary_strings(spi_message_creator):
+    creator = spi_message_creator
+
+    config = {"enable": 1, "weights": [0xABCD, 0x1234]}
+    packed = creator.pack(creator.create_config_words(config), "uint32")
+
+    assert "".join(creator.create_config_messages(config)) == "".join(format(int(word), "032b") for word in packed)
+    assert "".join(format(byte, "08b") for byte in creator.pack(creator.create_config_words(config))) == "".join(creator.create_config_messages(config))
+
+    reversed_bits = creator.pack([0x80000001], "bytes", bit_order="lsb")
+    assert reversed_bits == bytes([0x01, 0x00, 0x00, 0x80])
+
+    assert creator.pack([1, 2], "uint64").tolist() == [2**32 + 2]
+    assert isinstance(creator.pack([1], "bytearray"), bytearray)
+    assert creator.pack(np.array([3], dtype=np.uint32), "uint32", "little").dtype == np.dtype("<u4")
+
+
+@pytest.mark.parametrize("num_words, start_address", [(1, 0), (2047, 3), (2048, 0), (4096, 0), (4000, 17)])
+def test_write_memory_array_matches_list_path(num_words, start_address, spi_message_creator):
+    creator = spi_message_creator
+
+    data = np.random.default_rng(num_words).integers(0, 2**32, size=num_words, dtype=np.uint64)
+
+    words = creator.create_write_memory_array("synapses", data, start_address)
+
+    assert words.tolist() == creator.create_write_memory_words("synapses", data.tolist(), start_address)
+    assert creator.create_write_memory_array("synapses", memoryview(data.astype(np.uint32)), start_address).tolist() == words.tolist()
+
+
+def test_write_memory_array_range_checks(spi_message_creator):
+    creator = spi_message_creator
+
+    with pytest.raises(AssertionError):
+        creator.create_write_memory_array("synapses", np.array([0, -1]))
+
+    with pytest.raises(AssertionError):
+        creator.create_write_memory_array("synapses", np.array([0, 2**32]))
+
+    with pytest.raises(ValueError):
+        creator.create_write_memory_array("synapses", np.zeros(4097, dtype=np.uint32))
+
+
+def test_iter_write_memory_words_is_lazy_and_matches_list_path(spi_message_creator):
+    creator = spi_message_creator
+
+    data = list(range(4000))
+    expected = creator.create_write_memory_words("synapses", data, 5)
+
+    assert np.concatenate(list(creator.iter_write_memory_words("synapses", iter(data), 5))).tolist() == expected
+    assert np.concatenate(list(creator.iter_write_memory_words("synapses", np.array(data, dtype=np.uint32), 5))).tolist() == expected
+    assert sum(creator.iter_write_memory_messages("synapses", data, 5), []) == creator.create_write_memory_messages("synapses", data, 5)
+
+    bursts = creator.iter_write_memory_words("synapses", (i for i in range(100)), max_burst_length=16)
+    first = next(bursts)
+    assert first.tolist() == [creator._create_instruction_word(False, 2, 0, 16)] + list(range(16))
+    assert [len(burst) for burst in bursts] == [17] * 5 + [5]
+
+    with pytest.raises(ValueError):
+        list(creator.iter_write_memory_words("neurons", iter(range(300))))
+
+    with pytest.raises(ValueError):
+        creator.iter_write_memory_words("neurons", [0], max_burst_length=2048)
+
+
+def test_iter_config_messages(spi_message_creator):
+    creator = spi_message_creator
+
+    config = {"enable": 1, "weights": [1, 2, 3, 4], "leak": 5}
+
+    assert sum(creator.iter_config_messages(config), []) == creator.create_config_messages(config)
+    assert [burst.tolist() for burst in creator.iter_config_words(config)][1] == creator.create_config_words({"weights": [1, 2, 3, 4]})
+
+
+def test_rows_to_words_follows_memory_manager_slices(spi_message_creator):
+    creator = spi_message_creator
+
+    rng = np.random.default_rng(5)
+    limbs = rng.integers(0, 2**64, size=(64, 2), dtype=np.uint64)
+
+    words = creator.rows_to_words("neurons", limbs)
+    row_values = [int(low) | (int(high) << 64) for low, high in limbs.tolist()]
+
+    assert words.tolist() == [(value >> (32 * i)) & (2**32 - 1) for value in row_values for i in range(4)]
+
+    bits = np.array([[int(bit) for bit in format(value, "0128b")] for value in row_values], dtype=np.uint8)
+
+    assert creator.rows_to_words("neurons", bits).tolist() == words.tolist()
+    assert creator.rows_to_words("neurons", bits[:, ::-1], bitorder="little").tolist() == words.tolist()
+
+    assert np.array_equal(creator.words_to_rows("neurons", words), limbs)
+    assert np.array_equal(creator.words_to_rows("neurons", words, output="bits"), bits)
+
+    assert creator.create_write_rows_array("neurons", limbs[:3], start_row=2).tolist() == creator.create_write_memory_words("neurons", words[:12].tolist(), 8)
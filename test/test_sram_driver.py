@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from tests.sram_driver import SramTraffic, bits_to_words, decode_binstrs, full_words, reference_model, words_to_bits, words_to_ints
+
+
+def simulate(traffic):
+    """Cycle by cycle model of the type T SRAMs, with None for bits that are unknown."""
+
+    memory = [[None] * traffic.width for _ in range(traffic.num_rows)]
+    q = [None] * traffic.width
+    outputs = []
+
+    data = words_to_bits(traffic.data, traffic.width)
+    mask = words_to_bits(traffic.mask, traffic.width)
+
+    for cycle in range(len(traffic)):
+        if traffic.read_enable[cycle]:
+            q = list(memory[traffic.read_address[cycle]])
+
+        if traffic.write_enable[cycle]:
+            row = memory[traffic.write_address[cycle]]
+
+            for bit in range(traffic.width):
+                if not mask[cycle, bit]:
+                    row[bit] = int(data[cycle, bit])
+
+        outputs.append(q)
+
+    return outputs
+
+
+@pytest.mark.parametrize("width, single_port", [(8, True), (3, False), (70, True), (128, False)])
+def test_reference_model(width, single_port):
+    rng = np.random.default_rng(width)
+    num_rows = 13
+
+    traffic = SramTraffic.concatenate([
+        SramTraffic.random(rng, num_rows, width, 300, single_port=single_port),
+        SramTraffic.sweep(rng, num_rows, width, single_port=single_port),
+        SramTraffic.random(rng, num_rows, width, 300, read_probability=0.9, write_probability=0.2, single_port=single_port),
+    ])
+
+    assert traffic.single_port == single_port
+
+    expected, known = reference_model(traffic)
+
+    for cycle, output in enumerate(simulate(traffic)):
+        assert known[cycle].tolist() == [bit is not None for bit in output]
+        assert [int(b) for b, k in zip(expected[cycle], known[cycle]) if k] == [bit for bit in output if bit is not None]
+
+    # After the sweep every row is known
+    assert known[-1].all()
+
+
+def test_word_conversions():
+    rng = np.random.default_rng(0)
+    width = 100
+
+    words = SramTraffic.random(rng, 4, width, 50).data
+    ints = words_to_ints(words)
+
+    assert max(ints) < 1 << width
+    assert np.array_equal(bits_to_words(words_to_bits(words, width)), words)
+    assert words_to_ints(full_words(1, width)) == [(1 << width) - 1]
+
+    bits, defined = decode_binstrs([format(value, f"0{width}b") for value in ints[:-1]] + ["x" * width], width)
+
+    assert np.array_equal(bits_to_words(bits[:-1]), words[:-1])
+    assert defined[:-1].all() and not defined[-1].any()
@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+from asic_cells.decoder import SpiResponseDecoder
+from asic_cells.model import SpiChipModel
+from asic_cells.spi import SpiMessageCreator
+from asic_cells.traffic import OPERATION_KINDS, RandomTrafficGenerator
+
+
+def operation_limits(creator, kinds, codes):
+    register_map = creator.register_map
+    sizes = {memory.code: memory.max_address for memory in register_map.memories.values()}
+
+    return [register_map.config_size if OPERATION_KINDS[kind] == "config" else len(register_map.pointers) if OPERATION_KINDS[kind] == "read_pointers" else sizes[code] for kind, code in zip(kinds.tolist(), codes.tolist())]
+
+
+def test_random_traffic_is_legal_and_reproducible(spi_message_creator):
+    creator = spi_message_creator
+
+    traffic = RandomTrafficGenerator(creator, seed=5).generate(2000)
+
+    assert np.array_equal(traffic.words, RandomTrafficGenerator(creator, seed=5).generate(2000).words)
+    assert not np.array_equal(traffic.words, RandomTrafficGenerator(creator, seed=6).generate(2000).words)
+    assert all(count > 400 for count in traffic.counts().values())
+
+    max_burst_length = 2**creator.num_transactions_bit_width - 1
+    limits = operation_limits(creator, traffic.kinds, traffic.codes)
+
+    # Walk over the headers like the chip does
+    position = 0
+
+    for index, limit in enumerate(limits):
+        header = int(traffic.words[position])
+        num_transactions = header & max_burst_length
+        start_address = (header >> creator.num_transactions_bit_width) & (2**creator.address_bit_width - 1)
+
+        assert position == traffic.header_positions[index]
+        assert (num_transactions, start_address) == (traffic.num_transactions[index], traffic.start_addresses[index])
+        assert 1 <= num_transactions and start_address + num_transactions <= limit
+
+        position += 1 + num_transactions
+
+    assert position == traffic.num_words
+    assert traffic.pack() == creator.pack(traffic.words)
+
+    model = SpiChipModel(creator)
+    received = model.transfer(traffic.words)
+
+    assert model.num_headers == traffic.num_operations
+    assert len(SpiResponseDecoder(creator).decode(traffic.words, received).results) == sum(traffic.counts()[kind] for kind in ("read_memory", "read_pointers"))
+
+    # Configuration values fit their registers, so the model stores them as they were sent
+    config = np.zeros(creator.register_map.config_size, dtype=np.uint64)
+
+    for index in np.flatnonzero(traffic.kinds == OPERATION_KINDS.index("config")):
+        start, num_transactions = traffic.start_addresses[index], traffic.num_transactions[index]
+        config[start:start+num_transactions] = traffic.words[traffic.header_positions[index]+1:][:num_transactions]
+
+    assert np.array_equal(model.config, config)
+
+
+def test_random_traffic_mix_and_edge_cases(spi_message_creator):
+    creator = spi_message_creator
+    max_burst_length = 2**creator.num_transactions_bit_width - 1
+
+    traffic = RandomTrafficGenerator(creator, seed=1, mix={"write_memory": 1}, edge_case_rate=1.0).generate(500)
+
+    assert traffic.counts()["write_memory"] == 500
+
+    # The neurons hold fewer words than the longest burst, so their longest burst covers the whole memory
+    limits = np.array(operation_limits(creator, traffic.kinds, traffic.codes))
+
+    assert np.all((traffic.num_transactions == 1) | (traffic.num_transactions == np.minimum(limits, max_burst_length)))
+    at_boundary = (traffic.start_addresses == 0) | (traffic.start_addresses + traffic.num_transactions == limits)
+
+    assert at_boundary.all()
+
+    traffic = RandomTrafficGenerator(creator, seed=1, mix={"read_pointers": 1}, burst_length="max").generate(10)
+
+    assert np.all(traffic.num_transactions == len(creator.register_map.pointers))
+    assert np.all(traffic.start_addresses == 0)
+
+    with pytest.raises(ValueError):
+        RandomTrafficGenerator(creator, mix={"erase": 1})
+
+    with pytest.raises(ValueError):
+        RandomTrafficGenerator(creator, mix={"config": 0})
+
+    with pytest.raises(ValueError):
+        RandomTrafficGenerator(creator, burst_length="poisson")
+
+
+def test_random_traffic_stays_within_address_field():
+    # The memory holds 64 words, but a 4-bit start address only reaches the first 16
+    creator = SpiMessageCreator(16, 2, 4, [[8, "threshold"]], [[8, "state"]], {"m": {"num_rows": 64, "bit_width": 16}})
+
+    traffic = RandomTrafficGenerator(creator, seed=0, edge_case_rate=0.2).generate(200)
+
+    assert traffic.start_addresses.max() < 16
+    assert np.all(traffic.start_addresses + traffic.num_transactions <= 16)
+
+    headers = traffic.words[traffic.header_positions]
+    assert np.array_equal(headers >> np.uint64(15), (traffic.kinds >= OPERATION_KINDS.index("read_memory")).astype(np.uint64))
+    assert np.array_equal((headers >> np.uint64(13)) & np.uint64(3), traffic.codes)
@@ -0,0 +1,50 @@
+import asyncio
+
+import numpy as np
+
+from asic_cells.model import SpiChipModel
+from asic_cells.transport import LoopbackBackend, SpiTransport
+
+
+def test_transport_round_trip(spi_message_creator):
+    creator = spi_message_creator
+    model = SpiChipModel(creator)
+    model.set_pointer("counter", 1234)
+
+    data = np.random.default_rng(0).integers(0, 2**32, size=3000, dtype=np.uint64)
+
+    async def run():
+        # Small limits, such that transfers are coalesced, split and throttled
+        async with SpiTransport(creator, LoopbackBackend(model), max_in_flight_bytes=4096, max_transfer_bytes=1024) as transport:
+            await transport.write_config({"threshold": 17})
+            await asyncio.gather(*(transport.write_memory("synapses", data[i:i+500], i) for i in range(0, data.size, 500)))
+
+            reads = await asyncio.gather(transport.read_memory("synapses", 100, 600), transport.read_pointers(["counter"]))
+
+        return reads, transport
+
+    (memory, pointers), transport = asyncio.run(run())
+
+    assert np.array_equal(memory, data[100:700])
+    assert pointers == {"counter": 1234}
+    assert model.config_value("threshold") == 17
+    assert transport.num_transfers > 1
+    assert transport.bytes_transferred == model.num_words * 4
+    assert transport._in_flight_bytes == 0
+
+
+def test_transport_propagates_backend_errors(spi_message_creator):
+    creator = spi_message_creator
+
+    class FailingBackend(LoopbackBackend):
+        async def transfer(self, mosi):
+            raise OSError("bus error")
+
+    async def run():
+        async with SpiTransport(creator, FailingBackend(SpiChipModel(creator))) as transport:
+            try:
+                await transport.read_pointers(["state"])
+            except OSError as e:
+                return str(e)
+
+    assert asyncio.run(run()) == "bus error"
@@ -0,0 +1,317 @@
+"""Batched bus-functional driver for the type T SRAMs.
+
+Instead of computing stimulus and expected values cycle by cycle in the coroutine, `SramTraffic` precomputes a whole
+sequence of operations as NumPy arrays from a seeded generator, and `reference_model` computes the expected read data
+of all cycles at once. `SramDriver` then only assigns precomputed integers and stores the raw output strings every
+cycle, after which all outputs are decoded and checked in bulk.
+
+Words are stored as arrays of little-endian uint64 limbs with shape (num_cycles, num_limbs), such that memories that
+are wider than 64 bits can be handled with NumPy as well.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from cocotb.triggers import FallingEdge
+
+MASK_MODES = ("none", "full", "random")
+
+
+def num_limbs(width: int) -> int:
+    return (width + 63) // 64
+
+
+def random_words(rng: np.random.Generator, num_words: int, width: int) -> np.ndarray:
+    """Uniformly random words of `width` bits, as limbs."""
+
+    words = rng.integers(0, 1 << 64, size=(num_words, num_limbs(width)), dtype=np.uint64, endpoint=False)
+
+    if width % 64:
+        words[:, -1] &= np.uint64((1 << (width % 64)) - 1)
+
+    return words
+
+
+def words_to_bits(words: np.ndarray, width: int) -> np.ndarray:
+    """Unpack limbs into an array of bits with shape (num_words, width), least significant bit first."""
+
+    return np.unpackbits(np.ascontiguousarray(words, dtype="<u8").view(np.uint8), axis=1, bitorder="little")[:, :width]
+
+
+def bits_to_words(bits: np.ndarray) -> np.ndarray:
+    """Inverse of `words_to_bits`."""
+
+    num_words, width = bits.shape
+    padded = np.zeros((num_words, num_limbs(width) * 64), dtype=np.uint8)
+    padded[:, :width] = bits
+
+    return np.packbits(padded, axis=1, bitorder="little").view("<u8").astype(np.uint64)
+
+
+def full_words(num_words: int, width: int) -> np.ndarray:
+    """Words with all `width` bits set, as limbs."""
+
+    return bits_to_words(np.ones((num_words, width), dtype=np.uint8))
+
+
+def words_to_ints(words: np.ndarray) -> list:
+    """Convert limbs into a list of Python integers, which is what the simulator handles expect."""
+
+    limbs = [words[:, i].tolist() for i in range(words.shape[1])]
+    ints = limbs[0]
+
+    for i, limb in enumerate(limbs[1:], 1):
+        ints = [value | (high << (64 * i)) for value, high in zip(ints, limb)]
+
+    return ints
+
+
+class SramTraffic:
+    """A precomputed sequence of SRAM operations, one per clock cycle.
+
+    Every cycle can read one row (`read_enable`, `read_address`) and write one row (`write_enable`, `write_address`,
+    `data`, `mask`); a mask bit of 1 keeps the stored bit. For the single port SRAM a cycle either reads or reads and
+    writes the same address, see `single_port`.
+    """
+
+    def __init__(self, num_rows: int, width: int, read_enable: np.ndarray, read_address: np.ndarray, write_enable: np.ndarray, write_address: np.ndarray, data: np.ndarray, mask: np.ndarray):
+        self.num_rows = num_rows
+        self.width = width
+
+        self.read_enable = np.asarray(read_enable, dtype=bool)
+        self.read_address = np.asarray(read_address, dtype=np.int64)
+        self.write_enable = np.asarray(write_enable, dtype=bool)
+        self.write_address = np.asarray(write_address, dtype=np.int64)
+        self.data = np.asarray(data, dtype=np.uint64)
+        self.mask = np.asarray(mask, dtype=np.uint64)
+
+        assert self.data.shape == self.mask.shape == (len(self), num_limbs(width)), "Data and masks need one row of limbs per cycle"
+        assert all(a.shape == (len(self),) for a in (self.read_enable, self.read_address, self.write_enable, self.write_address)), "All arrays need one entry per cycle"
+        assert np.all((self.read_address >= 0) & (self.read_address < num_rows) & (self.write_address >= 0) & (self.write_address < num_rows)), "Address out of range"
+
+    def __len__(self):
+        return len(self.read_enable)
+
+    @property
+    def single_port(self) -> bool:
+        """Whether the traffic can be driven on the single port SRAM, which always reads the row that it writes."""
+
+        return bool(np.all(self.read_enable | ~self.write_enable) and np.all((self.read_address == self.write_address) | ~self.write_enable))
+
+    @classmethod
+    def random(cls, rng: np.random.Generator, num_rows: int, width: int, num_cycles: int, read_probability: float = 0.5, write_probability: float = 0.5, mask_modes: Sequence[str] = MASK_MODES, single_port: bool = True) -> "SramTraffic":
+        """Random traffic with uniformly distributed addresses and data.
+
+        Args:
+            rng (np.random.Generator): Seeded generator, for example `np.random.default_rng(seed)`
+            num_rows (int): Number of rows of the SRAM
+            width (int): Bit width of the SRAM
+            num_cycles (int): Number of cycles
+            read_probability (float, optional): Probability that a cycle reads. Defaults to 0.5.
+            write_probability (float, optional): Probability that a cycle writes. Defaults to 0.5.
+            mask_modes (Sequence[str], optional): Masks to choose from per write: "none" (write all bits), "full" (write nothing) and "random". Defaults to all.
+            single_port (bool, optional): Generate traffic for the single port SRAM, where every write also reads the written row. Defaults to True.
+        """
+
+        assert set(mask_modes) <= set(MASK_MODES), f"Unknown mask mode in {mask_modes} (supported: {MASK_MODES})"
+
+        write_enable = rng.random(num_cycles) < write_probability
+        read_enable = rng.random(num_cycles) < read_probability
+        write_address = rng.integers(0, num_rows, num_cycles)
+
+        if single_port:
+            read_enable |= write_enable
+            read_address = write_address
+        else:
+            read_address = rng.integers(0, num_rows, num_cycles)
+
+        modes = rng.integers(0, len(mask_modes), num_cycles)
+        mask = random_words(rng, num_cycles, width)
+        mask[np.asarray(mask_modes)[modes] == "none"] = 0
+        mask[np.asarray(mask_modes)[modes] == "full"] = full_words(1, width)
+
+        return cls(num_rows, width, read_enable, read_address, write_enable, write_address, random_words(rng, num_cycles, width), mask)
+
+    @classmethod
+    def sweep(cls, rng: np.random.Generator, num_rows: int, width: int, mask: Optional[np.ndarray] = None, single_port: bool = True) -> "SramTraffic":
+        """Write every row in order with random data, then read every row back in order.
+
+        Args:
+            mask (Optional[np.ndarray], optional): Mask limbs for all writes. Defaults to writing all bits.
+        """
+
+        addresses = np.concatenate([np.arange(num_rows), np.arange(num_rows)])
+        write_enable = np.arange(2 * num_rows) < num_rows
+        masks = np.zeros((2 * num_rows, num_limbs(width)), dtype=np.uint64)
+
+        if mask is not None:
+            masks[:] = mask
+
+        return cls(num_rows, width, ~write_enable | single_port, addresses, write_enable, addresses, random_words(rng, 2 * num_rows, width), masks)
+
+    @classmethod
+    def concatenate(cls, traffics: Sequence["SramTraffic"]) -> "SramTraffic":
+        """Run several sequences back to back; the memory contents carry over."""
+
+        first = traffics[0]
+        assert all(t.num_rows == first.num_rows and t.width == first.width for t in traffics), "All traffic needs to target the same SRAM"
+
+        return cls(first.num_rows, first.width, *(np.concatenate([getattr(t, name) for t in traffics]) for name in ("read_enable", "read_address", "write_enable", "write_address", "data", "mask")))
+
+
+def reference_model(traffic: SramTraffic) -> Tuple[np.ndarray, np.ndarray]:
+    """Compute the output of the SRAM after every cycle at once.
+
+    A read returns the contents of the row before the write of the same cycle, and the output holds its value in cycles
+    without a read. Every bit of a row is the data bit of the last write that did not mask it, so per row and per bit
+    this is a running maximum over the indices of those writes. Bits that were never written, and outputs before the
+    first read, are unknown.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Expected output bits and which of them are known, both with shape (num_cycles, width)
+    """
+
+    num_cycles, width = len(traffic), traffic.width
+    cycles = np.arange(num_cycles)
+
+    reads = cycles[traffic.read_enable]
+    writes = cycles[traffic.write_enable]
+
+    # One event per read and write; within the same row and cycle the read comes first
+    event_address = np.concatenate([traffic.read_address[reads], traffic.write_address[writes]])
+    event_cycle = np.concatenate([reads, writes])
+    event_is_write = np.concatenate([np.zeros(len(reads), dtype=bool), np.ones(len(writes), dtype=bool)])
+    order = np.lexsort((event_is_write, event_cycle, event_address))
+
+    event_address = event_address[order]
+    event_cycle = event_cycle[order]
+    event_is_write = event_is_write[order]
+    num_events = len(order)
+
+    # Position of the first event of the row of every event, such that the running maximum restarts at every row
+    row_start = np.flatnonzero(np.r_[True, event_address[1:] != event_address[:-1]]) if num_events else np.zeros(0, dtype=np.int64)
+    segment_start = np.repeat(row_start, np.diff(np.r_[row_start, num_events]))
+
+    written_bits = np.zeros((num_events, width), dtype=bool)
+    written_bits[event_is_write] = words_to_bits(traffic.mask[event_cycle[event_is_write]], width) == 0
+
+    # Index of the last event that wrote each bit, or the start of the row minus one if there is none
+    last_write = np.where(written_bits, np.arange(num_events, dtype=np.int64)[:, None], (segment_start - 1)[:, None])
+    np.maximum.accumulate(last_write, axis=0, out=last_write)
+
+    read_events = np.flatnonzero(~event_is_write)
+    read_last_write = last_write[read_events]
+    read_known = read_last_write >= segment_start[read_events][:, None]
+
+    data_bits = words_to_bits(traffic.data, width)
+    read_bits = np.where(read_known, data_bits[event_cycle[np.maximum(read_last_write, 0)], np.arange(width)], 0).astype(np.uint8)
+
+    # Forward fill the read results into the cycles without a read; read events are sorted by row, not by cycle
+    read_index = np.full(num_cycles, -1, dtype=np.int64)
+    read_index[event_cycle[read_events]] = np.arange(len(read_events))
+    last_read_cycle = np.maximum.accumulate(np.where(traffic.read_enable, cycles, -1))
+    has_read = last_read_cycle >= 0
+    read_of_cycle = np.where(has_read, read_index[np.maximum(last_read_cycle, 0)], -1)
+
+    expected = np.zeros((num_cycles, width), dtype=np.uint8)
+    known = np.zeros((num_cycles, width), dtype=bool)
+    expected[has_read] = read_bits[read_of_cycle[has_read]]
+    known[has_read] = read_known[read_of_cycle[has_read]]
+
+    return expected, known
+
+
+def decode_binstrs(binstrs: Sequence[str], width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Decode the value strings of the simulator (most significant bit first) into bits and a mask of bits that are 0 or 1."""
+
+    chars = np.frombuffer("".join(binstrs).encode("ascii"), dtype=np.uint8).reshape(len(binstrs), width)[:, ::-1]
+
+    return (chars == ord("1")).astype(np.uint8), (chars == ord("0")) | (chars == ord("1"))
+
+
+class SramDriver:
+    """Drives `SramTraffic` into a single or double port type T SRAM and checks its outputs in bulk."""
+
+    def __init__(self, dut, traffic: SramTraffic, double_port: bool = False):
+        """Create a driver.
+
+        Args:
+            dut: Handle of the SRAM
+            traffic (SramTraffic): Operations to drive, one per clock cycle
+            double_port (bool, optional): Drive the ports of `double_port_type_t_sram` instead of `single_port_type_t_sram`. Defaults to False.
+        """
+
+        assert int(dut.WIDTH) == traffic.width and int(dut.NUM_ROWS) == traffic.num_rows, "Traffic was generated for a different SRAM"
+        assert double_port or traffic.single_port, "Traffic reads and writes different rows in the same cycle, which the single port SRAM cannot do"
+
+        self.dut = dut
+        self.traffic = traffic
+        self.double_port = double_port
+
+    def _inputs(self):
+        traffic = self.traffic
+        dut = self.dut
+
+        data = words_to_ints(traffic.data)
+        mask = words_to_ints(traffic.mask)
+
+        if self.double_port:
+            return (dut.REB, dut.WEB, dut.AB, dut.AA, dut.D, dut.M), \
+                list(zip((~traffic.read_enable).astype(int).tolist(), (~traffic.write_enable).astype(int).tolist(), traffic.read_address.tolist(), traffic.write_address.tolist(), data, mask))
+
+        enable = traffic.read_enable | traffic.write_enable
+
+        return (dut.CEB, dut.WEB, dut.A, dut.D, dut.M), \
+            list(zip((~enable).astype(int).tolist(), (~traffic.write_enable).astype(int).tolist(), traffic.read_address.tolist(), data, mask))
+
+    async def run(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Drive all operations, one per rising edge of CLK, which must be running already.
+
+        Inputs are applied and Q is sampled on the falling edges, half a period away from the edges at which the SRAM
+        samples its inputs and updates its output.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Output bits after every cycle and which of them are 0 or 1, see `decode_binstrs`
+        """
+
+        handles, values = self._inputs()
+        clock = self.dut.CLK
+        # Reading the raw string avoids constructing a BinaryValue every cycle
+        q = self.dut.Q._handle
+
+        binstrs = []
+
+        for cycle_values in values:
+            await FallingEdge(clock)
+            binstrs.append(q.get_signal_val_binstr())
+
+            for handle, value in zip(handles, cycle_values):
+                handle.value = value
+
+        await FallingEdge(clock)
+        binstrs.append(q.get_signal_val_binstr())
+
+        # Disable the SRAM again
+        handles[0].value = 1
+        handles[1].value = 1
+
+        # The first sample precedes the first operation
+        return decode_binstrs(binstrs[1:], self.traffic.width)
+
+    def check(self, observed: np.ndarray, defined: np.ndarray, max_errors: int = 10):
+        """Compare the sampled outputs with the reference model and raise an AssertionError listing the first mismatches."""
+
+        expected, known = reference_model(self.traffic)
+        errors = known & ((observed != expected) | ~defined)
+        cycles = np.flatnonzero(errors.any(axis=1))
+
+        if len(cycles):
+            expected_ints = words_to_ints(bits_to_words(expected[cycles[:max_errors]]))
+            observed_ints = words_to_ints(bits_to_words(observed[cycles[:max_errors]]))
+            lines = [f"cycle {c}: expected {e:#x}, got {o:#x} (bits {np.flatnonzero(errors[c]).tolist()})" for c, e, o in zip(cycles, expected_ints, observed_ints)]
+
+            raise AssertionError(f"{len(cycles)} of {len(self.traffic)} cycles have a wrong output:\n" + "\n".join(lines))
+
+    async def run_and_check(self, max_errors: int = 10):
+        self.check(*(await self.run()), max_errors)